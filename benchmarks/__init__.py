@@ -0,0 +1 @@
+"""This houses the benchmarks for the project."""
@@ -0,0 +1,715 @@
+"""
+This module contains a local stand-in for the Discord REST API.
+
+Only the routes the bot uses are implemented. Every route is rate limited per
+bucket the way Discord does it, with the same headers and 429 responses, so the
+rate limit handling of discord.py is exercised as well. The gateway is replaced
+by a callback which receives the events the REST calls would have caused.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Awaitable, Callable
+
+from aiohttp import web
+
+DISCORD_EPOCH = 1420070400000
+API = "/api/v10"
+
+# The requests per window of every route, the default applies to the rest.
+ROUTE_LIMITS: dict[str, tuple[int, float]] = {
+    "POST /guilds/{guild_id}/channels": (5, 10.0),
+    "PATCH /channels/{channel_id}": (5, 10.0),
+    "DELETE /channels/{channel_id}": (5, 5.0),
+    "PUT /channels/{channel_id}/permissions/{overwrite_id}": (10, 10.0),
+    "POST /channels/{channel_id}/messages": (5, 5.0),
+    "GET /channels/{channel_id}/messages/{message_id}": (50, 1.0),
+    "PATCH /channels/{channel_id}/messages/{message_id}": (5, 5.0),
+}
+DEFAULT_LIMIT = (50, 1.0)
+GLOBAL_LIMIT = 50
+
+Dispatch = Callable[[str, dict[str, Any]], None]
+
+
+def json_response(
+    payload: Any, status: int = 200, headers: dict[str, str] | None = None
+) -> web.Response:
+    """
+    Create a JSON response.
+
+    discord.py only decodes a body with a content type of exactly
+    application/json, without the charset aiohttp adds by default.
+
+    Args:
+        payload: The payload of the response.
+        status: The status of the response.
+        headers: The extra headers of the response.
+
+    Returns:
+        The response.
+    """
+    return web.Response(
+        body=json.dumps(payload).encode(),
+        status=status,
+        headers={**(headers or {}), "Content-Type": "application/json"},
+    )
+
+
+class Bucket:
+    """This is a fixed window rate limit bucket."""
+
+    def __init__(self, limit: int, window: float) -> None:
+        """
+        Initialize the bucket.
+
+        Args:
+            limit: The number of requests per window.
+            window: The length of the window in seconds.
+        """
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset = 0.0
+
+    def take(self, now: float) -> bool:
+        """
+        Take a request from the bucket.
+
+        Args:
+            now: The current time.
+
+        Returns:
+            True if the request is allowed, False if the bucket is exhausted.
+        """
+        if now >= self.reset:
+            self.remaining = self.limit
+            self.reset = now + self.window
+
+        if self.remaining <= 0:
+            return False
+
+        self.remaining -= 1
+        return True
+
+
+class FakeDiscordServer:
+    """This is the fake Discord REST API."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        global_limit: int = GLOBAL_LIMIT,
+        dispatch: Dispatch | None = None,
+    ) -> None:
+        """
+        Initialize the fake Discord server.
+
+        Args:
+            latency: The simulated latency of every request in seconds.
+            global_limit: The number of requests per second across all routes.
+            dispatch: Called with the name and payload of every gateway event.
+        """
+        self.latency = latency
+        self.dispatch = dispatch
+        self.ids = count()
+        self.bot = self.user(self.snowflake(), "fromcord", bot=True)
+        self.application_id = self.snowflake()
+        self.guilds: dict[int, dict[str, Any]] = {}
+        self.channels: dict[int, dict[str, Any]] = {}
+        self.messages: dict[int, dict[int, dict[str, Any]]] = {}
+        self.buckets: dict[str, Bucket] = {}
+        self.global_bucket = Bucket(global_limit, 1.0)
+        self.calls: Counter[str] = Counter()
+        self.rate_limited: Counter[str] = Counter()
+        self.runner: web.AppRunner | None = None
+        self.url = ""
+
+    def snowflake(self) -> int:
+        """
+        Create a new snowflake.
+
+        Returns:
+            The snowflake.
+        """
+        timestamp = int(time.time() * 1000) - DISCORD_EPOCH
+        return timestamp << 22 | next(self.ids) % 4096
+
+    @staticmethod
+    def user(user_id: int, name: str, bot: bool = False) -> dict[str, Any]:
+        """
+        Create a user payload.
+
+        Args:
+            user_id: The ID of the user.
+            name: The name of the user.
+            bot: Whether the user is a bot.
+
+        Returns:
+            The user payload.
+        """
+        return {
+            "id": str(user_id),
+            "username": name,
+            "discriminator": "0",
+            "global_name": None,
+            "avatar": None,
+            "bot": bot,
+        }
+
+    def member(self, user: dict[str, Any]) -> dict[str, Any]:
+        """
+        Create a member payload.
+
+        Args:
+            user: The user payload.
+
+        Returns:
+            The member payload.
+        """
+        return {
+            "user": user,
+            "nick": None,
+            "roles": [],
+            "joined_at": datetime.now(timezone.utc).isoformat(),
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+        }
+
+    def add_guild(self, member_ids: list[int]) -> dict[str, Any]:
+        """
+        Add a guild with a category for the sessions.
+
+        Args:
+            member_ids: The IDs of the members besides the bot.
+
+        Returns:
+            The guild payload, as it would be sent in the GUILD_CREATE event.
+        """
+        guild_id = self.snowflake()
+        category = self.channel(guild_id, "nightreign", channel_type=4)
+        guild = {
+            "id": str(guild_id),
+            "name": f"guild-{guild_id}",
+            "icon": None,
+            "owner_id": self.bot["id"],
+            "roles": [
+                {
+                    "id": str(guild_id),
+                    "name": "@everyone",
+                    "permissions": str(2**53 - 1),
+                    "position": 0,
+                    "color": 0,
+                    "hoist": False,
+                    "managed": False,
+                    "mentionable": False,
+                    "flags": 0,
+                }
+            ],
+            "channels": [category, self.channel(guild_id, "general")],
+            "members": [
+                self.member(self.bot),
+                *[
+                    self.member(self.user(user_id, f"user-{user_id}"))
+                    for user_id in member_ids
+                ],
+            ],
+            "member_count": len(member_ids) + 1,
+            "features": [],
+            "emojis": [],
+            "stickers": [],
+            "premium_tier": 0,
+            "preferred_locale": "en-US",
+        }
+        self.guilds[guild_id] = guild
+        return guild
+
+    def channel(
+        self,
+        guild_id: int,
+        name: str,
+        channel_type: int = 0,
+        parent_id: str | None = None,
+        overwrites: list[dict[str, Any]] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Create a channel payload and store the channel.
+
+        Args:
+            guild_id: The ID of the guild.
+            name: The name of the channel.
+            channel_type: The type of the channel, 0 for text and 4 for category.
+            parent_id: The ID of the category of the channel.
+            overwrites: The permission overwrites of the channel.
+
+        Returns:
+            The channel payload.
+        """
+        channel_id = self.snowflake()
+        channel = {
+            "id": str(channel_id),
+            "type": channel_type,
+            "guild_id": str(guild_id),
+            "name": name,
+            "position": 0,
+            "parent_id": parent_id,
+            "permission_overwrites": overwrites or [],
+            "nsfw": False,
+            "topic": None,
+            "last_message_id": None,
+            "rate_limit_per_user": 0,
+            "flags": 0,
+        }
+        self.channels[channel_id] = channel
+        self.messages[channel_id] = {}
+        return channel
+
+    def message(self, channel_id: int, content: str) -> dict[str, Any]:
+        """
+        Create a message payload and store the message.
+
+        Args:
+            channel_id: The ID of the channel.
+            content: The content of the message.
+
+        Returns:
+            The message payload.
+        """
+        message_id = self.snowflake()
+        message = {
+            "id": str(message_id),
+            "channel_id": str(channel_id),
+            "author": self.bot,
+            "content": content,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+        }
+        if channel_id in self.messages:
+            self.messages[channel_id][message_id] = message
+        return message
+
+    def interaction(
+        self,
+        guild_id: int,
+        channel_id: int,
+        user_id: int,
+        name: str,
+        options: list[dict[str, Any]] | None = None,
+    ) -> dict[str, Any]:
+        """
+        Create the payload of a slash command interaction.
+
+        Args:
+            guild_id: The ID of the guild the command was used in.
+            channel_id: The ID of the channel the command was used in.
+            user_id: The ID of the user that used the command.
+            name: The name of the command.
+            options: The options of the command.
+
+        Returns:
+            The interaction payload.
+        """
+        interaction_id = self.snowflake()
+        return {
+            "id": str(interaction_id),
+            "application_id": str(self.application_id),
+            "type": 2,
+            "token": f"token-{interaction_id}",
+            "version": 1,
+            "guild_id": str(guild_id),
+            "channel_id": str(channel_id),
+            "channel": self.channels[channel_id],
+            "member": {
+                **self.member(self.user(user_id, f"user-{user_id}")),
+                "permissions": str(2**53 - 1),
+            },
+            "data": {
+                "id": str(self.snowflake()),
+                "name": name,
+                "type": 1,
+                "options": options or [],
+            },
+            "locale": "en-US",
+            "guild_locale": "en-US",
+            "app_permissions": str(2**53 - 1),
+            "attachment_size_limit": 8 * 1024 * 1024,
+            "entitlements": [],
+            "authorizing_integration_owners": {},
+            "context": 0,
+        }
+
+    async def start(self) -> str:
+        """
+        Start the server on a free local port.
+
+        Returns:
+            The base URL of the API, to set as the Route.BASE of discord.py.
+        """
+        app = web.Application(middlewares=[self.middleware])
+        routes = [
+            ("GET", "/users/@me", self.get_me),
+            ("GET", "/oauth2/applications/@me", self.get_application),
+            ("POST", "/users/@me/channels", self.create_dm),
+            ("POST", "/guilds/{guild_id}/channels", self.create_channel),
+            ("PATCH", "/channels/{channel_id}", self.edit_channel),
+            ("DELETE", "/channels/{channel_id}", self.delete_channel),
+            (
+                "PUT",
+                "/channels/{channel_id}/permissions/{overwrite_id}",
+                self.edit_permissions,
+            ),
+            ("GET", "/channels/{channel_id}/messages", self.get_messages),
+            ("POST", "/channels/{channel_id}/messages", self.send_message),
+            (
+                "POST",
+                "/channels/{channel_id}/messages/bulk-delete",
+                self.bulk_delete,
+            ),
+            ("GET", "/channels/{channel_id}/messages/{message_id}", self.get_message),
+            (
+                "PATCH",
+                "/channels/{channel_id}/messages/{message_id}",
+                self.edit_message,
+            ),
+            (
+                "DELETE",
+                "/channels/{channel_id}/messages/{message_id}",
+                self.delete_message,
+            ),
+            (
+                "POST",
+                "/interactions/{interaction_id}/{token}/callback",
+                self.interaction_callback,
+            ),
+            ("POST", "/webhooks/{application_id}/{token}", self.followup),
+        ]
+        for method, path, handler in routes:
+            app.router.add_route(method, API + path, handler)
+
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host="127.0.0.1", port=0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        self.url = f"http://127.0.0.1:{port}{API}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self.runner:
+            await self.runner.cleanup()
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Count the request, apply the rate limits and simulate the latency."""
+        route = request.match_info.route.resource
+        template = route.canonical.removeprefix(API) if route else request.path
+        name = f"{request.method} {template}"
+        self.calls[name] += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        # Like on Discord, the interaction endpoints are not globally rate limited.
+        now = time.monotonic()
+        interaction = template.startswith(("/interactions/", "/webhooks/"))
+        if not interaction and not self.global_bucket.take(now):
+            return self.too_many_requests(name, self.global_bucket, now, scope="global")
+
+        major = next(
+            (
+                request.match_info[param]
+                for param in ("channel_id", "guild_id", "token")
+                if param in request.match_info
+            ),
+            "",
+        )
+        limit, window = ROUTE_LIMITS.get(name, DEFAULT_LIMIT)
+        key = f"{name}:{major}"
+        bucket = self.buckets.get(key)
+        if not bucket:
+            bucket = Bucket(limit, window)
+            self.buckets[key] = bucket
+
+        if not bucket.take(now):
+            return self.too_many_requests(name, bucket, now, scope="user")
+
+        response = await handler(request)
+        response.headers.update(self.rate_limit_headers(name, bucket, now))
+        return response
+
+    def rate_limit_headers(
+        self, name: str, bucket: Bucket, now: float
+    ) -> dict[str, str]:
+        """
+        Create the rate limit headers of a bucket.
+
+        Args:
+            name: The name of the route.
+            bucket: The bucket of the request.
+            now: The current time.
+
+        Returns:
+            The rate limit headers.
+        """
+        reset_after = max(0.0, bucket.reset - now)
+        return {
+            "X-RateLimit-Limit": str(bucket.limit),
+            "X-RateLimit-Remaining": str(bucket.remaining),
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": hashlib.md5(name.encode()).hexdigest(),
+        }
+
+    def too_many_requests(
+        self, name: str, bucket: Bucket, now: float, scope: str
+    ) -> web.Response:
+        """
+        Create a 429 response.
+
+        Args:
+            name: The name of the route.
+            bucket: The exhausted bucket.
+            now: The current time.
+            scope: The scope of the rate limit, user or global.
+
+        Returns:
+            The 429 response.
+        """
+        self.rate_limited[name] += 1
+        retry_after = max(0.001, bucket.reset - now)
+        headers = self.rate_limit_headers(name, bucket, now)
+        headers["Retry-After"] = f"{retry_after:.3f}"
+        headers["X-RateLimit-Scope"] = scope
+        # Without it, discord.py takes the 429 for a Cloudflare ban and raises.
+        headers["Via"] = "1.1 google"
+        if scope == "global":
+            headers["X-RateLimit-Global"] = "true"
+        return json_response(
+            {
+                "message": "You are being rate limited.",
+                "retry_after": retry_after,
+                "global": scope == "global",
+            },
+            status=429,
+            headers=headers,
+        )
+
+    def emit(self, event: str, payload: dict[str, Any]) -> None:
+        """
+        Send a gateway event.
+
+        Args:
+            event: The name of the event.
+            payload: The payload of the event.
+        """
+        if self.dispatch:
+            self.dispatch(event, payload)
+
+    @staticmethod
+    def not_found() -> web.Response:
+        """Create a 404 response."""
+        return json_response({"message": "Unknown", "code": 10003}, status=404)
+
+    async def get_me(self, request: web.Request) -> web.Response:
+        """Get the bot user."""
+        return json_response(self.bot)
+
+    async def get_application(self, request: web.Request) -> web.Response:
+        """Get the application of the bot."""
+        return json_response(
+            {
+                "id": str(self.application_id),
+                "name": "fromcord",
+                "icon": None,
+                "description": "",
+                "bot_public": False,
+                "bot_require_code_grant": False,
+                "owner": self.bot,
+                "verify_key": "",
+                "flags": 0,
+            }
+        )
+
+    async def create_dm(self, request: web.Request) -> web.Response:
+        """Open a direct message channel with a user."""
+        body = await request.json()
+        recipient_id = int(body["recipient_id"])
+        channel_id = self.snowflake()
+        channel = {
+            "id": str(channel_id),
+            "type": 1,
+            "recipients": [self.user(recipient_id, f"user-{recipient_id}")],
+            "last_message_id": None,
+        }
+        self.channels[channel_id] = channel
+        self.messages[channel_id] = {}
+        return json_response(channel)
+
+    async def create_channel(self, request: web.Request) -> web.Response:
+        """Create a channel."""
+        guild_id = int(request.match_info["guild_id"])
+        if guild_id not in self.guilds:
+            return self.not_found()
+
+        body = await request.json()
+        channel = self.channel(
+            guild_id,
+            body["name"],
+            channel_type=body.get("type", 0),
+            parent_id=body.get("parent_id"),
+            overwrites=body.get("permission_overwrites"),
+        )
+        self.emit("CHANNEL_CREATE", channel)
+        return json_response(channel)
+
+    async def edit_channel(self, request: web.Request) -> web.Response:
+        """Edit the name or the permission overwrites of a channel."""
+        channel = self.channels.get(int(request.match_info["channel_id"]))
+        if not channel:
+            return self.not_found()
+
+        body = await request.json()
+        if "name" in body:
+            channel["name"] = body["name"]
+        if "permission_overwrites" in body:
+            channel["permission_overwrites"] = body["permission_overwrites"]
+        self.emit("CHANNEL_UPDATE", channel)
+        return json_response(channel)
+
+    async def delete_channel(self, request: web.Request) -> web.Response:
+        """Delete a channel."""
+        channel = self.channels.pop(int(request.match_info["channel_id"]), None)
+        if not channel:
+            return self.not_found()
+
+        self.messages.pop(int(channel["id"]), None)
+        self.emit("CHANNEL_DELETE", channel)
+        return json_response(channel)
+
+    async def edit_permissions(self, request: web.Request) -> web.Response:
+        """Set the permission overwrite of a member or role."""
+        channel = self.channels.get(int(request.match_info["channel_id"]))
+        if not channel:
+            return self.not_found()
+
+        body = await request.json()
+        overwrite_id = request.match_info["overwrite_id"]
+        channel["permission_overwrites"] = [
+            overwrite
+            for overwrite in channel["permission_overwrites"]
+            if overwrite["id"] != overwrite_id
+        ] + [{"id": overwrite_id, **body}]
+        self.emit("CHANNEL_UPDATE", channel)
+        return web.Response(status=204)
+
+    async def send_message(self, request: web.Request) -> web.Response:
+        """Send a message."""
+        channel_id = int(request.match_info["channel_id"])
+        if channel_id not in self.channels:
+            return self.not_found()
+
+        body = await request.json()
+        return json_response(self.message(channel_id, body.get("content") or ""))
+
+    async def get_messages(self, request: web.Request) -> web.Response:
+        """Fetch the message history of a channel, the newest first."""
+        messages = self.messages.get(int(request.match_info["channel_id"]))
+        if messages is None:
+            return self.not_found()
+
+        before = int(request.query.get("before", 0)) or None
+        limit = int(request.query.get("limit", 50))
+        history = sorted(
+            (
+                message
+                for message_id, message in messages.items()
+                if before is None or message_id < before
+            ),
+            key=lambda message: int(message["id"]),
+            reverse=True,
+        )
+        return json_response(history[:limit])
+
+    async def bulk_delete(self, request: web.Request) -> web.Response:
+        """Delete several messages at once."""
+        messages = self.messages.get(int(request.match_info["channel_id"]))
+        if messages is None:
+            return self.not_found()
+
+        body = await request.json()
+        for message_id in body["messages"]:
+            messages.pop(int(message_id), None)
+        return web.Response(status=204)
+
+    async def delete_message(self, request: web.Request) -> web.Response:
+        """Delete a message."""
+        messages = self.messages.get(int(request.match_info["channel_id"]), {})
+        if not messages.pop(int(request.match_info["message_id"]), None):
+            return self.not_found()
+        return web.Response(status=204)
+
+    async def get_message(self, request: web.Request) -> web.Response:
+        """Fetch a message."""
+        messages = self.messages.get(int(request.match_info["channel_id"]), {})
+        message = messages.get(int(request.match_info["message_id"]))
+        if not message:
+            return self.not_found()
+        return json_response(message)
+
+    async def edit_message(self, request: web.Request) -> web.Response:
+        """Edit a message."""
+        messages = self.messages.get(int(request.match_info["channel_id"]), {})
+        message = messages.get(int(request.match_info["message_id"]))
+        if not message:
+            return self.not_found()
+
+        body = await request.json()
+        if "content" in body:
+            message["content"] = body["content"] or ""
+        message["edited_timestamp"] = datetime.now(timezone.utc).isoformat()
+        return json_response(message)
+
+    async def interaction_callback(self, request: web.Request) -> web.Response:
+        """Respond to an interaction."""
+        body = await request.json()
+        response_type = body.get("type", 4)
+        message = None
+        if response_type == 4:
+            message = self.message(0, (body.get("data") or {}).get("content") or "")
+
+        return json_response(
+            {
+                "interaction": {
+                    "id": request.match_info["interaction_id"],
+                    "type": 2,
+                    "response_message_id": message["id"] if message else None,
+                    "response_message_loading": response_type == 5,
+                    "response_message_ephemeral": False,
+                },
+                "resource": {"type": response_type, "message": message},
+            }
+        )
+
+    async def followup(self, request: web.Request) -> web.Response:
+        """Send a followup message of an interaction."""
+        body = await request.json()
+        return json_response(self.message(0, body.get("content") or ""))
@@ -0,0 +1,344 @@
+"""
+This module contains the end-to-end load test against the fake Discord server.
+
+The real client is pointed at a local stand-in for the Discord REST API. The
+commands are replayed through their callbacks with real interactions, and the
+timer ticks run on the real loop, so the measured latency includes discord.py,
+the HTTP round trips and the rate limiting.
+
+Usage:
+    python -m benchmarks.e2e --sessions 200 --concurrency 50 --output e2e.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+from discord import Interaction
+from discord.http import Route
+
+from benchmarks.discord_server import FakeDiscordServer
+from benchmarks.nightreign import summarize
+from src.app import create_app
+from src.client import FromCordClient
+from src.commands.nightreign import close, create, join, start
+from src.config import AppConfigManager
+from src.schemas.events import TENTH_EVENT
+from src.tasks.nightreign import check_sessions
+
+
+class LoadTest:
+    """This replays the nightreign workflows against the fake Discord server."""
+
+    def __init__(
+        self,
+        server: FakeDiscordServer,
+        client: FromCordClient,
+        guilds: int,
+        seed: int,
+    ) -> None:
+        """
+        Initialize the load test.
+
+        Args:
+            server: The fake Discord server.
+            client: The client, logged in to the fake Discord server.
+            guilds: The number of guilds to spread the sessions over.
+            seed: The seed for the random number generator.
+        """
+        self.server = server
+        self.client = client
+        self.rng = random.Random(seed)
+        self.guilds: list[tuple[int, int, list[int]]] = []
+        self.latency: dict[str, list[float]] = {}
+        self.errors = 0
+
+        state = client._connection
+        for _ in range(guilds):
+            members = [server.snowflake() for _ in range(6)]
+            payload = server.add_guild(members)
+            guild = state._add_guild_from_data(payload)  # type: ignore
+            category, general = payload["channels"]
+            client.guild_config.add_config(guild.id, int(category["id"]))
+            self.guilds.append((guild.id, int(general["id"]), members))
+
+    def interaction(
+        self,
+        guild_id: int,
+        channel_id: int,
+        user_id: int,
+        name: str,
+    ) -> Interaction[FromCordClient]:
+        """
+        Create a slash command interaction.
+
+        Args:
+            guild_id: The ID of the guild.
+            channel_id: The ID of the channel.
+            user_id: The ID of the user.
+            name: The name of the command.
+
+        Returns:
+            The interaction.
+        """
+        payload = self.server.interaction(guild_id, channel_id, user_id, name)
+        return Interaction(data=payload, state=self.client._connection)  # type: ignore
+
+    async def timed(self, name: str, command: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Run a command and record its latency.
+
+        Args:
+            name: The name of the command.
+            command: Called to run the command.
+        """
+        started = time.perf_counter()
+        try:
+            await command()
+        except Exception as error:
+            self.errors += 1
+            print(f"{name} failed: {error}", file=sys.stderr)
+        finally:
+            self.latency.setdefault(name, []).append(time.perf_counter() - started)
+
+    async def workflow(self, index: int, semaphore: asyncio.Semaphore) -> None:
+        """
+        Create, join and start a session.
+
+        Args:
+            index: The index of the session.
+            semaphore: Limits the number of concurrent workflows.
+        """
+        guild_id, general_id, members = self.guilds[index % len(self.guilds)]
+        owner, guest = self.rng.sample(members, 2)
+        session_id = f"e2e{index}"
+        service = self.client.nightreign_service
+
+        async with semaphore:
+            await self.timed(
+                "create",
+                lambda: create.callback(  # type: ignore
+                    self.interaction(guild_id, general_id, owner, "create"),
+                    session_id=session_id,
+                    privacy="public",
+                ),
+            )
+            session = service.get(session_id)
+            if not session:
+                self.errors += 1
+                return
+
+            await self.timed(
+                "join",
+                lambda: join.callback(  # type: ignore
+                    self.interaction(guild_id, general_id, guest, "join"),
+                    session_id=session_id,
+                ),
+            )
+            await self.timed(
+                "start",
+                lambda: start.callback(  # type: ignore
+                    self.interaction(guild_id, session.channel_id, owner, "start"),
+                    day=self.rng.choice([1, 2]),
+                ),
+            )
+
+    async def teardown(self, session_id: str, semaphore: asyncio.Semaphore) -> None:
+        """
+        Close a session.
+
+        Args:
+            session_id: The ID of the session.
+            semaphore: Limits the number of concurrent workflows.
+        """
+        session = self.client.nightreign_service.get(session_id)
+        if not session:
+            return
+
+        async with semaphore:
+            await self.timed(
+                "close",
+                lambda: close.callback(  # type: ignore
+                    self.interaction(
+                        session.guild_id,
+                        session.channel_id,
+                        session.members[0],
+                        "close",
+                    )
+                ),
+            )
+
+    async def run(self, sessions: int, concurrency: int, ticks: int) -> dict[str, Any]:
+        """
+        Run the load test.
+
+        Args:
+            sessions: The number of sessions.
+            concurrency: The number of concurrent workflows.
+            ticks: The number of timer ticks.
+
+        Returns:
+            The results of the load test.
+        """
+        service = self.client.nightreign_service
+        started = time.perf_counter()
+        service.pool.fill_guilds(self.client.guilds)
+        await service.pool.wait()
+        warmup_seconds = time.perf_counter() - started
+
+        semaphore = asyncio.Semaphore(concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *[self.workflow(index, semaphore) for index in range(sessions)]
+        )
+        commands_seconds = time.perf_counter() - started
+
+        for session_id in service.started:
+            service.started[session_id] -= self.rng.uniform(0, TENTH_EVENT + 1) * 60
+
+        samples = []
+        for _ in range(ticks):
+            started = time.perf_counter()
+            await check_sessions(self.client)
+            await service.wait_idle()
+            samples.append(time.perf_counter() - started)
+
+        await asyncio.gather(
+            *[self.teardown(session_id, semaphore) for session_id in list(service.data)]
+        )
+        await service.pool.wait()
+
+        return {
+            "warmup_seconds": warmup_seconds,
+            "commands_seconds": commands_seconds,
+            "commands": {
+                name: summarize(values) for name, values in self.latency.items()
+            },
+            "acks": {
+                name: summarize(list(histogram.samples))
+                for name, histogram in self.client.command_stats.ack.items()
+            },
+            "ticks": summarize(samples) if samples else {},
+            "events": self.client.nightreign_stats.events_total,
+            "errors": self.errors,
+            "rest_calls": dict(self.server.calls),
+            "rate_limited": dict(self.server.rate_limited),
+            "shed": {
+                priority.name.lower(): count
+                for priority, count in service.outbound.shed.items()
+            },
+            "client_rest_calls": {
+                f"{method} {status}": count
+                for (method, status), count in self.client.metrics.rest_calls.items()
+            },
+        }
+
+
+async def run(
+    guilds: int,
+    sessions: int,
+    concurrency: int,
+    ticks: int,
+    latency: float,
+    seed: int,
+    pool: int = 0,
+) -> dict[str, Any]:
+    """
+    Start the fake Discord server, log the client in to it and run the load test.
+
+    Args:
+        guilds: The number of guilds.
+        sessions: The number of sessions.
+        concurrency: The number of concurrent workflows.
+        ticks: The number of timer ticks.
+        latency: The simulated latency of every request in seconds.
+        seed: The seed for the random number generator.
+        pool: The size of the channel pool per guild, 0 to disable it.
+
+    Returns:
+        The machine-readable load test results.
+    """
+    server = FakeDiscordServer(latency=latency)
+    base = Route.BASE
+    Route.BASE = await server.start()
+    with tempfile.TemporaryDirectory() as directory:
+        app_config = AppConfigManager()
+        app_config.DATA_DIR = directory
+        app_config.METRICS_PORT = 0
+        app_config.CHANNEL_POOL_SIZE = pool
+        client = create_app(app_config)
+        server.dispatch = lambda event, payload: getattr(
+            client._connection, f"parse_{event.lower()}"
+        )(payload)
+
+        try:
+            await client.login("token")
+            client.guild_config.file.on_ready()
+            client.nightreign_service.file.on_ready()
+            results = await LoadTest(server, client, guilds, seed).run(
+                sessions, concurrency, ticks
+            )
+        finally:
+            await client.close()
+            await server.stop()
+            Route.BASE = base
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+            "guilds": guilds,
+            "sessions": sessions,
+            "concurrency": concurrency,
+            "ticks": ticks,
+            "latency": latency,
+            "seed": seed,
+            "pool": pool,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Run the load test from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--guilds", type=int, default=10)
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pool", type=int, default=0)
+    parser.add_argument("--output", type=str, default="")
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        run(
+            args.guilds,
+            args.sessions,
+            args.concurrency,
+            args.ticks,
+            args.latency,
+            args.seed,
+            args.pool,
+        )
+    )
+    output = json.dumps(results, indent=4)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
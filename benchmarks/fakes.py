@@ -0,0 +1,318 @@
+"""This module contains lightweight in-memory fakes of the discord objects."""
+
+import asyncio
+from collections import Counter
+from itertools import count
+from types import SimpleNamespace
+from typing import Any
+
+from discord import CategoryChannel, HTTPException, TextChannel
+
+from src.schemas.events import MESSAGE_LIMIT
+from src.services.clock import Clock
+
+IDS = count(1_000_000)
+
+
+def check_content(content: str | None) -> None:
+    """
+    Reject message content over the length limit, like discord does.
+
+    Args:
+        content: The content of the message.
+
+    Raises:
+        HTTPException: If the content is too long.
+    """
+    if content and len(content) > MESSAGE_LIMIT:
+        response = SimpleNamespace(status=400, reason="Bad Request")
+        raise HTTPException(
+            response,  # type: ignore
+            f"Must be {MESSAGE_LIMIT} or fewer in length.",
+        )
+
+
+class FakeStats:
+    """This keeps track of the fake REST calls that were issued."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """
+        Initialize the fake stats.
+
+        Args:
+            latency: The simulated latency of a REST call in seconds.
+        """
+        self.latency = latency
+        self.calls: Counter[str] = Counter()
+
+    async def call(self, route: str) -> None:
+        """
+        Record a REST call and simulate its latency.
+
+        Args:
+            route: The name of the route that was called.
+        """
+        self.calls[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def total(self) -> int:
+        """
+        Get the total number of REST calls.
+
+        Returns:
+            The total number of REST calls.
+        """
+        return sum(self.calls.values())
+
+    def reset(self) -> None:
+        """Reset the call counters."""
+        self.calls.clear()
+
+
+class VirtualClock(Clock):
+    """This is a virtual clock, its time only moves when it is advanced."""
+
+    def __init__(self, start: float) -> None:
+        """
+        Initialize the virtual clock.
+
+        Args:
+            start: The wall clock time the clock starts at.
+        """
+        self.start = start
+        self.elapsed = 0.0
+
+    def time(self) -> float:
+        """Get the virtual wall clock time."""
+        return self.start + self.elapsed
+
+    def monotonic(self) -> float:
+        """Get the virtual monotonic time."""
+        return self.elapsed
+
+    def advance(self, seconds: float) -> None:
+        """
+        Move the clock forward.
+
+        Args:
+            seconds: The number of seconds to move forward.
+        """
+        self.elapsed += seconds
+
+
+class FakeUser:
+    """This is a fake user or member."""
+
+    def __init__(self, user_id: int, name: str = "") -> None:
+        """Initialize the fake user."""
+        self.id = user_id
+        self.name = name or f"user-{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    async def send(self, content: str) -> None:
+        """Send a direct message to the user."""
+        pass
+
+
+class FakeMessage:
+    """This is a fake message, it doubles as a partial message."""
+
+    def __init__(
+        self, channel: "FakeTextChannel", message_id: int, content: str
+    ) -> None:
+        """Initialize the fake message."""
+        self.channel = channel
+        self.id = message_id
+        self.content = content
+
+    async def fetch(self) -> "FakeMessage":
+        """Fetch the message."""
+        await self.channel.stats.call("fetch_message")
+        return self
+
+    async def edit(self, content: str | None = None, **kwargs: Any) -> "FakeMessage":
+        """Edit the message."""
+        await self.channel.stats.call("edit_message")
+        check_content(content)
+        if content is not None:
+            self.content = content
+        return self
+
+
+class FakeCategoryChannel(CategoryChannel):
+    """This is a fake category channel."""
+
+    def __init__(self, guild: "FakeGuild", channel_id: int) -> None:
+        """Initialize the fake category channel."""
+        self.id = channel_id
+        self.name = f"category-{channel_id}"
+        self.guild = guild  # type: ignore
+
+
+class FakeTextChannel(TextChannel):
+    """This is a fake text channel."""
+
+    def __init__(
+        self,
+        guild: "FakeGuild",
+        channel_id: int,
+        name: str,
+        category: FakeCategoryChannel | None,
+        stats: FakeStats,
+    ) -> None:
+        """Initialize the fake text channel."""
+        self.id = channel_id
+        self.name = name
+        self.guild = guild  # type: ignore
+        self.fake_category = category
+        self.stats = stats
+        self.messages: dict[int, FakeMessage] = {}
+        self.overwrites_by_id: dict[int, dict[str, Any]] = {}
+
+    @property
+    def category(self) -> FakeCategoryChannel | None:  # type: ignore
+        """Get the category of the channel."""
+        return self.fake_category
+
+    @property
+    def category_id(self) -> int | None:  # type: ignore
+        """Get the ID of the category of the channel."""
+        return self.fake_category.id if self.fake_category else None
+
+    def get_partial_message(self, message_id: int, /) -> FakeMessage:  # type: ignore
+        """Get a partial message by id."""
+        message = self.messages.get(message_id)
+        if not message:
+            message = FakeMessage(self, message_id, "")
+        return message
+
+    async def send(self, content: str | None = None, **kwargs: Any) -> FakeMessage:  # type: ignore
+        """Send a message to the channel."""
+        await self.stats.call("send_message")
+        check_content(content)
+        message = FakeMessage(self, next(IDS), content or "")
+        self.messages[message.id] = message
+        return message
+
+    async def edit(self, **kwargs: Any) -> None:  # type: ignore
+        """Edit the name or the overwrites of the channel."""
+        await self.stats.call("edit_channel")
+        self.name = kwargs.get("name", self.name)
+
+    async def purge(  # type: ignore
+        self, limit: int | None = 100, **kwargs: Any
+    ) -> list[FakeMessage]:
+        """Delete the newest messages of the channel."""
+        await self.stats.call("purge")
+        ids = sorted(self.messages, reverse=True)[:limit]
+        return [self.messages.pop(message_id) for message_id in ids]
+
+    async def set_permissions(self, target: Any, **kwargs: Any) -> None:  # type: ignore
+        """Set the permissions for a target."""
+        await self.stats.call("edit_channel_permissions")
+        self.overwrites_by_id[target.id] = kwargs
+
+    async def delete(self, **kwargs: Any) -> None:
+        """Delete the channel."""
+        await self.stats.call("delete_channel")
+        self.guild.channels_by_id.pop(self.id, None)  # type: ignore
+        self.guild.client.channels_by_id.pop(self.id, None)  # type: ignore
+
+
+class FakeGuild:
+    """This is a fake guild."""
+
+    def __init__(self, client: "FakeClient", guild_id: int) -> None:
+        """Initialize the fake guild."""
+        self.id = guild_id
+        self.client = client
+        self.stats = client.stats
+        self.default_role = FakeUser(guild_id, "@everyone")
+        self.me = FakeUser(0, "fromcord")
+        self.members: dict[int, FakeUser] = {}
+        self.channels_by_id: dict[int, Any] = {}
+        self.category = FakeCategoryChannel(self, next(IDS))
+        self.channels_by_id[self.category.id] = self.category
+
+    def get_channel(self, channel_id: int) -> Any:
+        """Get a channel by id."""
+        return self.channels_by_id.get(channel_id)
+
+    def get_member(self, user_id: int) -> FakeUser | None:
+        """Get a member by id."""
+        return self.members.get(user_id)
+
+    def add_member(self, user_id: int) -> FakeUser:
+        """Add a member to the guild."""
+        member = FakeUser(user_id)
+        self.members[user_id] = member
+        return member
+
+    def add_text_channel(self, name: str) -> FakeTextChannel:
+        """Add a text channel to the guild without issuing a REST call."""
+        channel = FakeTextChannel(self, next(IDS), name, self.category, self.stats)
+        self.channels_by_id[channel.id] = channel
+        self.client.channels_by_id[channel.id] = channel
+        return channel
+
+    async def create_text_channel(self, name: str, **kwargs: Any) -> FakeTextChannel:
+        """Create a text channel."""
+        await self.stats.call("create_channel")
+        return self.add_text_channel(name)
+
+
+class FakeClient:
+    """
+    This is a fake client, only the cache lookups are implemented.
+
+    The services and stats the tasks reach through the client are set by the
+    benchmark that uses it.
+    """
+
+    def __init__(self, stats: FakeStats | None = None) -> None:
+        """Initialize the fake client."""
+        self.stats = stats or FakeStats()
+        self.nightreign_service: Any = None
+        self.nightreign_stats: Any = None
+        self.guilds_by_id: dict[int, FakeGuild] = {}
+        self.channels_by_id: dict[int, FakeTextChannel] = {}
+
+    def add_guild(self, guild_id: int) -> FakeGuild:
+        """Add a guild to the client."""
+        guild = FakeGuild(self, guild_id)
+        self.guilds_by_id[guild_id] = guild
+        return guild
+
+    def get_guild(self, guild_id: int) -> FakeGuild | None:
+        """Get a guild by id."""
+        return self.guilds_by_id.get(guild_id)
+
+    def get_channel(self, channel_id: int) -> FakeTextChannel | None:
+        """Get a text channel by id."""
+        return self.channels_by_id.get(channel_id)
+
+
+class FakeResponse:
+    """This is a fake interaction response."""
+
+    def __init__(self, stats: FakeStats) -> None:
+        """Initialize the fake response."""
+        self.stats = stats
+
+    async def send_message(self, content: str | None = None, **kwargs: Any) -> None:
+        """Send the response."""
+        await self.stats.call("interaction_response")
+
+
+class FakeInteraction:
+    """This is a fake interaction of a user in a channel."""
+
+    def __init__(self, channel: FakeTextChannel, user: FakeUser) -> None:
+        """Initialize the fake interaction."""
+        self.channel = channel
+        self.guild = channel.guild
+        self.user = user
+        self.response = FakeResponse(channel.stats)
@@ -0,0 +1,479 @@
+"""
+This module contains the benchmarks for the nightreign hot path.
+
+Usage:
+    python -m benchmarks.nightreign --sizes 100 1000 10000 --output bench.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable
+
+from benchmarks.fakes import FakeClient, FakeStats
+from src.config import AppConfigManager, GuildConfigManager
+from src.data import FileManager, ShardedFileManager
+from src.monitoring import LoopStats
+from src.schemas import Session
+from src.schemas.events import TENTH_EVENT
+from src.services import Clock, NightreignService
+from src.tasks.engine import DueEventEngine
+from src.tasks.engine import available as engine_available
+from src.tasks.nightreign import check_sessions, due_sessions, process_session
+
+BOSSES = [
+    "Tricephalos",
+    "Gaping Jaw",
+    "Sentient Pest",
+    "Augur",
+    "Equilibrious Beast",
+    "Darkdrift Knight",
+    "Fissure In The Fog",
+    "Night Aspect",
+]
+GUILDS = 10
+
+
+def create_service(directory: str, clock: Clock | None = None) -> NightreignService:
+    """
+    Create an isolated nightreign service.
+
+    Args:
+        directory: The directory to store the data files in.
+        clock: The clock the runs are timed with, the system clock by default.
+
+    Returns:
+        The nightreign service.
+    """
+    app_config = AppConfigManager()
+    guild_config = GuildConfigManager(
+        app_config=app_config,
+        file=ShardedFileManager(directory=os.path.join(directory, "guilds")),
+    )
+    return NightreignService(
+        app_config=app_config,
+        guild_config=guild_config,
+        file=ShardedFileManager(directory=os.path.join(directory, "sessions")),
+        schedule_file=FileManager(file_path=os.path.join(directory, "scheduler.json")),
+        clock=clock,
+    )
+
+
+def populate(client: FakeClient, size: int, seed: int, directory: str) -> FakeClient:
+    """
+    Populate a new nightreign service with synthetic sessions.
+
+    Every session is started somewhere within a full run, so that a tick has
+    events due across every day and boss.
+
+    Args:
+        client: The fake client to create the guilds and channels on.
+        size: The number of sessions to create.
+        seed: The seed for the random number generator.
+        directory: The directory to store the data files in.
+
+    Returns:
+        The populated fake client.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().timestamp()
+    guilds = [client.add_guild(guild_id) for guild_id in range(1, GUILDS + 1)]
+
+    service = create_service(directory)
+    service.file.on_ready()
+    for guild in guilds:
+        service.guild_config.add_config(guild.id, guild.category.id)
+    client.nightreign_service = service
+    client.nightreign_stats = LoopStats(name="nightreign_loop", interval=5)
+    for index in range(size):
+        guild = guilds[index % len(guilds)]
+        session_id = f"bench{index}"
+        channel = guild.add_text_channel(f"nightreign-{session_id}")
+        members = [rng.randrange(1, 10**6) for _ in range(rng.randint(1, 3))]
+        for member in members:
+            guild.add_member(member)
+
+        event_log = channel.get_partial_message(0)
+        channel.messages[event_log.id] = event_log
+        service.add_session(
+            Session(
+                session_id=session_id,
+                session_pw=f"{index:032x}",
+                privacy=rng.choice(["public", "private"]),
+                members=members,
+                active=True,
+                day=rng.choice([1, 2]),
+                timestamp=now - rng.uniform(0, TENTH_EVENT + 1) * 60,
+                channel_id=channel.id,
+                guild_id=guild.id,
+                event_log=deque(),
+                event_log_id=event_log.id,
+                boss=rng.choice(BOSSES),
+            )
+        )
+
+    return client
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Summarize latency samples in milliseconds.
+
+    Args:
+        samples: The latency samples in seconds.
+
+    Returns:
+        The summary of the samples.
+    """
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": ordered[len(ordered) // 2] * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure_memory(run: Callable[[], Any]) -> dict[str, int]:
+    """
+    Measure the allocations and peak memory of a callable.
+
+    Args:
+        run: The callable to measure.
+
+    Returns:
+        The net allocated blocks and the peak traced memory in bytes.
+    """
+    tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "allocated_blocks": sys.getallocatedblocks() - blocks,
+        "peak_bytes": peak,
+    }
+
+
+async def tick(client: FakeClient) -> None:
+    """
+    Run a tick and wait for the sessions it queued to be processed.
+
+    Args:
+        client: The fake client.
+    """
+    await check_sessions(client)  # type: ignore
+    await client.nightreign_service.wait_idle()
+
+
+def bench_ticks(client: FakeClient, ticks: int) -> dict[str, Any]:
+    """
+    Benchmark check_sessions.
+
+    Args:
+        client: The fake client.
+        ticks: The number of ticks to run.
+
+    Returns:
+        The tick latency and throughput results.
+    """
+
+    async def run() -> list[float]:
+        samples = []
+        for _ in range(ticks):
+            start = time.perf_counter()
+            await tick(client)
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    samples = asyncio.run(run())
+    events = client.nightreign_stats.events_total
+    total = sum(samples)
+    return {
+        "latency": summarize(samples),
+        "events": events,
+        "events_per_second": events / total if total else 0.0,
+        "rest_calls": dict(client.stats.calls),
+        "shed": {
+            priority.name.lower(): count
+            for priority, count in client.nightreign_service.outbound.shed.items()
+        },
+    }
+
+
+def bench_due(client: FakeClient, repeat: int = 20) -> dict[str, Any]:
+    """
+    Benchmark finding the sessions to tick, with every available engine.
+
+    Args:
+        client: The fake client, after some ticks so the sessions have schedules.
+        repeat: The number of times to find the due sessions per engine.
+
+    Returns:
+        The latency and the number of due sessions per engine.
+    """
+    service = client.nightreign_service
+
+    def measure() -> dict[str, Any]:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            due = due_sessions(client)  # type: ignore
+            samples.append(time.perf_counter() - start)
+        return {"latency": summarize(samples), "due": len(due)}
+
+    service.engine = None
+    results = {"python": measure()}
+    if engine_available():
+        service.engine = DueEventEngine()
+        for session in service.data.values():
+            service.sync_engine(session)
+        results["numpy"] = measure()
+        service.engine = None
+    return results
+
+
+async def process_sessions(client: FakeClient, limit: int) -> list[float]:
+    """
+    Process the sessions one at a time, outside of their actors.
+
+    Args:
+        client: The fake client.
+        limit: The maximum number of sessions to process.
+
+    Returns:
+        The latency of every processed session.
+    """
+    samples = []
+    for session in list(client.nightreign_service.data.values())[:limit]:
+        start = time.perf_counter()
+        await process_session(client, session)  # type: ignore
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_process_session(client: FakeClient, limit: int) -> dict[str, Any]:
+    """
+    Benchmark process_session on its own.
+
+    Args:
+        client: The fake client.
+        limit: The maximum number of sessions to process.
+
+    Returns:
+        The per session latency results.
+    """
+    return {"latency": summarize(asyncio.run(process_sessions(client, limit)))}
+
+
+def bench_clean(client: FakeClient) -> dict[str, Any]:
+    """
+    Benchmark the cleanup of healthy sessions, with and without expired sessions.
+
+    Args:
+        client: The fake client.
+
+    Returns:
+        The cleanup latency and the number of visited sessions.
+    """
+    service = client.nightreign_service
+
+    def clean() -> dict[str, Any]:
+        stats = LoopStats(name="clean_and_save", interval=300)
+        start = time.perf_counter()
+        asyncio.run(service.clean(client, stats=stats))
+        return {"seconds": time.perf_counter() - start, "visited": stats.tick_sessions}
+
+    idle = clean()
+    for session_id in service.data:
+        service.expire(session_id)
+    expired = clean()
+    return {"idle": idle, "all_expired": expired}
+
+
+def bench_storage(client: FakeClient, storage_format: str = "jsonl") -> dict[str, Any]:
+    """
+    Benchmark saving and loading the sessions.
+
+    A full save rewrites every guild, an incremental save only the guild of a
+    single changed session. The garbage of the earlier benchmarks is collected
+    first, so it is not collected during the timed runs.
+
+    Args:
+        client: The fake client.
+        storage_format: The format to store the sessions in, jsonl or binary.
+
+    Returns:
+        The save and load results.
+    """
+    service = client.nightreign_service
+    if service.file.storage_format != storage_format:
+        service.file = ShardedFileManager(
+            directory=f"{service.file.directory}-{storage_format}",
+            storage_format=storage_format,
+        )
+        service.file.on_ready()
+    sessions = len(service.data)
+    guild_ids = list(service.guild_sessions)
+
+    def save_all() -> None:
+        service.changed.update(guild_ids)
+        service.save()
+
+    def save_one() -> None:
+        service.mark_changed(next(iter(service.data.values())))
+        service.save()
+
+    def load_all() -> None:
+        service.data = {}
+        service.guild_sessions = {}
+        for guild_id in guild_ids:
+            service.activate(guild_id)
+
+    gc.collect()
+    start = time.perf_counter()
+    save_all()
+    save = time.perf_counter() - start
+    size = service.file.size()
+
+    start = time.perf_counter()
+    save_one()
+    incremental_save = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_all()
+    load = time.perf_counter() - start
+    if len(service.data) != sessions:
+        raise RuntimeError("Loaded a different number of sessions than was saved.")
+
+    save_memory = measure_memory(save_all)
+    load_memory = measure_memory(load_all)
+    return {
+        "save": {"seconds": save, **save_memory},
+        "incremental_save": {"seconds": incremental_save},
+        "load": {"seconds": load, **load_memory},
+        "snapshot_bytes": size,
+    }
+
+
+def bench_size(size: int, ticks: int, latency: float, seed: int) -> dict[str, Any]:
+    """
+    Run every benchmark for a number of sessions.
+
+    Args:
+        size: The number of sessions.
+        ticks: The number of ticks to run.
+        latency: The simulated REST latency in seconds.
+        seed: The seed for the random number generator.
+
+    Returns:
+        The results for the size.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        client = populate(FakeClient(FakeStats(latency)), size, seed, directory)
+        tick_results = bench_ticks(client, ticks)
+        due_results = bench_due(client)
+
+        client = populate(FakeClient(FakeStats(latency)), size, seed, directory)
+        tick_memory = measure_memory(lambda: asyncio.run(tick(client)))
+
+        client = populate(FakeClient(FakeStats(latency)), size, seed, directory)
+        process_memory = measure_memory(
+            lambda: asyncio.run(process_sessions(client, limit=1000))
+        )
+
+        client = populate(FakeClient(FakeStats(latency)), size, seed, directory)
+        process_results = bench_process_session(client, limit=1000)
+        clean_results = bench_clean(client)
+        storage_results = bench_storage(client)
+        binary_results = bench_storage(client, "binary")
+
+    return {
+        "sessions": size,
+        "check_sessions": {**tick_results, **tick_memory},
+        "due_sessions": due_results,
+        "process_session": {**process_results, **process_memory},
+        "clean": clean_results,
+        **storage_results,
+        "binary_storage": binary_results,
+    }
+
+
+def run(
+    sizes: list[int],
+    ticks: int,
+    latency: float,
+    seed: int,
+    progress: Callable[[str], None] = print,
+) -> dict[str, Any]:
+    """
+    Run the benchmarks.
+
+    Args:
+        sizes: The numbers of sessions to benchmark.
+        ticks: The number of ticks per size.
+        latency: The simulated REST latency in seconds.
+        seed: The seed for the random number generator.
+        progress: Called with a progress message before every size.
+
+    Returns:
+        The machine-readable benchmark results.
+    """
+    results = []
+    for size in sizes:
+        progress(f"Benchmarking {size} sessions...")
+        results.append(bench_size(size, ticks, latency, seed))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+            "ticks": ticks,
+            "latency": latency,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="")
+    args = parser.parse_args()
+
+    results = run(
+        args.sizes,
+        args.ticks,
+        args.latency,
+        args.seed,
+        progress=lambda message: print(message, file=sys.stderr),
+    )
+    output = json.dumps(results, indent=4)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+This module contains the simulation of complete nightreign runs on a virtual clock.
+
+Synthetic sessions are started over a window of virtual time and driven through
+their complete runs by the nightreign loop, against the in-memory discord fakes.
+The virtual clock moves one loop interval per tick, and to the start of every run
+in between, so the runs are not aligned to the ticks. The simulation is paced to
+run at most the given speed-up over wall time.
+
+Usage:
+    python -m benchmarks.simulate --sessions 2000 --speed 1000 --output sim.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import sys
+import tempfile
+from collections import deque
+from datetime import datetime
+from time import perf_counter
+from typing import Any
+
+from benchmarks.fakes import FakeClient, FakeInteraction, FakeStats, VirtualClock
+from benchmarks.nightreign import BOSSES, GUILDS, create_service
+from src.monitoring import LoopStats, setup_logging
+from src.schemas import Session
+from src.schemas.events import EVENT_CONFIG, TENTH_EVENT
+from src.tasks.nightreign import applies, check_sessions
+
+# How long the runs may take past the last event before they count as incomplete.
+GRACE = 5 * 60
+
+
+def expected_events(session: Session) -> int:
+    """
+    Count the events that fire during a complete run of a session.
+
+    Args:
+        session: The session, after its run started.
+
+    Returns:
+        The number of events.
+    """
+    return sum(1 for config in EVENT_CONFIG.values() if applies(session, config))
+
+
+async def simulate(
+    sessions: int,
+    speed: float,
+    interval: float,
+    stagger: float,
+    latency: float,
+    seed: int,
+    directory: str,
+) -> dict[str, Any]:
+    """
+    Drive synthetic sessions through complete runs.
+
+    Args:
+        sessions: The number of sessions.
+        speed: The largest speed-up of the virtual clock over wall time.
+        interval: The virtual seconds between ticks of the nightreign loop.
+        stagger: The virtual seconds over which the runs are started.
+        latency: The simulated REST latency in wall seconds.
+        seed: The seed for the random number generator.
+        directory: The directory to store the data files in.
+
+    Returns:
+        The timing error, dropped events and throughput of the simulation.
+    """
+    rng = random.Random(seed)
+    clock = VirtualClock(datetime.now().timestamp())
+    client = FakeClient(FakeStats(latency))
+    service = create_service(directory, clock)
+    service.file.on_ready()
+    guilds = [client.add_guild(guild_id) for guild_id in range(1, GUILDS + 1)]
+    for guild in guilds:
+        service.guild_config.add_config(guild.id, guild.category.id)
+
+    stats = LoopStats(
+        name="nightreign_loop", interval=interval, size=sessions * len(EVENT_CONFIG)
+    )
+    client.nightreign_service = service
+    client.nightreign_stats = stats
+
+    starts = []
+    for index in range(sessions):
+        guild = guilds[index % len(guilds)]
+        session_id = f"sim{index}"
+        channel = guild.add_text_channel(f"nightreign-{session_id}")
+        user = guild.add_member(rng.randrange(1, 10**6))
+        service.add_session(
+            Session(
+                session_id=session_id,
+                session_pw=f"{index:032x}",
+                privacy="public",
+                members=[user.id],
+                active=False,
+                day=0,
+                timestamp=0,
+                channel_id=channel.id,
+                guild_id=guild.id,
+                event_log=deque(),
+                event_log_id=0,
+                boss=rng.choice(BOSSES),
+            )
+        )
+        starts.append(
+            (
+                rng.uniform(0, stagger),
+                FakeInteraction(channel, user),
+                session_id,
+                rng.choice([1, 2]),
+            )
+        )
+    starts.sort(key=lambda start: start[0])
+
+    pending = deque(starts)
+    running: list[Session] = []
+    expected = 0
+    limit = stagger + TENTH_EVENT * 60 + GRACE
+    started = perf_counter()
+    while True:
+        await check_sessions(client)  # type: ignore
+        await service.wait_idle()
+        running = [session for session in running if session.active]
+        if (not pending and not running) or clock.elapsed > limit:
+            break
+
+        tick_at = clock.elapsed + interval
+        while pending and pending[0][0] <= tick_at:
+            start_at, interaction, session_id, day = pending.popleft()
+            clock.advance(max(0.0, start_at - clock.elapsed))
+            await service.start(interaction, interaction.guild, day)  # type: ignore
+            session = service.data[session_id]
+            expected += expected_events(session)
+            running.append(session)
+        clock.advance(tick_at - clock.elapsed)
+
+        ahead = clock.elapsed / speed - (perf_counter() - started)
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+    wall = perf_counter() - started
+    delivered = stats.events_total
+    return {
+        "sessions": sessions,
+        "virtual_seconds": clock.elapsed,
+        "wall_seconds": wall,
+        "speed": clock.elapsed / wall if wall else 0.0,
+        "ticks": stats.ticks,
+        "incomplete": len(running) + len(pending),
+        "events": {
+            "expected": expected,
+            "delivered": delivered,
+            "dropped": max(0, expected - delivered),
+            "duplicated": max(0, delivered - expected),
+        },
+        "timing_error_seconds": {
+            **{f"p{p}": value for p, value in stats.event_delay.percentiles().items()},
+            "max": stats.event_delay.max(),
+        },
+        "tick_ms": {
+            **{
+                f"p{p}": value * 1000
+                for p, value in stats.tick_duration.percentiles().items()
+            },
+            "max": stats.tick_duration.max() * 1000,
+        },
+        "work_ms": {
+            **{f"p{p}": value * 1000 for p, value in stats.work.percentiles().items()},
+            "max": stats.work.max() * 1000,
+        },
+        "throughput": {
+            "events_per_second": delivered / wall if wall else 0.0,
+            "runs_per_second": (sessions - len(running)) / wall if wall else 0.0,
+        },
+        "rest_calls": dict(client.stats.calls),
+        "shed": {
+            priority.name.lower(): count
+            for priority, count in service.outbound.shed.items()
+        },
+    }
+
+
+def run(
+    sessions: int,
+    speed: float,
+    interval: float,
+    stagger: float,
+    latency: float,
+    seed: int,
+) -> dict[str, Any]:
+    """
+    Run the simulation.
+
+    Args:
+        sessions: The number of sessions.
+        speed: The largest speed-up of the virtual clock over wall time.
+        interval: The virtual seconds between ticks of the nightreign loop.
+        stagger: The virtual seconds over which the runs are started.
+        latency: The simulated REST latency in wall seconds.
+        seed: The seed for the random number generator.
+
+    Returns:
+        The machine-readable simulation results.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        results = asyncio.run(
+            simulate(sessions, speed, interval, stagger, latency, seed, directory)
+        )
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(),
+            "target_speed": speed,
+            "interval": interval,
+            "stagger": stagger,
+            "latency": latency,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    """Run the simulation from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--speed", type=float, default=1000.0)
+    parser.add_argument("--interval", type=float, default=5.0)
+    parser.add_argument("--stagger", type=float, default=60.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="")
+    args = parser.parse_args()
+
+    listener = setup_logging(logging.WARNING)
+    print(f"Simulating {args.sessions} sessions...", file=sys.stderr)
+    results = run(
+        args.sessions,
+        args.speed,
+        args.interval,
+        args.stagger,
+        args.latency,
+        args.seed,
+    )
+    listener.stop()
+    output = json.dumps(results, indent=4)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""This module contains the application factory."""
+
+import os
+
+from discord import Intents
+from discord.app_commands import CommandTree
+
+from src.client import FromCordClient
+from src.config import AppConfigManager, GuildConfigManager
+from src.config.interfaces import IAppConfigManager
+from src.data import FileManager, ShardedFileManager
+from src.monitoring import CommandStats, LoopStats, LoopWatchdog, Metrics
+from src.services import NightreignService, RunArchive
+
+
+def create_app(app_config: IAppConfigManager | None = None) -> FromCordClient:
+    """
+    Create an isolated instance of the application.
+
+    Args:
+        app_config: The app config, read from the environment if not given.
+
+    Returns:
+        The client with the config, storage, services, tasks and commands wired up.
+    """
+    if app_config is None:
+        app_config = AppConfigManager()
+
+    data_dir = app_config.get_data_dir()
+    storage_format = app_config.get_storage_format()
+    guild_config = GuildConfigManager(
+        app_config=app_config,
+        file=ShardedFileManager(
+            directory=os.path.join(data_dir, "guilds"),
+            storage_format=storage_format,
+        ),
+        legacy_file=FileManager(file_path=os.path.join(data_dir, "guilds.json")),
+    )
+    nightreign_service = NightreignService(
+        app_config=app_config,
+        guild_config=guild_config,
+        file=ShardedFileManager(
+            directory=os.path.join(data_dir, "sessions"),
+            storage_format=storage_format,
+        ),
+        schedule_file=FileManager(file_path=os.path.join(data_dir, "scheduler.json")),
+        legacy_file=FileManager(file_path=os.path.join(data_dir, "sessions.json")),
+        archive=RunArchive(
+            directory=os.path.join(data_dir, "runs"),
+            stats_file=FileManager(file_path=os.path.join(data_dir, "run_stats.json")),
+        ),
+    )
+
+    nightreign_stats = LoopStats(name="nightreign_loop", interval=5)
+    clean_stats = LoopStats(name="clean_and_save", interval=300)
+    command_stats = CommandStats()
+    watchdog = LoopWatchdog(threshold=app_config.get_watchdog_threshold())
+    metrics = Metrics(
+        nightreign_service=nightreign_service,
+        nightreign_stats=nightreign_stats,
+        command_stats=command_stats,
+        watchdog=watchdog,
+    )
+
+    client = FromCordClient(
+        intents=Intents.all(),
+        app_config=app_config,
+        guild_config=guild_config,
+        nightreign_service=nightreign_service,
+        nightreign_stats=nightreign_stats,
+        clean_stats=clean_stats,
+        command_stats=command_stats,
+        metrics=metrics,
+        watchdog=watchdog,
+        http_trace=metrics.trace_config(),
+    )
+    client.set_tree(CommandTree(client))
+    return client
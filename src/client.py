@@ -1,23 +1,24 @@
 """This module contains the primary client for the project."""
 
+import asyncio
 import logging
+import signal
 import sys
 
-from discord import Client, Object
+from discord import Client, Guild, Member, Object
+from discord.abc import GuildChannel
 from discord.app_commands import CommandTree, Group
 from discord.ext import tasks
 
-from src import INTENTS, app_config, guild_config, nightreign_service
-from src.commands import (
-    CONFIG_COMMAND_GROUP,
-    HELP_COMMAND_GROUP,
-    MANAGEMENT_COMMAND_GROUP,
-    NIGHTREIGN_COMMAND_GROUP,
-)
 from src.config.interfaces import IAppConfigManager, IGuildConfigManager
+from src.monitoring import STARTUP, CommandStats, LoopStats, LoopWatchdog, Metrics
 from src.services import NightreignService
 from src.tasks.nightreign import check_sessions
 
+# How long the shutdown waits for the sessions in progress, in seconds. It has to
+# stay well below the grace period of the container, see compose.yaml.
+SHUTDOWN_DRAIN = 3
+
 
 class FromCordClient(Client):
     """This is the primary discord client for the project."""
@@ -28,10 +29,100 @@ class FromCordClient(Client):
         self.app_config: IAppConfigManager = kwargs.pop("app_config")
         self.guild_config: IGuildConfigManager = kwargs.pop("guild_config")
         self.nightreign_service: NightreignService = kwargs.pop("nightreign_service")
+        self.nightreign_stats: LoopStats = kwargs.pop("nightreign_stats")
+        self.clean_stats: LoopStats = kwargs.pop("clean_stats")
+        self.command_stats: CommandStats = kwargs.pop("command_stats")
+        self.metrics: Metrics = kwargs.pop("metrics")
+        self.watchdog: LoopWatchdog = kwargs.pop("watchdog")
         self.tree: CommandTree | None = None
         self.save_counter: int = 0
+        self.shutdown_task: asyncio.Task[None] | None = None
         super().__init__(*args, **kwargs)
 
+    async def setup_hook(self) -> None:
+        """Load the command groups, start the watchdog and the metrics, if enabled."""
+        with STARTUP.phase("setup_hook.commands"):
+            self.load_commands()
+
+        self.watchdog.start()
+        port = self.app_config.get_metrics_port()
+        if port:
+            with STARTUP.phase("setup_hook.metrics"):
+                await self.metrics.start(port, self)
+
+        try:
+            asyncio.get_running_loop().add_signal_handler(
+                signal.SIGTERM, self.on_sigterm
+            )
+        except NotImplementedError:
+            self.log.warning("SIGTERM can not be handled on this platform.")
+
+    def on_sigterm(self) -> None:
+        """Shut down safely when the container is stopped."""
+        if self.shutdown_task:
+            return
+
+        self.log.info("Received SIGTERM, shutting down...")
+        self.shutdown_task = asyncio.get_running_loop().create_task(self.shutdown())
+
+    async def shutdown(self) -> None:
+        """
+        Save the data and the scheduler state, then close the client.
+
+        The background loops are cancelled first, so no new ticks are queued
+        while saving. The data is saved before waiting for the sessions in
+        progress, so it is on disk even if the container is killed during the
+        wait. It is saved again afterwards with what the sessions changed in the
+        meantime.
+        """
+        self.nightreign_loop.cancel()
+        self.clean_and_save.cancel()
+        self.save_all()
+
+        self.log.info("Waiting for the sessions in progress...")
+        try:
+            await asyncio.wait_for(
+                self.nightreign_service.wait_idle(), timeout=SHUTDOWN_DRAIN
+            )
+        except asyncio.TimeoutError:
+            self.log.warning("Sessions still in progress, closing anyway.")
+
+        self.save_all()
+        await self.close()
+
+    def save_all(self) -> None:
+        """Save all in-memory data and the scheduler state to files."""
+        self.log.info("Saving all in-memory data to files...")
+        self.guild_config.save()
+        self.nightreign_service.save()
+
+        self.log.info("Saving the scheduler state...")
+        self.nightreign_service.save_schedules()
+
+    def load_commands(self) -> None:
+        """Import the command groups and add them to the tree."""
+        if not self.tree:
+            self.log.error("Tree is not set.")
+            sys.exit(1)
+
+        from src.commands import (
+            CONFIG_COMMAND_GROUP,
+            HELP_COMMAND_GROUP,
+            MANAGEMENT_COMMAND_GROUP,
+            NIGHTREIGN_COMMAND_GROUP,
+        )
+
+        self.tree.add_command(CONFIG_COMMAND_GROUP)
+        self.tree.add_command(HELP_COMMAND_GROUP)
+        self.tree.add_command(MANAGEMENT_COMMAND_GROUP)
+        self.tree.add_command(NIGHTREIGN_COMMAND_GROUP)
+
+    async def close(self) -> None:
+        """Stop the watchdog and the metrics endpoint and close the client."""
+        self.watchdog.stop()
+        await self.metrics.stop()
+        await super().close()
+
     async def on_ready(self) -> None:
         """Event handler for the on_ready event."""
         if not self.tree:
@@ -39,9 +130,13 @@ class FromCordClient(Client):
             sys.exit(1)
 
         self.log.info(f"Logged on as {self.user}!")
-        self.app_config.on_ready()
-        self.guild_config.on_ready()
-        self.nightreign_service.on_ready()
+        with STARTUP.phase("on_ready.app_config"):
+            self.app_config.on_ready()
+        with STARTUP.phase("on_ready.guild_config"):
+            self.guild_config.on_ready()
+        with STARTUP.phase("on_ready.nightreign_service"):
+            self.nightreign_service.on_ready(guild.id for guild in self.guilds)
+        self.nightreign_service.pool.fill_guilds(self.guilds)
         self.clean_and_save.start()
         self.nightreign_loop.start()
 
@@ -56,14 +151,38 @@ class FromCordClient(Client):
                     self.log.info(f"===> {subcommand.name} - {subcommand.description}")
 
         self.log.info("Syncing primary guild commands...")
-        await self.tree.sync(guild=Object(id=self.app_config.get_primary_guild_id()))
-        await self.tree.sync(guild=Object(id=self.app_config.get_primary_guild_id()))
+        with STARTUP.phase("on_ready.sync_primary_guild"):
+            await self.tree.sync(
+                guild=Object(id=self.app_config.get_primary_guild_id())
+            )
 
         self.log.info("Syncing commands...")
-        await self.tree.sync()
-        await self.tree.sync()
+        with STARTUP.phase("on_ready.sync"):
+            await self.tree.sync()
 
         self.log.info("Commands synced.")
+        STARTUP.report()
+
+    async def on_guild_channel_delete(self, channel: GuildChannel) -> None:
+        """Event handler for the on_guild_channel_delete event."""
+        self.nightreign_service.channel_deleted(
+            channel.guild.id, channel.id, channel.name
+        )
+
+    async def on_guild_channel_update(
+        self, before: GuildChannel, after: GuildChannel
+    ) -> None:
+        """Event handler for the on_guild_channel_update event."""
+        if before.category_id != after.category_id:
+            self.nightreign_service.channel_moved(after.guild.id, after.id, after.name)
+
+    async def on_guild_remove(self, guild: Guild) -> None:
+        """Event handler for the on_guild_remove event."""
+        self.nightreign_service.guild_removed(guild.id)
+
+    async def on_member_remove(self, member: Member) -> None:
+        """Event handler for the on_member_remove event."""
+        self.nightreign_service.member_removed(member.guild.id, member.id)
 
     def set_tree(self, tree: CommandTree) -> None:
         """Set the tree."""
@@ -82,25 +201,13 @@ class FromCordClient(Client):
             self.log.info("[TASK] Skipping first save...")
             return
 
-        self.log.info("[TASK] Cleaning up the sessions...")
-        await self.nightreign_service.clean(self)
-
-        self.log.info("[TASK] Saving all in-memory data to files...")
-        self.guild_config.save()
-        self.nightreign_service.save()
-
-
-CLIENT = FromCordClient(
-    intents=INTENTS,
-    app_config=app_config,
-    guild_config=guild_config,
-    nightreign_service=nightreign_service,
-)
-
-TREE = CommandTree(CLIENT)
-TREE.add_command(CONFIG_COMMAND_GROUP)
-TREE.add_command(HELP_COMMAND_GROUP)
-TREE.add_command(MANAGEMENT_COMMAND_GROUP)
-TREE.add_command(NIGHTREIGN_COMMAND_GROUP)
+        self.clean_stats.start_tick()
+        try:
+            self.log.info("[TASK] Cleaning up the sessions...")
+            await self.nightreign_service.clean(self, stats=self.clean_stats)
 
-CLIENT.set_tree(TREE)
+            self.log.info("[TASK] Saving all in-memory data to files...")
+            self.guild_config.save()
+            self.nightreign_service.save()
+        finally:
+            self.clean_stats.end_tick()
@@ -5,14 +5,16 @@ import logging
 from discord import CategoryChannel, Interaction
 from discord.app_commands import Group
 
-from src import guild_config
+from src.client import FromCordClient
 
 group = Group(name="config", description="Configuration commands")
 log = logging.getLogger(__name__)
 
 
 @group.command(name="nightreign", description="Set the nightreign channel category.")
-async def nightreign(interaction: Interaction, nightreign_category: str) -> None:
+async def nightreign(
+    interaction: Interaction[FromCordClient], nightreign_category: str
+) -> None:
     """
     Command to set the nightreign channel category.
 
@@ -38,7 +40,9 @@ async def nightreign(interaction: Interaction, nightreign_category: str) -> None
         await interaction.response.send_message("FAILURE: Category not found.")
         return
 
-    guild_config.add_config(guild_id=guild.id, category_id=category.id)
+    interaction.client.guild_config.add_config(
+        guild_id=guild.id, category_id=category.id
+    )
     await interaction.response.send_message(
         f"Nightreign category set to {category.mention}."
     )
@@ -29,6 +29,7 @@ NIGHTREIGN_HELP = """Nightreign commands:
 - /nightreign join [session_id] - Join a session that was created, can not join private sessions.
 - /nightreign add [user] - Add a user to a session, only way to add others to private sessions.
 - /nightreign leave - Leave a session.
+- /nightreign stats - Show the completed runs of the server, per boss and your own.
 """
 
 
@@ -1,56 +1,288 @@
 """This module contains the management commands for the project."""
 
+import asyncio
+import os
 import sys
+from itertools import islice
 
 from discord import Interaction
-from discord.app_commands import Group
+from discord.app_commands import Group, Range
 
-from src import app_config, guild_config, nightreign_service
+from src.client import FromCordClient
+from src.commands.pipeline import DEADLINE, deferred
+from src.monitoring.memory import MEMORY, count_instances, deep_size, rss
+from src.monitoring.profiler import MAX_SECONDS, PROFILER
+from src.monitoring.stats import PERCENTILES
+from src.schemas import GuildConfig, Session
+from src.schemas.events import MESSAGE_LIMIT
+from src.schemas.sessions import SessionFlag
+
+MEMORY_SAMPLE = 100
+MEMORY_SITES = 10
+PROFILE_FUNCTIONS = 10
+PROFILE_LABEL_WIDTH = 60
 
 group = Group(name="manage", description="Management commands.")
 
 
+def pages(title: str, table: str) -> list[str]:
+    """
+    Split a table into code block messages that fit in a discord message.
+
+    The table is split between its lines, a line too long for a message on its
+    own is cut off.
+
+    Args:
+        title: The title above the table, repeated on every page.
+        table: The table.
+
+    Returns:
+        The messages.
+    """
+    room = MESSAGE_LIMIT - len(f"{title}\n```\n\n```")
+    bodies = [""]
+    for line in table.splitlines():
+        line = line[:room]
+        if bodies[-1] and len(bodies[-1]) + 1 + len(line) > room:
+            bodies.append("")
+        bodies[-1] = f"{bodies[-1]}\n{line}" if bodies[-1] else line
+
+    return [f"{title}\n```\n{body}\n```" for body in bodies]
+
+
 @group.command(name="save", description="Save the data.")
-async def save(interaction: Interaction) -> None:
+async def save(interaction: Interaction[FromCordClient]) -> None:
     """
     Save the data.
 
     Args:
         interaction: The interaction object.
     """
-    if interaction.user.id != app_config.get_bot_owner_id():
+    client = interaction.client
+    if interaction.user.id != client.app_config.get_bot_owner_id():
         await interaction.response.send_message(
             "You are not authorized to use this command."
         )
         return
 
     await interaction.response.send_message("Saving data...")
-    nightreign_service.save()
-    guild_config.save()
+    client.nightreign_service.save()
+    client.guild_config.save()
     await interaction.followup.send("Data saved.")
 
 
 @group.command(name="shutdown", description="Safely shutdown the bot.")
-async def shutdown(interaction: Interaction) -> None:
+async def shutdown(interaction: Interaction[FromCordClient]) -> None:
     """
     Safely shutdown the bot.
 
     Args:
         interaction: The interaction object.
     """
-    if interaction.user.id != app_config.get_bot_owner_id():
+    client = interaction.client
+    if interaction.user.id != client.app_config.get_bot_owner_id():
         await interaction.response.send_message(
             "You are not authorized to use this command."
         )
         return
 
     await interaction.response.send_message("Cleaning up...")
-    await nightreign_service.clean(interaction.client)
+    await client.nightreign_service.clean(client)
 
-    await interaction.followup.send("Saving data...")
-    nightreign_service.save()
-    guild_config.save()
-
-    await interaction.followup.send("Shutting down...")
-    await interaction.client.close()
+    await interaction.followup.send("Saving data and shutting down...")
+    await client.shutdown()
     sys.exit(0)
+
+
+@group.command(name="stats", description="Show the background loop stats.")
+async def stats(interaction: Interaction[FromCordClient]) -> None:
+    """
+    Show the percentiles of the background loop stats.
+
+    Args:
+        interaction: The interaction object.
+    """
+    client = interaction.client
+    if interaction.user.id != client.app_config.get_bot_owner_id():
+        await interaction.response.send_message(
+            "You are not authorized to use this command."
+        )
+        return
+
+    from tabulate import tabulate
+
+    headers = ["Metric", *[f"p{percentile}" for percentile in PERCENTILES], "Max"]
+    messages = []
+    for loop_stats in [client.nightreign_stats, client.clean_stats]:
+        table = tabulate(loop_stats.rows(), headers=headers, tablefmt="simple")
+        messages += pages(f"{loop_stats.name} ({loop_stats.ticks} ticks)", table)
+
+    command_rows = client.command_stats.rows()
+    if command_rows:
+        table = tabulate(command_rows, headers=headers, tablefmt="simple")
+        messages += pages("commands", table)
+
+    await interaction.response.send_message(messages[0])
+    for message in messages[1:]:
+        await interaction.followup.send(message)
+
+
+@group.command(name="memory", description="Show what the memory is made of.")
+async def memory(
+    interaction: Interaction[FromCordClient], compare: bool = False, stop: bool = False
+) -> None:
+    """
+    Show the memory of the bot, per kind of object and per allocation site.
+
+    Args:
+        interaction: The interaction object.
+        compare: Whether to show the allocation sites that grew since the previous
+            report instead of the largest ones.
+        stop: Whether to stop tracing the allocations instead of showing them.
+    """
+    client = interaction.client
+    if interaction.user.id != client.app_config.get_bot_owner_id():
+        await interaction.response.send_message(
+            "You are not authorized to use this command."
+        )
+        return
+
+    async def report() -> str:
+        return memory_report(client, compare, stop)
+
+    await deferred(interaction, "memory", report, lambda content: content)
+
+
+def memory_report(client: FromCordClient, compare: bool, stop: bool = False) -> str:
+    """
+    Create the memory report.
+
+    The first report starts tracing the allocations, so it can only show the
+    sites of the allocations made after it. Tracing slows down every allocation,
+    so it runs until a report stops it.
+
+    Args:
+        client: The client.
+        compare: Whether to show the allocation sites that grew since the previous
+            report instead of the largest ones.
+        stop: Whether to stop tracing the allocations instead of showing them.
+
+    Returns:
+        The report.
+    """
+    from tabulate import tabulate
+
+    service = client.nightreign_service
+    sample = list(islice(service.data.values(), MEMORY_SAMPLE))
+    per_session = sum(deep_size(session) for session in sample) / max(len(sample), 1)
+    entries = sum(
+        len(session.event_log) + len(session.outbox)
+        for session in service.data.values()
+    )
+    rows: list[list[object]] = [
+        ["RSS (MiB)", f"{rss() / 1024 / 1024:.1f}"],
+        ["Sessions", len(service.data)],
+        ["Bytes per session", f"{per_session:.0f}"],
+        ["Event log entries", entries],
+        *[
+            [f"{name} objects", count]
+            for name, count in count_instances(
+                [Session, SessionFlag, GuildConfig]
+            ).items()
+        ],
+        ["Guilds", len(client.guilds)],
+        ["Channels", sum(len(guild.channels) for guild in client.guilds)],
+        ["Users", len(client.users)],
+        ["Cached messages", len(client.cached_messages)],
+    ]
+    content = tabulate(rows, tablefmt="rounded_outline")
+
+    if stop:
+        if MEMORY.stop():
+            sites = "Stopped tracing the allocations."
+        else:
+            sites = "The allocations are not being traced."
+    elif MEMORY.start():
+        MEMORY.take_snapshot()
+        sites = "Started tracing the allocations, the next report shows their sites."
+    elif compare:
+        growth = MEMORY.growth(MEMORY_SITES)
+        if growth is None:
+            sites = "No earlier report to compare against, the next one will be."
+        else:
+            sites = tabulate(
+                growth,
+                headers=["Site", "KiB", "+KiB", "Blocks", "+Blocks"],
+                floatfmt=".1f",
+                tablefmt="simple",
+            )
+    else:
+        sites = tabulate(
+            MEMORY.top(MEMORY_SITES),
+            headers=["Site", "KiB", "Blocks"],
+            floatfmt=".1f",
+            tablefmt="simple",
+        )
+
+    return f"```\n{content}\n\n{sites}\n```"
+
+
+@group.command(name="profile", description="Profile the bot for some seconds.")
+async def profile(
+    interaction: Interaction[FromCordClient], seconds: Range[int, 1, MAX_SECONDS]
+) -> None:
+    """
+    Profile the event loop and show the functions it spends the most time in.
+
+    The samples are saved as collapsed stacks under the profiles directory, to
+    render them as a flame graph.
+
+    Args:
+        interaction: The interaction object.
+        seconds: How long to profile for.
+    """
+    client = interaction.client
+    if interaction.user.id != client.app_config.get_bot_owner_id():
+        await interaction.response.send_message(
+            "You are not authorized to use this command."
+        )
+        return
+
+    if PROFILER.running:
+        await interaction.response.send_message("A profile is already running.")
+        return
+
+    directory = os.path.join(client.app_config.get_data_dir(), "profiles")
+
+    async def run() -> str:
+        await PROFILER.profile(seconds)
+        return await asyncio.to_thread(PROFILER.save, directory)
+
+    await deferred(
+        interaction, "profile", run, profile_report, deadline=seconds + DEADLINE
+    )
+
+
+def profile_report(path: str) -> str:
+    """
+    Create the report of the last profile.
+
+    Args:
+        path: The path the samples were saved to.
+
+    Returns:
+        The report.
+    """
+    from tabulate import tabulate
+
+    rows = [
+        [function[:PROFILE_LABEL_WIDTH], own, total]
+        for function, own, total in PROFILER.top(PROFILE_FUNCTIONS)
+    ]
+    table = tabulate(
+        rows,
+        headers=["Function", "Own %", "Total %"],
+        floatfmt=".1f",
+        tablefmt="simple",
+    )
+    return f"{PROFILER.samples} samples, saved to {path}\n```\n{table}\n```"
@@ -1,24 +1,28 @@
 """This module contains the commands for nightreign."""
 
 import logging
+from time import monotonic
 from typing import Literal
 from uuid import uuid4
 
 from discord import Interaction
 from discord.app_commands import Group
 
-from src import nightreign_service as service
+from src.client import FromCordClient
+from src.commands.pipeline import acknowledge, deferred
+from src.services.outbound import Priority
 
 log = logging.getLogger(__name__)
 group = Group(name="nightreign", description="Commands for elden ring nightreign.")
 
 GUILD_ERROR = "Could not determine the guild."
 GUILD_FAILURE = f"FAILURE: {GUILD_ERROR}"
+START_MESSAGE = "Starting the fight against the nightlords!\nGood luck and have fun!\n"
 
 
 @group.command(name="create", description="Create a session.")
 async def create(
-    interaction: Interaction,
+    interaction: Interaction[FromCordClient],
     session_id: str | None = None,
     privacy: Literal["public", "private"] | None = None,
 ) -> None:
@@ -36,6 +40,7 @@ async def create(
     )
     session_pw = uuid4().hex
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
@@ -48,25 +53,26 @@ async def create(
     if not privacy:
         privacy = "private"
 
-    await interaction.response.send_message(f"Creating session (ID: {session_id})...")
-    result = await service.create(
-        interaction=interaction,
-        guild=guild,
-        session_id=session_id,
-        session_pw=session_pw,
-        privacy=privacy,
-    )
-
-    if result:
-        await interaction.followup.send(
+    await deferred(
+        interaction,
+        "create",
+        lambda: service.create(
+            interaction=interaction,
+            guild=guild,
+            session_id=session_id,
+            session_pw=session_pw,
+            privacy=privacy,
+        ),
+        lambda result: (
             f"Session created successfully! (ID: {session_id})"
-        )
-    else:
-        await interaction.followup.send("FAILURE: Could not create session.")
+            if result
+            else "FAILURE: Could not create session."
+        ),
+    )
 
 
 @group.command(name="join", description="Join a session.")
-async def join(interaction: Interaction, session_id: str) -> None:
+async def join(interaction: Interaction[FromCordClient], session_id: str) -> None:
     """
     Command to join a session.
 
@@ -76,28 +82,34 @@ async def join(interaction: Interaction, session_id: str) -> None:
     """
     log.info(f"User ({interaction.user.id}) is joining a session with ID {session_id}.")
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
         await interaction.response.send_message(GUILD_FAILURE)
         return
 
-    result = await service.join(
-        interaction=interaction,
-        session_id=session_id,
-        guild=guild,
-    )
-
-    if result:
-        await interaction.response.send_message(
+    await deferred(
+        interaction,
+        "join",
+        lambda: service.ask(
+            session_id,
+            lambda: service.join(
+                interaction=interaction,
+                session_id=session_id,
+                guild=guild,
+            ),
+        ),
+        lambda result: (
             f"Session joined successfully! (ID: {session_id})"
-        )
-    else:
-        await interaction.response.send_message("FAILURE: Could not join session.")
+            if result
+            else "FAILURE: Could not join session."
+        ),
+    )
 
 
 @group.command(name="add", description="Add a user to a session.")
-async def add(interaction: Interaction, user: str) -> None:
+async def add(interaction: Interaction[FromCordClient], user: str) -> None:
     """
     Command to add a user to a session.
 
@@ -108,28 +120,34 @@ async def add(interaction: Interaction, user: str) -> None:
     log.info(f"User ({interaction.user.id}) is adding user ({user}) to a session.")
     user_id = int(user)
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
         await interaction.response.send_message(GUILD_FAILURE)
         return
 
-    result, mention = await service.add(
-        interaction=interaction,
-        guild=guild,
-        user_id=user_id,
+    await deferred(
+        interaction,
+        "add",
+        lambda: service.ask(
+            service.channel_session_id(interaction),
+            lambda: service.add(
+                interaction=interaction,
+                guild=guild,
+                user_id=user_id,
+            ),
+        ),
+        lambda result: (
+            f"User added to session: {result[1]}"
+            if result[0]
+            else "FAILURE: Could not add user to session."
+        ),
     )
 
-    if result:
-        await interaction.response.send_message(f"User added to session: {mention}")
-    else:
-        await interaction.response.send_message(
-            "FAILURE: Could not add user to session."
-        )
-
 
 @group.command(name="leave", description="Leave a session.")
-async def leave(interaction: Interaction) -> None:
+async def leave(interaction: Interaction[FromCordClient]) -> None:
     """
     Command to leave a session.
 
@@ -138,25 +156,36 @@ async def leave(interaction: Interaction) -> None:
     """
     log.info(f"User ({interaction.user.id}) is leaving a session.")
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
         await interaction.response.send_message(GUILD_FAILURE)
         return
 
-    result, session_id = await service.leave(interaction=interaction, guild=guild)
-
-    if result:
-        await interaction.response.send_message(
-            f"{interaction.user.mention} left the session."
+    async def run() -> bool:
+        result, session_id = await service.ask(
+            service.channel_session_id(interaction),
+            lambda: service.leave(interaction=interaction, guild=guild),
         )
-        await interaction.user.send(f"Left session (ID: {session_id})")
-    else:
-        await interaction.response.send_message("FAILURE: Could not leave session.")
+        if result:
+            await interaction.user.send(f"Left session (ID: {session_id})")
+        return result
+
+    await deferred(
+        interaction,
+        "leave",
+        run,
+        lambda result: (
+            f"{interaction.user.mention} left the session."
+            if result
+            else "FAILURE: Could not leave session."
+        ),
+    )
 
 
 @group.command(name="list", description="List all sessions.")
-async def list(interaction: Interaction) -> None:
+async def list(interaction: Interaction[FromCordClient]) -> None:
     """
     Command to list all sessions.
 
@@ -165,6 +194,7 @@ async def list(interaction: Interaction) -> None:
     """
     log.info(f"User ({interaction.user.id}) is listing all sessions.")
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
@@ -175,8 +205,29 @@ async def list(interaction: Interaction) -> None:
     await interaction.response.send_message(f"```\n{sessions}\n```")
 
 
+@group.command(name="stats", description="Show the run statistics of the server.")
+async def stats(interaction: Interaction[FromCordClient]) -> None:
+    """
+    Command to show the run statistics of the server.
+
+    Args:
+        interaction: The interaction object.
+    """
+    log.info(f"User ({interaction.user.id}) is viewing the run statistics.")
+
+    service = interaction.client.nightreign_service
+    guild = interaction.guild
+    if not guild:
+        log.error(GUILD_ERROR)
+        await interaction.response.send_message(GUILD_FAILURE)
+        return
+
+    result = service.stats(guild, interaction.user.id)
+    await interaction.response.send_message(f"```\n{result}\n```")
+
+
 @group.command(name="start", description="Start a session.")
-async def start(interaction: Interaction, day: Literal[1, 2]) -> None:
+async def start(interaction: Interaction[FromCordClient], day: Literal[1, 2]) -> None:
     """
     Command to start a session.
 
@@ -186,46 +237,70 @@ async def start(interaction: Interaction, day: Literal[1, 2]) -> None:
     """
     log.info(f"User ({interaction.user.id}) is starting a session for day {day}.")
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
         await interaction.response.send_message(GUILD_FAILURE)
         return
 
-    result = await service.start(interaction=interaction, guild=guild, day=day)
-
-    if not result:
-        await interaction.response.send_message("FAILURE: Could not start session.")
+    await deferred(
+        interaction,
+        "start",
+        lambda: service.ask(
+            service.channel_session_id(interaction),
+            lambda: service.start(interaction=interaction, guild=guild, day=day),
+        ),
+        lambda result: START_MESSAGE if result else "FAILURE: Could not start session.",
+    )
 
 
 @group.command(name="close", description="Close a session.")
-async def close(interaction: Interaction) -> None:
+async def close(interaction: Interaction[FromCordClient]) -> None:
     """
     Command to close a session.
 
+    The channel of the session is hidden or deleted when it closes, which takes
+    the deferred response with it, so the result is sent to the user directly.
+    Only a failure is sent to the channel.
+
     Args:
         interaction: The interaction object.
         session_id: The session ID.
     """
     log.info(f"User ({interaction.user.id}) is closing a session.")
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
         await interaction.response.send_message(GUILD_FAILURE)
         return
 
-    result, session_id = await service.close(interaction=interaction, guild=guild)
+    stats = interaction.client.command_stats
+    started = await acknowledge(interaction, "close")
+    try:
+        result, session_id = await service.ask(
+            service.channel_session_id(interaction),
+            lambda: service.close(interaction=interaction, guild=guild),
+        )
 
-    if result:
-        await interaction.user.send(f"Session closed successfully! (ID: {session_id})")
-    else:
-        await interaction.user.send("FAILURE: Could not close session.")
+        if result:
+            await interaction.user.send(
+                f"Session closed successfully! (ID: {session_id})"
+            )
+        else:
+            await service.outbound.submit(
+                Priority.COMMAND,
+                lambda: interaction.followup.send("FAILURE: Could not close session."),
+            )
+    finally:
+        stats.record_completion("close", monotonic() - started)
 
 
 @group.command(name="boss", description="Set the boss for a session.")
 async def boss(
-    interaction: Interaction,
+    interaction: Interaction[FromCordClient],
     boss: Literal[
         "Tricephalos",
         "Gaping Jaw",
@@ -246,15 +321,21 @@ async def boss(
     """
     log.info(f"User ({interaction.user.id}) is setting the boss for a session.")
 
+    service = interaction.client.nightreign_service
     guild = interaction.guild
     if not guild:
         log.error(GUILD_ERROR)
         await interaction.response.send_message(GUILD_FAILURE)
         return
 
-    result = await service.set_boss(interaction=interaction, guild=guild, boss=boss)
-
-    if result:
-        await interaction.response.send_message(f"Boss set to {boss}.")
-    else:
-        await interaction.response.send_message("FAILURE: Could not set boss.")
+    await deferred(
+        interaction,
+        "boss",
+        lambda: service.ask(
+            service.channel_session_id(interaction),
+            lambda: service.set_boss(interaction=interaction, guild=guild, boss=boss),
+        ),
+        lambda result: (
+            f"Boss set to {boss}." if result else "FAILURE: Could not set boss."
+        ),
+    )
@@ -0,0 +1,90 @@
+"""This module contains the defer-first pipeline for the slow commands."""
+
+import asyncio
+import logging
+from time import monotonic
+from typing import Awaitable, Callable, TypeVar
+
+from discord import Interaction
+
+from src.client import FromCordClient
+from src.services.outbound import Priority
+
+T = TypeVar("T")
+
+log = logging.getLogger(__name__)
+
+DEADLINE = 10.0
+LATE_MESSAGE = "Discord is slow right now, still working on it..."
+FAILURE_MESSAGE = "FAILURE: Something went wrong, please try again."
+
+
+async def acknowledge(interaction: Interaction[FromCordClient], command: str) -> float:
+    """
+    Defer a command, so it is acknowledged before it waits for anything.
+
+    Args:
+        interaction: The interaction object.
+        command: The name of the command, for the latency stats.
+
+    Returns:
+        The monotonic time the command started at.
+    """
+    started = monotonic()
+    await interaction.response.defer(thinking=True)
+    interaction.client.command_stats.record_ack(command, monotonic() - started)
+    return started
+
+
+async def deferred(
+    interaction: Interaction[FromCordClient],
+    command: str,
+    call: Callable[[], Awaitable[T]],
+    complete: Callable[[T], str],
+    deadline: float = DEADLINE,
+) -> None:
+    """
+    Acknowledge a command right away, run it and send its result as a followup.
+
+    The interaction is deferred before the command does any discord requests, so
+    it is acknowledged well within the window of discord even under rate limits.
+    A command that misses the deadline is not cancelled halfway through, the user
+    is told that it is still running and gets the result once it finishes.
+
+    Args:
+        interaction: The interaction object.
+        command: The name of the command, for the latency stats.
+        call: Called to run the command.
+        complete: Called with the result of the command to create the followup.
+        deadline: How long the command may take before the user is told it is
+            still running, in seconds.
+    """
+    client = interaction.client
+    stats = client.command_stats
+    outbound = client.nightreign_service.outbound
+    started = await acknowledge(interaction, command)
+
+    task = asyncio.ensure_future(call())
+    try:
+        done, _ = await asyncio.wait({task}, timeout=deadline)
+        if not done:
+            stats.record_late(command)
+            log.warning(f"Command {command} missed its deadline of {deadline}s.")
+            await outbound.submit(
+                Priority.COMMAND, lambda: interaction.followup.send(LATE_MESSAGE)
+            )
+
+        try:
+            result = await task
+        except Exception:
+            await outbound.submit(
+                Priority.COMMAND, lambda: interaction.followup.send(FAILURE_MESSAGE)
+            )
+            raise
+
+        content = complete(result)
+        await outbound.submit(
+            Priority.COMMAND, lambda: interaction.followup.send(content)
+        )
+    finally:
+        stats.record_completion(command, monotonic() - started)
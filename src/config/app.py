@@ -23,6 +23,14 @@ class AppConfigManager(IAppConfigManager):
         self.PRIMARY_GUILD_ID = int(os.getenv("PRIMARY_GUILD", "0"))
         self.NIGHTREIGN_CATEGORY_ID = int(os.getenv("NIGHTREIGN_GUILD_CATEGORY", "0"))
         self.BOT_OWNER_ID = int(os.getenv("BOT_OWNER_ID", "0"))
+        self.METRICS_PORT = int(os.getenv("METRICS_PORT", "") or "0")
+        self.DATA_DIR = os.getenv("DATA_DIR", "") or "data"
+        self.SESSION_TTL = int(os.getenv("SESSION_TTL", "") or "3600")
+        self.EVENT_ENGINE = os.getenv("EVENT_ENGINE", "") or "python"
+        self.OUTBOUND_CONCURRENCY = int(os.getenv("OUTBOUND_CONCURRENCY", "") or "16")
+        self.CHANNEL_POOL_SIZE = int(os.getenv("CHANNEL_POOL_SIZE", "") or "0")
+        self.STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "") or "jsonl"
+        self.WATCHDOG_THRESHOLD = float(os.getenv("WATCHDOG_THRESHOLD", "") or "0.5")
 
     def on_ready(self) -> None:
         """
@@ -49,6 +57,16 @@ class AppConfigManager(IAppConfigManager):
         self.log.info(f"==> Token: {self.TOKEN[:3]}{'*' * (len(self.TOKEN) - 3)}")
         self.log.info(f"==> Primary Guild ID: {self.PRIMARY_GUILD_ID}")
         self.log.info(f"==> Nightreign Category ID: {self.NIGHTREIGN_CATEGORY_ID}")
+        self.log.info(f"==> Data Directory: {self.DATA_DIR}")
+        self.log.info(f"==> Metrics Port: {self.METRICS_PORT or 'disabled'}")
+        self.log.info(f"==> Session TTL: {self.SESSION_TTL}s")
+        self.log.info(f"==> Event Engine: {self.EVENT_ENGINE}")
+        self.log.info(f"==> Outbound Concurrency: {self.OUTBOUND_CONCURRENCY}")
+        self.log.info(f"==> Channel Pool Size: {self.CHANNEL_POOL_SIZE or 'disabled'}")
+        self.log.info(f"==> Storage Format: {self.STORAGE_FORMAT}")
+        self.log.info(
+            f"==> Watchdog Threshold: {self.WATCHDOG_THRESHOLD or 'disabled'}"
+        )
         self.log.info("App Config Manager is ready.")
 
     def get_app_id(self) -> str:
@@ -104,3 +122,75 @@ class AppConfigManager(IAppConfigManager):
             The bot owner id.
         """
         return self.BOT_OWNER_ID
+
+    def get_metrics_port(self) -> int:
+        """
+        Get the port of the metrics endpoint.
+
+        Returns:
+            The metrics port, 0 if the endpoint is disabled.
+        """
+        return self.METRICS_PORT
+
+    def get_data_dir(self) -> str:
+        """
+        Get the directory the data files are stored in.
+
+        Returns:
+            The data directory.
+        """
+        return self.DATA_DIR
+
+    def get_session_ttl(self) -> int:
+        """
+        Get how long a session can be idle before the cleanup checks it.
+
+        Returns:
+            The session TTL in seconds.
+        """
+        return self.SESSION_TTL
+
+    def get_event_engine(self) -> str:
+        """
+        Get the engine that finds the due events.
+
+        Returns:
+            The event engine, either python or numpy.
+        """
+        return self.EVENT_ENGINE
+
+    def get_outbound_concurrency(self) -> int:
+        """
+        Get how many outbound discord requests can be in flight at once.
+
+        Returns:
+            The outbound concurrency.
+        """
+        return self.OUTBOUND_CONCURRENCY
+
+    def get_channel_pool_size(self) -> int:
+        """
+        Get how many hidden channels to keep ready per guild for new sessions.
+
+        Returns:
+            The channel pool size, 0 if the pool is disabled.
+        """
+        return self.CHANNEL_POOL_SIZE
+
+    def get_storage_format(self) -> str:
+        """
+        Get the format the sessions and guild configs are stored in.
+
+        Returns:
+            The storage format, either jsonl or binary.
+        """
+        return self.STORAGE_FORMAT
+
+    def get_watchdog_threshold(self) -> float:
+        """
+        Get the event loop lag from which on the watchdog logs the blocking code.
+
+        Returns:
+            The threshold in seconds, 0 if only the lag is measured.
+        """
+        return self.WATCHDOG_THRESHOLD
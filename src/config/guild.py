@@ -1,20 +1,40 @@
 """This houses the guild config manager."""
 
 from src.config.interfaces import IAppConfigManager, IGuildConfigManager
-from src.data import FileManager
+from src.data.interfaces import IFileManager, IShardedFileManager
 from src.errors import ConfigError, FileError
 from src.schemas import GuildConfig
 
 
 class GuildConfigManager(IGuildConfigManager):
-    """This is the guild config manager."""
+    """
+    This is the guild config manager.
+
+    Every guild has its own file, which is only read when the config of the guild
+    is first needed and only written when the config of the guild changed.
+    """
+
+    def __init__(
+        self,
+        app_config: IAppConfigManager,
+        file: IShardedFileManager,
+        legacy_file: IFileManager | None = None,
+    ) -> None:
+        """
+        Initialize the guild config manager.
 
-    def __init__(self, app_config: IAppConfigManager) -> None:
-        """Initialize the guild config manager."""
+        Args:
+            app_config: The app config manager.
+            file: The sharded file manager for the guild configs.
+            legacy_file: The file manager for the old single guild config file,
+                which is migrated to the sharded files on ready.
+        """
         name = __name__
-        self.file = FileManager(file_path="data/guilds.json")
+        self.file = file
+        self.legacy_file = legacy_file
         self.app_config: IAppConfigManager = app_config
         self.data: dict[str, GuildConfig] = {}
+        self.changed: set[str] = set()
         super().__init__(name=name)
 
     def on_ready(self) -> None:
@@ -31,47 +51,94 @@ class GuildConfigManager(IGuildConfigManager):
 
         self.file.on_ready()
 
-        self.log.info("Loading guild config into memory...")
-        self.load()
+        self.log.info("Migrating the old guild config file...")
+        self.migrate()
 
         self.log.info("Creating default guild configuration...")
         primary_guild = self.app_config.get_primary_guild_id()
         nightreign_category = self.app_config.get_nightreign_category_id()
-        self.data[str(primary_guild)] = GuildConfig(
-            guild_id=primary_guild,
-            nightreign_category_id=nightreign_category,
-        )
+        self.add_config(primary_guild, nightreign_category)
 
         self.log.info("Saving guild config to file...")
         self.save()
 
         self.log.info("Guild Config Manager Info:")
-        self.log.info(f"==> File: {self.file.file}")
-        self.log.info(f"==> Guilds: {len(self.data)}")
+        self.log.info(f"==> Directory: {self.file.directory}")
+        self.log.info(f"==> Guilds: {len(self.file.keys())}")
         self.log.info("Guild Config Manager is ready.")
 
-    def load(self) -> None:
-        """Load the guild config into memory."""
+    def migrate(self) -> None:
+        """
+        Migrate the guild configs stored in the old formats.
+
+        The old single guild config file is split into one file per guild, and the
+        guild files in the old JSON format or in the other storage format are
+        rewritten in the configured one.
+        """
+        codec = self.file.codec
+        for key in self.file.legacy_keys():
+            legacy = self.file.read_legacy(key)
+            self.file.write(key, [codec.encode_guild(GuildConfig(**legacy))])
+
+        for key in self.file.stale_keys():
+            self.file.write(
+                key,
+                (
+                    codec.encode_guild(self.file.stale_codec.decode_guild(record))
+                    for record in self.file.read_stale(key)
+                ),
+            )
+
+        if not self.legacy_file:
+            return
+
         try:
-            file_data = self.file.read()
+            file_data = self.legacy_file.read()
+        except FileNotFoundError:
+            return
         except Exception as error:
-            self.log.warning(f"Error loading guild config: {error}")
-            self.log.warning("Creating new configuration.")
-            self.data = {}
+            self.log.warning(f"Error migrating guild config: {error}")
             return
 
         if not isinstance(file_data, dict):
             raise FileError("Guild config file is not in the correct format.")
 
         for guild_id, guild_config in file_data.items():
-            self.data[guild_id] = GuildConfig(**guild_config)
+            self.file.write(guild_id, [codec.encode_guild(GuildConfig(**guild_config))])
+
+        self.legacy_file.delete()
+        self.log.info(f"==> Migrated guilds: {len(file_data)}")
+
+    def load(self, guild_id: int) -> GuildConfig | None:
+        """
+        Load the config of a guild into memory.
+
+        Args:
+            guild_id: The guild id.
+
+        Returns:
+            The guild configuration, None if the guild has none.
+        """
+        key = str(guild_id)
+        try:
+            record = next(self.file.read(key), None)
+        except FileNotFoundError:
+            return None
+
+        if record is None:
+            return None
+
+        guild_config = self.file.codec.decode_guild(record)
+        self.data[key] = guild_config
+        return guild_config
 
     def save(self) -> None:
-        """Save the guild config to the file."""
-        file_data = {}
-        for guild_id, guild_config in self.data.items():
-            file_data[guild_id] = guild_config.model_dump()
-        self.file.write(file_data)
+        """Save the configs of the changed guilds."""
+        for guild_id in self.changed:
+            self.file.write(
+                guild_id, [self.file.codec.encode_guild(self.data[guild_id])]
+            )
+        self.changed.clear()
 
     def add_config(self, guild_id: int, category_id: int) -> None:
         """
@@ -81,10 +148,17 @@ class GuildConfigManager(IGuildConfigManager):
             guild_id: The guild id.
             category_id: The category id.
         """
-        self.data[str(guild_id)] = GuildConfig(
+        key = str(guild_id)
+        guild_config = self.data.get(key) or self.load(guild_id)
+        if guild_config and guild_config.nightreign_category_id == category_id:
+            return
+
+        self.data[key] = GuildConfig(
             guild_id=guild_id,
             nightreign_category_id=category_id,
+            pooled_channel_ids=guild_config.pooled_channel_ids if guild_config else [],
         )
+        self.changed.add(key)
 
     def get_config(self, guild_id: int) -> GuildConfig:
         """
@@ -96,4 +170,18 @@ class GuildConfigManager(IGuildConfigManager):
         Returns:
             The guild configuration.
         """
-        return self.data[str(guild_id)]
+        guild_config = self.data.get(str(guild_id)) or self.load(guild_id)
+        if not guild_config:
+            raise KeyError(str(guild_id))
+        return guild_config
+
+    def set_pool(self, guild_id: int, channel_ids: list[int]) -> None:
+        """
+        Set the pooled channels of a guild.
+
+        Args:
+            guild_id: The guild id.
+            channel_ids: The IDs of the pooled channels, the longest idle first.
+        """
+        self.get_config(guild_id).pooled_channel_ids = channel_ids
+        self.changed.add(str(guild_id))
@@ -75,3 +75,93 @@ class IAppConfigManager(ABC):
             The nightreign category id.
         """
         pass
+
+    @abstractmethod
+    def get_metrics_port(self) -> int:
+        """
+        Get the port of the metrics endpoint.
+
+        Returns:
+            The metrics port, 0 if the endpoint is disabled.
+        """
+        pass
+
+    @abstractmethod
+    def get_bot_owner_id(self) -> int:
+        """
+        Get the bot owner id.
+
+        Returns:
+            The bot owner id.
+        """
+        pass
+
+    @abstractmethod
+    def get_data_dir(self) -> str:
+        """
+        Get the directory the data files are stored in.
+
+        Returns:
+            The data directory.
+        """
+        pass
+
+    @abstractmethod
+    def get_session_ttl(self) -> int:
+        """
+        Get how long a session can be idle before the cleanup checks it.
+
+        Returns:
+            The session TTL in seconds.
+        """
+        pass
+
+    @abstractmethod
+    def get_event_engine(self) -> str:
+        """
+        Get the engine that finds the due events.
+
+        Returns:
+            The event engine, either python or numpy.
+        """
+        pass
+
+    @abstractmethod
+    def get_outbound_concurrency(self) -> int:
+        """
+        Get how many outbound discord requests can be in flight at once.
+
+        Returns:
+            The outbound concurrency.
+        """
+        pass
+
+    @abstractmethod
+    def get_channel_pool_size(self) -> int:
+        """
+        Get how many hidden channels to keep ready per guild for new sessions.
+
+        Returns:
+            The channel pool size, 0 if the pool is disabled.
+        """
+        pass
+
+    @abstractmethod
+    def get_storage_format(self) -> str:
+        """
+        Get the format the sessions and guild configs are stored in.
+
+        Returns:
+            The storage format, either jsonl or binary.
+        """
+        pass
+
+    @abstractmethod
+    def get_watchdog_threshold(self) -> float:
+        """
+        Get the event loop lag from which on the watchdog logs the blocking code.
+
+        Returns:
+            The threshold in seconds, 0 if only the lag is measured.
+        """
+        pass
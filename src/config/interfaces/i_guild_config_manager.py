@@ -29,13 +29,13 @@ class IGuildConfigManager(ABC):
         pass
 
     @abstractmethod
-    def load(self) -> None:
-        """Load the guild config into memory."""
+    def load(self, guild_id: int) -> GuildConfig | None:
+        """Load the config of a guild into memory."""
         pass
 
     @abstractmethod
     def save(self) -> None:
-        """Save the guild config to the file."""
+        """Save the configs of the changed guilds."""
         pass
 
     @abstractmethod
@@ -47,3 +47,8 @@ class IGuildConfigManager(ABC):
     def get_config(self, guild_id: int) -> GuildConfig:
         """Get the guild configuration."""
         pass
+
+    @abstractmethod
+    def set_pool(self, guild_id: int, channel_ids: list[int]) -> None:
+        """Set the pooled channels of a guild."""
+        pass
@@ -1,5 +1,7 @@
 """This houses the data managers."""
 
+from src.data.codecs import BinaryCodec, JsonCodec
 from src.data.file_manager import FileManager
+from src.data.sharded_file_manager import ShardedFileManager
 
-__all__ = ["FileManager"]
+__all__ = ["BinaryCodec", "FileManager", "JsonCodec", "ShardedFileManager"]
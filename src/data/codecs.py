@@ -0,0 +1,265 @@
+"""
+This module contains the codecs for the stored records.
+
+The JSON codec stores a record as a compact JSON document. The binary codec
+stores it in a fixed layout, the scalar fields of a session are packed into a
+fixed size head, the flags into a bitmask and the event codes into indexes,
+followed by the strings, the members and the event log entries.
+"""
+
+from struct import Struct, pack, unpack_from
+
+from src.data.interfaces import IRecordCodec, Record
+from src.errors import FileError
+from src.schemas.events import EVENT_MESSAGES, EventLogEntry
+from src.schemas.guilds import GuildConfig
+from src.schemas.sessions import Session, SessionFlag
+
+# The tables of version 1 of the binary layout. The position of a name is what is
+# stored, so the tables may only ever be appended to.
+FLAGS = (
+    "ROUND_1_WARNING_1",
+    "ROUND_1_WARNING_2",
+    "ROUND_1_WARNING_3",
+    "ROUND_1_ANNOUNCEMENT",
+    "ROUND_1_CLOSED",
+    "ROUND_2_WARNING_1",
+    "ROUND_2_WARNING_2",
+    "ROUND_2_WARNING_3",
+    "ROUND_2_ANNOUNCEMENT",
+    "ROUND_2_CLOSED",
+    "LEVEL_5_7",
+    "LEVEL_10_12",
+    "TRICEPHALOS_DAY_1",
+    "TRICEPHALOS_DAY_2",
+    "GAPING_JAW_DAY_1",
+    "GAPING_JAW_DAY_2",
+    "SENTIENT_PEST_DAY_1",
+    "SENTIENT_PEST_DAY_2",
+    "AUGUR_DAY_1",
+    "AUGUR_DAY_2",
+    "EQUILIBRIUM_DAY_1",
+    "EQUILIBRIUM_DAY_2",
+    "DARKDRIFT_KNIGHT_DAY_1",
+    "DARKDRIFT_KNIGHT_DAY_2",
+    "FISSURE_IN_THE_FOG_DAY_1",
+    "FISSURE_IN_THE_FOG_DAY_2",
+    "NIGHT_ASPECT_DAY_1",
+    "NIGHT_ASPECT_DAY_2",
+    "TRICEPHALOS_WEAKNESS",
+    "GAPING_JAW_WEAKNESS",
+    "SENTIENT_PEST_WEAKNESS",
+    "AUGUR_WEAKNESS",
+    "EQUILIBRIUM_WEAKNESS",
+    "DARKDRIFT_KNIGHT_WEAKNESS",
+    "FISSURE_IN_THE_FOG_WEAKNESS",
+    "NIGHT_ASPECT_WEAKNESS",
+)
+CODES = ("RUN_STARTED", *FLAGS)
+BOSSES = (
+    None,
+    "Tricephalos",
+    "Gaping Jaw",
+    "Sentient Pest",
+    "Augur",
+    "Equilibrious Beast",
+    "Darkdrift Knight",
+    "Fissure In The Fog",
+    "Night Aspect",
+)
+PRIVACY = ("public", "private")
+
+# channel_id, guild_id, event_log_id, timestamp, flags, active, day, privacy, boss
+# and the lengths of the session id, password, members, event log and outbox.
+SESSION = Struct("<QQQdQ?BBBHHHHH")
+# code, type, day and timestamp.
+ENTRY = Struct("<BBBd")
+# guild_id, nightreign_category_id and the number of pooled channels.
+GUILD = Struct("<QQH")
+ID = Struct("<Q")
+
+
+class JsonCodec(IRecordCodec):
+    """This stores the records as compact JSON documents."""
+
+    def encode_session(self, session: Session) -> bytes:
+        """Encode a session as a record."""
+        return session.model_dump_json().encode()
+
+    def decode_session(self, record: Record) -> Session:
+        """Decode a session from a record."""
+        return Session.model_validate_json(bytes(record))
+
+    def encode_guild(self, guild_config: GuildConfig) -> bytes:
+        """Encode a guild config as a record."""
+        return guild_config.model_dump_json().encode()
+
+    def decode_guild(self, record: Record) -> GuildConfig:
+        """Decode a guild config from a record."""
+        return GuildConfig.model_validate_json(bytes(record))
+
+
+class BinaryCodec(IRecordCodec):
+    """
+    This stores the records in the fixed binary layout.
+
+    The decoded fields are validated from a plain dict, which is cheaper than
+    constructing the models field by field, and only the flags that are set are
+    passed, the others take their default.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initialize the binary codec.
+
+        Raises:
+            FileError: If a session flag or event code is missing from the tables.
+        """
+        unknown = (set(SessionFlag.model_fields) - set(FLAGS)) | (
+            set(EVENT_MESSAGES) - set(CODES)
+        )
+        if unknown:
+            raise FileError(
+                f"The binary format does not know {', '.join(sorted(unknown))}."
+            )
+
+        self.bits = {flag: 1 << index for index, flag in enumerate(FLAGS)}
+        self.codes = {code: index for index, code in enumerate(CODES)}
+        self.bosses = {boss: index for index, boss in enumerate(BOSSES)}
+
+    def encode_entries(self, entries: list[EventLogEntry]) -> bytes:
+        """
+        Encode event log entries.
+
+        Args:
+            entries: The event log entries.
+
+        Returns:
+            The packed entries.
+        """
+        return b"".join(
+            ENTRY.pack(self.codes[entry.code], entry.type, entry.day, entry.timestamp)
+            for entry in entries
+        )
+
+    @staticmethod
+    def decode_entries(
+        record: Record, offset: int, count: int
+    ) -> list[tuple[str, int, int, float]]:
+        """
+        Decode event log entries.
+
+        Args:
+            record: The record.
+            offset: The offset of the first entry.
+            count: The number of entries.
+
+        Returns:
+            The fields of the event log entries, they become entries when the
+            session is validated.
+        """
+        end = offset + count * ENTRY.size
+        return [
+            (CODES[code], kind, day, timestamp)
+            for code, kind, day, timestamp in ENTRY.iter_unpack(record[offset:end])
+        ]
+
+    def encode_session(self, session: Session) -> bytes:
+        """Encode a session as a record."""
+        session_id = session.session_id.encode()
+        session_pw = session.session_pw.encode()
+        flags = 0
+        for flag, bit in self.bits.items():
+            if getattr(session.flags, flag):
+                flags |= bit
+
+        return b"".join(
+            (
+                SESSION.pack(
+                    session.channel_id,
+                    session.guild_id,
+                    session.event_log_id,
+                    session.timestamp,
+                    flags,
+                    session.active,
+                    session.day,
+                    PRIVACY.index(session.privacy),
+                    self.bosses[session.boss],
+                    len(session_id),
+                    len(session_pw),
+                    len(session.members),
+                    len(session.event_log),
+                    len(session.outbox),
+                ),
+                session_id,
+                session_pw,
+                pack(f"<{len(session.members)}Q", *session.members),
+                self.encode_entries(list(session.event_log)),
+                self.encode_entries(session.outbox),
+            )
+        )
+
+    def decode_session(self, record: Record) -> Session:
+        """Decode a session from a record."""
+        (
+            channel_id,
+            guild_id,
+            event_log_id,
+            timestamp,
+            flags,
+            active,
+            day,
+            privacy,
+            boss,
+            id_length,
+            pw_length,
+            members,
+            event_log,
+            outbox,
+        ) = SESSION.unpack_from(record)
+
+        id_start = SESSION.size
+        id_end = id_start + id_length
+        pw_end = id_end + pw_length
+        session_id = str(record[id_start:id_end], "utf-8")
+        session_pw = str(record[id_end:pw_end], "utf-8")
+        offset = pw_end
+        member_ids = list(unpack_from(f"<{members}Q", record, offset))
+        offset += members * ID.size
+        entries = self.decode_entries(record, offset, event_log)
+        offset += event_log * ENTRY.size
+
+        return Session.model_validate(
+            {
+                "session_id": session_id,
+                "session_pw": session_pw,
+                "privacy": PRIVACY[privacy],
+                "members": member_ids,
+                "active": active,
+                "day": day,
+                "timestamp": timestamp,
+                "channel_id": channel_id,
+                "guild_id": guild_id,
+                "event_log": entries,
+                "event_log_id": event_log_id,
+                "flags": {flag: True for flag, bit in self.bits.items() if flags & bit},
+                "outbox": self.decode_entries(record, offset, outbox),
+                "boss": BOSSES[boss],
+            }
+        )
+
+    def encode_guild(self, guild_config: GuildConfig) -> bytes:
+        """Encode a guild config as a record."""
+        pooled = guild_config.pooled_channel_ids
+        return GUILD.pack(
+            guild_config.guild_id, guild_config.nightreign_category_id, len(pooled)
+        ) + pack(f"<{len(pooled)}Q", *pooled)
+
+    def decode_guild(self, record: Record) -> GuildConfig:
+        """Decode a guild config from a record."""
+        guild_id, category_id, pooled = GUILD.unpack_from(record)
+        return GuildConfig(
+            guild_id=guild_id,
+            nightreign_category_id=category_id,
+            pooled_channel_ids=list(unpack_from(f"<{pooled}Q", record, GUILD.size)),
+        )
@@ -1,5 +1,6 @@
 """This houses the interface for the file manager."""
 
+import os
 from json import dump, load
 from typing import Any
 
@@ -29,6 +30,20 @@ class FileManager(IFileManager):
             return load(file)  # type: ignore
 
     def write(self, data: list[dict[str, Any]] | dict[str, Any]) -> None:
-        """Write to the file."""
-        with open(self.file, "w") as file:
+        """
+        Write to the file.
+
+        The data is written to a temporary file first and then moved over the file,
+        so a crash during the write never leaves a truncated file behind.
+        """
+        temporary = f"{self.file}.tmp"
+        with open(temporary, "w") as file:
             dump(data, file, indent=4)
+        os.replace(temporary, self.file)
+
+    def delete(self) -> None:
+        """Delete the file, if it exists."""
+        try:
+            os.remove(self.file)
+        except FileNotFoundError:
+            pass
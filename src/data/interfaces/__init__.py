@@ -1,5 +1,7 @@
 """This houses the interfaces for the data managers."""
 
 from src.data.interfaces.i_file_manager import IFileManager
+from src.data.interfaces.i_record_codec import IRecordCodec, Record
+from src.data.interfaces.i_sharded_file_manager import IShardedFileManager
 
-__all__ = ["IFileManager"]
+__all__ = ["IFileManager", "IRecordCodec", "IShardedFileManager", "Record"]
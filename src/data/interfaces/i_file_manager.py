@@ -33,3 +33,8 @@ class IFileManager(ABC):
     def write(self, data: list[dict[str, Any]] | dict[str, Any]) -> None:
         """Write to the file."""
         pass
+
+    @abstractmethod
+    def delete(self) -> None:
+        """Delete the file, if it exists."""
+        pass
@@ -0,0 +1,32 @@
+"""This houses the interface for the record codec."""
+
+from abc import ABC, abstractmethod
+
+from src.schemas.guilds import GuildConfig
+from src.schemas.sessions import Session
+
+Record = bytes | memoryview
+
+
+class IRecordCodec(ABC):
+    """This is the interface for the record codec, which encodes stored records."""
+
+    @abstractmethod
+    def encode_session(self, session: Session) -> bytes:
+        """Encode a session as a record."""
+        pass
+
+    @abstractmethod
+    def decode_session(self, record: Record) -> Session:
+        """Decode a session from a record."""
+        pass
+
+    @abstractmethod
+    def encode_guild(self, guild_config: GuildConfig) -> bytes:
+        """Encode a guild config as a record."""
+        pass
+
+    @abstractmethod
+    def decode_guild(self, record: Record) -> GuildConfig:
+        """Decode a guild config from a record."""
+        pass
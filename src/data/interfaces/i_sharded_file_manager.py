@@ -0,0 +1,81 @@
+"""This houses the interface for the sharded file manager."""
+
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator
+
+from src.data.interfaces.i_record_codec import IRecordCodec, Record
+
+
+class IShardedFileManager(ABC):
+    """
+    This is the interface for the sharded file manager.
+
+    The codec encodes the records in the storage format of the manager, the stale
+    codec decodes the records of the shards still stored in the other format.
+    """
+
+    codec: IRecordCodec
+    stale_codec: IRecordCodec
+
+    def __init__(self, name: str, directory: str) -> None:
+        """
+        Initialize the sharded file manager.
+
+        Args:
+            name: The __name__ of the sharded file manager which inherits this class.
+            directory: The directory the shards are stored in.
+        """
+        self.log = logging.getLogger(name)
+        self.directory = directory
+        super().__init__()
+
+    @abstractmethod
+    def on_ready(self) -> None:
+        """Call when the client is ready."""
+        pass
+
+    @abstractmethod
+    def keys(self) -> set[str]:
+        """Get the keys of the stored shards."""
+        pass
+
+    @abstractmethod
+    def read(self, key: str) -> Iterator[Record]:
+        """Read the records of a shard one at a time."""
+        pass
+
+    @abstractmethod
+    def write(self, key: str, records: Iterable[bytes]) -> None:
+        """Write the records of a shard one at a time."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete a shard, if it exists."""
+        pass
+
+    @abstractmethod
+    def size(self) -> int:
+        """Get the total size of the shards in bytes."""
+        pass
+
+    @abstractmethod
+    def legacy_keys(self) -> set[str]:
+        """Get the keys of the shards in the old JSON format."""
+        pass
+
+    @abstractmethod
+    def read_legacy(self, key: str) -> dict[str, Any]:
+        """Read a shard in the old JSON format."""
+        pass
+
+    @abstractmethod
+    def stale_keys(self) -> set[str]:
+        """Get the keys of the shards in the other storage format."""
+        pass
+
+    @abstractmethod
+    def read_stale(self, key: str) -> Iterator[Record]:
+        """Read the records of a shard in the other storage format one at a time."""
+        pass
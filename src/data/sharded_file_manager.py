@@ -0,0 +1,203 @@
+"""This houses the sharded file manager."""
+
+import os
+from json import load
+from typing import Any, Iterable, Iterator
+
+from src.data.codecs import BinaryCodec, JsonCodec
+from src.data.interfaces import IRecordCodec, IShardedFileManager, Record
+from src.data.snapshot import read_snapshot, write_snapshot
+from src.errors import ConfigError
+
+EXTENSIONS = {"jsonl": ".jsonl", "binary": ".snap"}
+LEGACY_EXTENSION = ".json"
+
+
+class ShardedFileManager(IShardedFileManager):
+    """
+    This is the sharded file manager, it stores one file per key.
+
+    A shard is either a JSON Lines file with one compact record per line, or a
+    binary snapshot with one fixed-layout record after the other. Records are
+    written and read one at a time, so a save never holds a second copy of the
+    shard in memory. A shard stored in the other format is rewritten in the
+    configured one when it is migrated. The sizes of the shard files are kept
+    once they are scanned, so the total size is cheap to get.
+    """
+
+    def __init__(self, directory: str, storage_format: str = "jsonl") -> None:
+        """
+        Initialize the sharded file manager.
+
+        Args:
+            directory: The directory the shards are stored in.
+            storage_format: The format to store the shards in, jsonl or binary.
+
+        Raises:
+            ConfigError: If the storage format is unknown.
+        """
+        name = __name__
+        super().__init__(name=name, directory=directory)
+        if storage_format not in EXTENSIONS:
+            raise ConfigError(f"Unknown storage format: {storage_format}")
+
+        self.storage_format = storage_format
+        self.stale_format = "binary" if storage_format == "jsonl" else "jsonl"
+        self.codec = self.create_codec(self.storage_format)
+        self.stale_codec = self.create_codec(self.stale_format)
+        self.sizes: dict[str, int] | None = None
+
+    @staticmethod
+    def create_codec(storage_format: str) -> IRecordCodec:
+        """
+        Create the codec of the records of a storage format.
+
+        Args:
+            storage_format: The storage format.
+
+        Returns:
+            The record codec.
+        """
+        return BinaryCodec() if storage_format == "binary" else JsonCodec()
+
+    def on_ready(self) -> None:
+        """Call when the client is ready."""
+        os.makedirs(self.directory, exist_ok=True)
+        self.log.info(f"Sharded file manager created for directory: {self.directory}")
+        self.log.info(f"==> Storage format: {self.storage_format}")
+
+    def path(self, key: str, extension: str) -> str:
+        """
+        Get the path of a shard.
+
+        Args:
+            key: The key of the shard.
+            extension: The extension of the shard file.
+
+        Returns:
+            The path of the shard.
+        """
+        return os.path.join(self.directory, f"{key}{extension}")
+
+    def stored(self, extension: str) -> set[str]:
+        """
+        Get the keys of the shard files with an extension.
+
+        Args:
+            extension: The extension of the shard files.
+
+        Returns:
+            The keys of the shards.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return set()
+
+        return {name[: -len(extension)] for name in names if name.endswith(extension)}
+
+    def keys(self) -> set[str]:
+        """Get the keys of the stored shards."""
+        return self.stored(EXTENSIONS[self.storage_format])
+
+    def read(self, key: str) -> Iterator[Record]:
+        """Read the records of a shard one at a time."""
+        return self.read_format(key, self.storage_format)
+
+    def read_format(self, key: str, storage_format: str) -> Iterator[Record]:
+        """
+        Read the records of a shard in a storage format one at a time.
+
+        Args:
+            key: The key of the shard.
+            storage_format: The storage format of the shard.
+
+        Returns:
+            The records.
+        """
+        path = self.path(key, EXTENSIONS[storage_format])
+        if storage_format == "binary":
+            yield from read_snapshot(path)
+            return
+
+        with open(path, "rb") as file:
+            for line in file:
+                if line.strip():
+                    yield line
+
+    def write(self, key: str, records: Iterable[bytes]) -> None:
+        """
+        Write the records of a shard one at a time.
+
+        The records are written to a temporary file first and then moved over the
+        shard, so it is never left truncated. A shard in the old JSON format or in
+        the other storage format is removed once it has been replaced.
+        """
+        path = self.path(key, EXTENSIONS[self.storage_format])
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as file:
+            if self.storage_format == "binary":
+                write_snapshot(file, records)
+            else:
+                for record in records:
+                    file.write(record)
+                    file.write(b"\n")
+        os.replace(temporary, path)
+        if self.sizes is not None:
+            self.sizes[os.path.basename(path)] = os.path.getsize(path)
+        self.remove(self.path(key, EXTENSIONS[self.stale_format]))
+        self.remove(self.path(key, LEGACY_EXTENSION))
+
+    def delete(self, key: str) -> None:
+        """Delete a shard, if it exists."""
+        for extension in (*EXTENSIONS.values(), LEGACY_EXTENSION):
+            self.remove(self.path(key, extension))
+
+    def remove(self, path: str) -> None:
+        """
+        Remove a file, if it exists.
+
+        Args:
+            path: The path of the file.
+        """
+        if self.sizes is not None:
+            self.sizes.pop(os.path.basename(path), None)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def size(self) -> int:
+        """
+        Get the total size of the shards in bytes.
+
+        The directory is only scanned the first time, after that the sizes are
+        kept up to date by the writes and deletes.
+        """
+        if self.sizes is None:
+            try:
+                entries = list(os.scandir(self.directory))
+            except FileNotFoundError:
+                return 0
+
+            self.sizes = {
+                entry.name: entry.stat().st_size for entry in entries if entry.is_file()
+            }
+        return sum(self.sizes.values())
+
+    def legacy_keys(self) -> set[str]:
+        """Get the keys of the shards in the old JSON format."""
+        return self.stored(LEGACY_EXTENSION)
+
+    def read_legacy(self, key: str) -> dict[str, Any]:
+        """Read a shard in the old JSON format."""
+        with open(self.path(key, LEGACY_EXTENSION), "r") as file:
+            return load(file)  # type: ignore
+
+    def stale_keys(self) -> set[str]:
+        """Get the keys of the shards in the other storage format."""
+        return self.stored(EXTENSIONS[self.stale_format])
+
+    def read_stale(self, key: str) -> Iterator[Record]:
+        """Read the records of a shard in the other storage format one at a time."""
+        return self.read_format(key, self.stale_format)
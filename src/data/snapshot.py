@@ -0,0 +1,95 @@
+"""
+This module contains the binary snapshot format of a shard.
+
+A snapshot starts with a header of the magic bytes, the format version, the
+number of records and the CRC32 of the body. The body is the records, each
+prefixed with its length. Large snapshots are mapped into memory instead of read,
+and their records are handed out as views into the mapping, so they are decoded
+without being copied first.
+"""
+
+import mmap
+import os
+import zlib
+from struct import Struct
+from typing import BinaryIO, Iterable, Iterator
+
+from src.errors import FileError
+
+MAGIC = b"FCSN"
+VERSION = 1
+# magic, version, number of records and the CRC32 of the body.
+HEADER = Struct("<4sHxxII")
+LENGTH = Struct("<I")
+MMAP_THRESHOLD = 64 * 1024
+
+
+def write_snapshot(file: BinaryIO, records: Iterable[bytes]) -> None:
+    """
+    Write records to a snapshot one at a time.
+
+    The header is written last, once the number of records and the checksum are
+    known.
+
+    Args:
+        file: The file to write to, opened for binary writing.
+        records: The records.
+    """
+    file.write(bytes(HEADER.size))
+    count = 0
+    checksum = 0
+    for record in records:
+        length = LENGTH.pack(len(record))
+        checksum = zlib.crc32(record, zlib.crc32(length, checksum))
+        file.write(length)
+        file.write(record)
+        count += 1
+
+    file.seek(0)
+    file.write(HEADER.pack(MAGIC, VERSION, count, checksum))
+
+
+def read_snapshot(path: str) -> Iterator[memoryview]:
+    """
+    Read the records of a snapshot one at a time.
+
+    Args:
+        path: The path of the snapshot.
+
+    Returns:
+        The records, as views into the snapshot.
+
+    Raises:
+        FileError: If the snapshot is truncated, corrupt or of an unknown version.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size >= MMAP_THRESHOLD:
+            data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        else:
+            data = memoryview(file.read())
+
+    if len(data) < HEADER.size:
+        raise FileError(f"Snapshot {path} is truncated.")
+
+    magic, version, count, checksum = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise FileError(f"File {path} is not a snapshot.")
+    if version != VERSION:
+        raise FileError(f"Snapshot {path} has the unknown version {version}.")
+
+    offset = HEADER.size
+    if zlib.crc32(data[offset:]) != checksum:
+        raise FileError(f"Snapshot {path} does not match its checksum.")
+
+    for _ in range(count):
+        if offset + LENGTH.size > len(data):
+            raise FileError(f"Snapshot {path} is truncated.")
+
+        (length,) = LENGTH.unpack_from(data, offset)
+        offset += LENGTH.size
+        end = offset + length
+        if end > len(data):
+            raise FileError(f"Snapshot {path} is truncated.")
+
+        yield data[offset:end]
+        offset = end
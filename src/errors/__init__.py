@@ -25,3 +25,16 @@ class FileError(Exception):
     def __str__(self) -> str:
         """Return the error message."""
         return self.message
+
+
+class RequestShedError(Exception):
+    """This is raised when a low priority outbound request is shed under load."""
+
+    def __init__(self, message: str) -> None:
+        """Initialize the request shed error."""
+        self.message = message
+        super().__init__(self.message)
+
+    def __str__(self) -> str:
+        """Return the error message."""
+        return self.message
@@ -2,8 +2,19 @@
 
 import logging
 
-from src import TOKEN
-from src.client import CLIENT
+from src.monitoring.logs import setup_logging
+from src.monitoring.startup import STARTUP
 
 if __name__ == "__main__":
-    CLIENT.run(TOKEN, log_level=logging.INFO, root_logger=True)
+    listener = setup_logging(logging.INFO)
+    STARTUP.install()
+    try:
+        with STARTUP.phase("import"):
+            from src.app import create_app
+
+        with STARTUP.phase("create_app"):
+            client = create_app()
+
+        client.run(client.app_config.get_token(), log_handler=None)
+    finally:
+        listener.stop()
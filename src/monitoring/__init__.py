@@ -0,0 +1,26 @@
+"""This houses the monitoring utilities for the bot."""
+
+from src.monitoring.logs import LoopQueueHandler, RateLimitFilter, setup_logging
+from src.monitoring.memory import MEMORY, MemoryProfile
+from src.monitoring.metrics import Metrics
+from src.monitoring.profiler import PROFILER, SamplingProfiler
+from src.monitoring.startup import STARTUP, StartupProfile
+from src.monitoring.stats import CommandStats, LoopStats, RollingHistogram
+from src.monitoring.watchdog import LoopWatchdog
+
+__all__ = [
+    "CommandStats",
+    "LoopQueueHandler",
+    "LoopStats",
+    "LoopWatchdog",
+    "MEMORY",
+    "MemoryProfile",
+    "Metrics",
+    "PROFILER",
+    "RateLimitFilter",
+    "RollingHistogram",
+    "STARTUP",
+    "SamplingProfiler",
+    "StartupProfile",
+    "setup_logging",
+]
@@ -0,0 +1,131 @@
+"""
+This module contains the logging setup.
+
+The records are put on a queue by the thread that logs them and written out by a
+listener on a background thread, so the event loop never waits on the terminal
+or a file. Every logging call site is rate limited below warnings, so a message
+logged for each of thousands of sessions is sampled down instead of flooding the
+output, while warnings and errors are always written.
+"""
+
+import logging
+import queue
+from collections import Counter
+from logging.handlers import QueueHandler, QueueListener
+from time import monotonic
+
+FORMAT = "[{asctime}] [{levelname:<8}] {name}: {message}"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    This limits how often every logging call site can log.
+
+    Every call site gets a token bucket that refills at the rate and holds up to
+    the burst. A record that finds its bucket empty is dropped and counted, the
+    next record of the call site that gets through says how many were dropped.
+    Records at or above the level are never dropped.
+    """
+
+    def __init__(
+        self, rate: float = 10.0, burst: int = 50, level: int = logging.WARNING
+    ) -> None:
+        """
+        Initialize the filter.
+
+        Args:
+            rate: The number of records per second a call site can log.
+            burst: The number of records a call site can log at once.
+            level: The level from which records are not rate limited.
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.level = level
+        self.buckets: dict[tuple[str, int], tuple[float, float]] = {}
+        self.suppressed: Counter[tuple[str, int]] = Counter()
+        self.suppressed_total = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """
+        Check whether a record is within the rate of its call site.
+
+        Args:
+            record: The record.
+
+        Returns:
+            True if the record is logged, False if it is dropped.
+        """
+        if record.levelno >= self.level:
+            return True
+
+        key = (record.pathname, record.lineno)
+        now = monotonic()
+        tokens, updated = self.buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            self.suppressed[key] += 1
+            self.suppressed_total += 1
+            return False
+
+        self.buckets[key] = (tokens - 1, now)
+        suppressed = self.suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.getMessage()} ({suppressed} similar suppressed)"
+            record.args = None
+        return True
+
+
+class LoopQueueHandler(QueueHandler):
+    """
+    This puts the records on the queue of the listener.
+
+    Only the message is rendered before the record is queued, the formatting and
+    the traceback are left to the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Prepare a record for the queue.
+
+        Args:
+            record: The record.
+
+        Returns:
+            The record, with its message rendered.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(
+    level: int = logging.INFO, rate: float = 10.0, burst: int = 50
+) -> QueueListener:
+    """
+    Route the root logger through a queue to a listener thread.
+
+    Args:
+        level: The level of the root logger.
+        rate: The number of records per second a call site can log.
+        burst: The number of records a call site can log at once.
+
+    Returns:
+        The started listener, stop it to flush the queue on exit.
+    """
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(FORMAT, DATE_FORMAT, style="{"))
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = LoopQueueHandler(records)
+    handler.addFilter(RateLimitFilter(rate, burst))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
+    listener = QueueListener(records, stream, respect_handler_level=True)
+    listener.start()
+    return listener
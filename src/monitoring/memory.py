@@ -0,0 +1,209 @@
+"""
+This module contains the memory profile.
+
+The allocation sites are traced with tracemalloc, which is off by default since
+it slows down every allocation. It is started by the first memory report, or at
+startup by setting PYTHONTRACEMALLOC to the number of frames to keep, which also
+traces the allocations made before the client is ready. It runs until a report
+stops it, which frees the traces.
+"""
+
+import gc
+import logging
+import os
+import resource
+import sys
+import tracemalloc
+from collections import Counter
+from tracemalloc import Snapshot, Statistic, StatisticDiff
+from types import FunctionType, ModuleType
+from typing import Any, Iterable
+
+# The referents that are shared by every instance and not part of its size.
+SHARED = (type, ModuleType, FunctionType)
+FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def rss() -> int:
+    """
+    Get the resident set size of the process.
+
+    Returns:
+        The size in bytes, the peak size where the current one is unknown.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def deep_size(root: object) -> int:
+    """
+    Get the approximate size of an object and everything it references.
+
+    Classes, modules and functions are shared by every instance, so they and what
+    they reference are not counted.
+
+    Args:
+        root: The object.
+
+    Returns:
+        The size in bytes.
+    """
+    seen: set[int] = set()
+    size = 0
+    objects = [root]
+    while objects:
+        referents = []
+        for obj in objects:
+            if isinstance(obj, SHARED) or id(obj) in seen:
+                continue
+
+            seen.add(id(obj))
+            size += sys.getsizeof(obj)
+            referents.append(obj)
+        objects = gc.get_referents(*referents)
+    return size
+
+
+def count_instances(types: Iterable[type]) -> dict[str, int]:
+    """
+    Count the live instances of some types.
+
+    Args:
+        types: The types, instances of subclasses are counted as their own type.
+
+    Returns:
+        The number of instances per type name.
+    """
+    wanted = list(types)
+    lookup = set(wanted)
+    counts = Counter(type(obj) for obj in gc.get_objects() if type(obj) in lookup)
+    return {cls.__name__: counts[cls] for cls in wanted}
+
+
+def site(statistic: Statistic | StatisticDiff) -> str:
+    """
+    Format the allocation site of a statistic.
+
+    Args:
+        statistic: The statistic.
+
+    Returns:
+        The file and line of the site, the file shortened to its last two parts.
+    """
+    frame = statistic.traceback[0]
+    filename = "/".join(frame.filename.replace(os.sep, "/").split("/")[-2:])
+    return f"{filename}:{frame.lineno}"
+
+
+class MemoryProfile:
+    """
+    This reports the allocation sites of the process and how they change.
+
+    Every report keeps its snapshot, so the next one can be compared against it
+    to find the sites that keep growing in a long running process.
+    """
+
+    def __init__(self, frames: int = 1) -> None:
+        """
+        Initialize the memory profile.
+
+        Args:
+            frames: The number of frames to keep per allocation, when the profile
+                starts tracing.
+        """
+        self.log = logging.getLogger(__name__)
+        self.frames = frames
+        self.snapshot: Snapshot | None = None
+
+    def start(self) -> bool:
+        """
+        Start tracing the allocations.
+
+        Returns:
+            True if tracing was started, False if it was already running.
+        """
+        if tracemalloc.is_tracing():
+            return False
+
+        self.log.info("Tracing the memory allocations...")
+        tracemalloc.start(self.frames)
+        return True
+
+    def stop(self) -> bool:
+        """
+        Stop tracing the allocations and forget the previous snapshot.
+
+        Returns:
+            True if tracing was stopped, False if it was not running.
+        """
+        self.snapshot = None
+        if not tracemalloc.is_tracing():
+            return False
+
+        self.log.info("Stopped tracing the memory allocations.")
+        tracemalloc.stop()
+        return True
+
+    def take_snapshot(self) -> Snapshot:
+        """
+        Take a snapshot of the traced allocations and keep it for the next diff.
+
+        Returns:
+            The snapshot, without the allocations of tracemalloc and the imports.
+        """
+        self.snapshot = tracemalloc.take_snapshot().filter_traces(FILTERS)
+        return self.snapshot
+
+    def top(self, limit: int = 10) -> list[list[Any]]:
+        """
+        Get the allocation sites that hold the most memory.
+
+        Args:
+            limit: The number of sites.
+
+        Returns:
+            The rows of the sites, with their size in KiB and number of blocks.
+        """
+        snapshot = self.take_snapshot()
+        return [
+            [site(stat), stat.size / 1024, stat.count]
+            for stat in snapshot.statistics("lineno")[:limit]
+        ]
+
+    def growth(self, limit: int = 10) -> list[list[Any]] | None:
+        """
+        Get the allocation sites that grew the most since the previous snapshot.
+
+        Args:
+            limit: The number of sites.
+
+        Returns:
+            The rows of the sites, with their size in KiB and number of blocks and
+            the change of both, None if there is no previous snapshot yet.
+        """
+        previous = self.snapshot
+        snapshot = self.take_snapshot()
+        if previous is None:
+            return None
+
+        return [
+            [
+                site(diff),
+                diff.size / 1024,
+                diff.size_diff / 1024,
+                diff.count,
+                diff.count_diff,
+            ]
+            for diff in snapshot.compare_to(previous, "lineno")[:limit]
+        ]
+
+
+MEMORY = MemoryProfile()
@@ -0,0 +1,260 @@
+"""This module contains the Prometheus-style metrics endpoint."""
+
+import logging
+import math
+from collections import Counter
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any
+
+from src.monitoring.stats import CommandStats, LoopStats
+from src.monitoring.watchdog import LoopWatchdog
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession, TraceConfig, TraceRequestEndParams, web
+    from discord import Client
+
+    from src.services import NightreignService
+
+UNHEALTHY_LAG = 5.0
+UNHEALTHY_LATENCY = 10.0
+
+
+class Metrics:
+    """This collects the metrics and serves them over HTTP."""
+
+    def __init__(
+        self,
+        nightreign_service: "NightreignService",
+        nightreign_stats: LoopStats,
+        command_stats: CommandStats,
+        watchdog: LoopWatchdog,
+    ) -> None:
+        """
+        Initialize the metrics.
+
+        Args:
+            nightreign_service: The nightreign service to report on.
+            nightreign_stats: The stats of the nightreign loop.
+            command_stats: The latency stats of the commands.
+            watchdog: The event loop watchdog, which measures the loop lag.
+        """
+        self.log = logging.getLogger(__name__)
+        self.nightreign_service = nightreign_service
+        self.nightreign_stats = nightreign_stats
+        self.command_stats = command_stats
+        self.watchdog = watchdog
+        self.client: "Client | None" = None
+        self.rest_calls: Counter[tuple[str, int]] = Counter()
+        self.rate_limited = 0
+        self.runner: "web.AppRunner | None" = None
+
+    def trace_config(self) -> "TraceConfig":
+        """
+        Create the trace config which counts the REST calls of the client.
+
+        Returns:
+            The trace config to pass to the client as http_trace.
+        """
+        from aiohttp import TraceConfig
+
+        trace_config = TraceConfig()
+        trace_config.on_request_end.append(self.on_request_end)
+        return trace_config
+
+    async def on_request_end(
+        self,
+        session: "ClientSession",
+        context: SimpleNamespace,
+        params: "TraceRequestEndParams",
+    ) -> None:
+        """Count a finished REST call."""
+        if "/api/" not in params.url.path:
+            return
+
+        status = params.response.status
+        self.rest_calls[(params.method, status)] += 1
+        if status == 429:
+            self.rate_limited += 1
+
+    async def start(self, port: int, client: "Client") -> None:
+        """
+        Start serving the metrics and the health check.
+
+        Args:
+            port: The port to listen on.
+            client: The client, whose gateway latency is reported.
+        """
+        from aiohttp import web
+
+        self.client = client
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        app.router.add_get("/healthz", self.handle_health)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host="0.0.0.0", port=port).start()
+        self.log.info(f"Serving metrics on port {port}.")
+
+    async def stop(self) -> None:
+        """Stop serving the metrics."""
+        if self.runner:
+            await self.runner.cleanup()
+
+    @property
+    def gateway_latency(self) -> float:
+        """The latency of the gateway heartbeats in seconds, inf if unknown."""
+        latency = self.client.latency if self.client else math.inf
+        return latency if math.isfinite(latency) else math.inf
+
+    async def handle_metrics(self, request: "web.Request") -> "web.Response":
+        """Serve the metrics."""
+        from aiohttp import web
+
+        return web.Response(text=self.render(), content_type="text/plain")
+
+    async def handle_health(self, request: "web.Request") -> "web.Response":
+        """Serve the health check, with a 503 when the bot is unhealthy."""
+        from aiohttp import web
+
+        healthy, health = self.health()
+        return web.json_response(health, status=200 if healthy else 503)
+
+    def health(self) -> tuple[bool, dict[str, Any]]:
+        """
+        Check the health of the bot.
+
+        The bot is unhealthy when the event loop lags or the gateway heartbeats
+        are slow or not acknowledged. The check is answered by the event loop, so
+        a blocked loop does not answer it at all.
+
+        Returns:
+            Whether the bot is healthy, and the loop lag and gateway latency.
+        """
+        lag = self.watchdog.lag
+        latency = self.gateway_latency
+        healthy = lag < UNHEALTHY_LAG and latency < UNHEALTHY_LATENCY
+        return healthy, {
+            "status": "ok" if healthy else "unhealthy",
+            "loop_lag_seconds": lag,
+            "loop_stalls": self.watchdog.stalls,
+            "gateway_latency_seconds": latency if math.isfinite(latency) else None,
+        }
+
+    def render(self) -> str:
+        """
+        Render the metrics in the Prometheus text format.
+
+        Returns:
+            The rendered metrics.
+        """
+        service = self.nightreign_service
+        sessions_per_guild: Counter[int] = Counter()
+        active = 0
+        for session in service.data.values():
+            sessions_per_guild[session.guild_id] += 1
+            if session.active:
+                active += 1
+
+        snapshot_bytes = service.file.size()
+
+        lines: list[str] = []
+        self.add(lines, "active_sessions", "gauge", "Sessions with a run in progress.")
+        lines.append(f"fromcord_active_sessions {active}")
+
+        self.add(lines, "sessions", "gauge", "Loaded sessions per guild.")
+        for guild_id, count in sessions_per_guild.items():
+            lines.append(f'fromcord_sessions{{guild_id="{guild_id}"}} {count}')
+
+        self.add(lines, "events_fired_total", "counter", "Nightreign events fired.")
+        lines.append(
+            f"fromcord_events_fired_total {self.nightreign_stats.events_total}"
+        )
+
+        self.add(lines, "rest_calls_total", "counter", "Discord REST calls.")
+        for (method, status), count in self.rest_calls.items():
+            lines.append(
+                f'fromcord_rest_calls_total{{method="{method}",status="{status}"}} {count}'
+            )
+
+        self.add(
+            lines, "rate_limited_total", "counter", "Discord REST calls that got a 429."
+        )
+        lines.append(f"fromcord_rate_limited_total {self.rate_limited}")
+
+        self.add(lines, "save_duration_seconds", "gauge", "Duration of the last save.")
+        lines.append(f"fromcord_save_duration_seconds {service.save_duration}")
+
+        self.add(lines, "snapshot_bytes", "gauge", "Size of the session files.")
+        lines.append(f"fromcord_snapshot_bytes {snapshot_bytes}")
+
+        self.add(lines, "event_loop_lag_seconds", "gauge", "Event loop lag.")
+        lines.append(f"fromcord_event_loop_lag_seconds {self.watchdog.lag}")
+
+        self.add(
+            lines,
+            "event_loop_stalls_total",
+            "counter",
+            "Times the event loop was blocked past the watchdog threshold.",
+        )
+        lines.append(f"fromcord_event_loop_stalls_total {self.watchdog.stalls}")
+
+        self.add(
+            lines, "gateway_latency_seconds", "gauge", "Gateway heartbeat latency."
+        )
+        lines.append(f"fromcord_gateway_latency_seconds {self.gateway_latency}")
+
+        commands = self.command_stats
+        for name, histograms, description in (
+            ("command_ack_seconds", commands.ack, "Time to acknowledge a command."),
+            (
+                "command_completion_seconds",
+                commands.completion,
+                "Time to send the result of a command.",
+            ),
+        ):
+            self.add(lines, name, "summary", description)
+            for command, histogram in histograms.items():
+                for percentile, value in histogram.percentiles().items():
+                    lines.append(
+                        f'fromcord_{name}{{command="{command}",'
+                        f'quantile="{percentile / 100}"}} {value}'
+                    )
+
+        self.add(
+            lines, "command_late_total", "counter", "Commands that missed the deadline."
+        )
+        for command, count in commands.late.items():
+            lines.append(f'fromcord_command_late_total{{command="{command}"}} {count}')
+
+        outbound = service.outbound
+        self.add(
+            lines, "outbound_waiting", "gauge", "Discord requests waiting for a slot."
+        )
+        for priority, count in outbound.queued.items():
+            lines.append(
+                f'fromcord_outbound_waiting{{priority="{priority.name.lower()}"}} {count}'
+            )
+
+        self.add(
+            lines, "outbound_shed_total", "counter", "Discord requests shed under load."
+        )
+        for priority, count in outbound.shed.items():
+            lines.append(
+                f'fromcord_outbound_shed_total{{priority="{priority.name.lower()}"}} {count}'
+            )
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def add(lines: list[str], name: str, kind: str, description: str) -> None:
+        """
+        Add the help and type lines of a metric.
+
+        Args:
+            lines: The lines to add to.
+            name: The name of the metric without the prefix.
+            kind: The type of the metric.
+            description: The description of the metric.
+        """
+        lines.append(f"# HELP fromcord_{name} {description}")
+        lines.append(f"# TYPE fromcord_{name} {kind}")
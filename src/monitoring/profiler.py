@@ -0,0 +1,165 @@
+"""
+This module contains the sampling profiler.
+
+Nothing is traced while no profile runs. While one runs, an interval timer
+interrupts the main thread, which runs the event loop, and the signal handler
+records the stack it interrupted. The samples are taken in the loop thread itself,
+so unlike sampling from a helper thread they are not biased towards the moments
+the loop releases the GIL.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any
+
+MAX_SECONDS = 300
+
+
+def label(code: CodeType) -> str:
+    """
+    Get the label of a function.
+
+    Args:
+        code: The code of the function.
+
+    Returns:
+        The name of the function, with the file and line it starts at.
+    """
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+class SamplingProfiler:
+    """
+    This samples the stack of the main thread for a window of time.
+
+    The samples are kept as collapsed stacks, one line per distinct stack with
+    the frames from the root down separated by semicolons, followed by the number
+    of samples. Flame graph tools read this format directly.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: How long to sleep between samples in seconds.
+        """
+        self.log = logging.getLogger(__name__)
+        self.interval = interval
+        self.running = False
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.samples = 0
+        self.labels: dict[CodeType, str] = {}
+
+    async def profile(self, seconds: float) -> None:
+        """
+        Sample the main thread for a window of time.
+
+        Args:
+            seconds: The length of the window.
+
+        Raises:
+            RuntimeError: If a profile is already running or the loop does not run
+                on the main thread.
+        """
+        if self.running:
+            raise RuntimeError("A profile is already running.")
+        if threading.current_thread() is not threading.main_thread():
+            raise RuntimeError("Only a loop on the main thread can be profiled.")
+
+        self.running = True
+        self.stacks = Counter()
+        self.samples = 0
+        self.log.info(f"Profiling the loop for {seconds}s...")
+        previous = signal.signal(signal.SIGALRM, self.sample)
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+            self.running = False
+        self.log.info(f"Profile done, {self.samples} samples.")
+
+    def sample(self, signum: int, frame: FrameType | None) -> None:
+        """
+        Record the stack the timer interrupted.
+
+        Args:
+            signum: The number of the signal.
+            frame: The frame that was interrupted.
+        """
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            name = self.labels.get(code)
+            if name is None:
+                name = self.labels[code] = label(code)
+            stack.append(name)
+            frame = frame.f_back
+        stack.reverse()
+        self.stacks[tuple(stack)] += 1
+        self.samples += 1
+
+    def collapsed(self) -> str:
+        """
+        Get the samples as collapsed stacks.
+
+        Returns:
+            One line per distinct stack, the most sampled first.
+        """
+        return "".join(
+            f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+    def top(self, limit: int = 10) -> list[list[Any]]:
+        """
+        Get the functions the most samples were taken in.
+
+        Args:
+            limit: The number of functions.
+
+        Returns:
+            The rows of the functions, with the share of the samples that were
+            taken in the function itself and in it or anything it called.
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                total[function] += count
+
+        samples = max(self.samples, 1)
+        return [
+            [function, 100 * count / samples, 100 * total[function] / samples]
+            for function, count in own.most_common(limit)
+        ]
+
+    def save(self, directory: str) -> str:
+        """
+        Write the samples to a file as collapsed stacks.
+
+        Args:
+            directory: The directory to write the file to.
+
+        Returns:
+            The path of the file.
+        """
+        os.makedirs(directory, exist_ok=True)
+        name = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = os.path.join(directory, f"{name}.folded")
+        with open(path, "w") as file:
+            file.write(self.collapsed())
+        return path
+
+
+PROFILER = SamplingProfiler()
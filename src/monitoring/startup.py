@@ -0,0 +1,160 @@
+"""
+This module contains the startup profile.
+
+The profile is enabled by setting PROFILE_STARTUP=1 in the environment. It reports
+the time spent per import and per startup phase once the client is ready.
+"""
+
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from importlib.abc import Loader, MetaPathFinder
+from importlib.machinery import ModuleSpec
+from time import perf_counter
+from types import ModuleType
+from typing import Any, Iterator, Sequence
+
+
+class StartupProfile:
+    """This records the time spent per import and per startup phase."""
+
+    def __init__(self) -> None:
+        """Initialize the startup profile."""
+        self.log = logging.getLogger(__name__)
+        self.created = perf_counter()
+        self.enabled = os.getenv("PROFILE_STARTUP", "") not in ("", "0")
+        self.imports: dict[str, float] = {}
+        self.phases: list[tuple[str, float]] = []
+        self.stack: list[float] = []
+        self.reported = False
+
+    def install(self) -> None:
+        """Start timing the imports, if the profile is enabled."""
+        if self.enabled:
+            sys.meta_path.insert(0, ImportTimer(self))
+
+    def uninstall(self) -> None:
+        """Stop timing the imports."""
+        sys.meta_path[:] = [
+            finder for finder in sys.meta_path if not isinstance(finder, ImportTimer)
+        ]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time a startup phase.
+
+        Args:
+            name: The name of the phase.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, perf_counter() - started))
+
+    def report(self, top: int = 20) -> None:
+        """
+        Log the profile, only the first call logs anything.
+
+        Args:
+            top: The number of slowest imports to log.
+        """
+        if not self.enabled or self.reported:
+            return
+
+        self.reported = True
+        self.uninstall()
+        self.log.info("Startup Profile:")
+        self.log.info(
+            f"==> Ready after: {(perf_counter() - self.created) * 1000:.1f} ms"
+        )
+        self.log.info(f"==> Imports: {len(self.imports)} modules")
+        self.log.info(f"==> Import time: {sum(self.imports.values()) * 1000:.1f} ms")
+
+        slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        for module, seconds in slowest[:top]:
+            self.log.info(f"===> import {module}: {seconds * 1000:.1f} ms")
+
+        for name, seconds in self.phases:
+            self.log.info(f"==> Phase {name}: {seconds * 1000:.1f} ms")
+
+    def start_import(self) -> None:
+        """Call when a module starts executing."""
+        self.stack.append(0.0)
+
+    def end_import(self, module: str, seconds: float) -> None:
+        """
+        Call when a module finished executing.
+
+        Args:
+            module: The name of the module.
+            seconds: The time the module took, including its own imports.
+        """
+        children = self.stack.pop()
+        self.imports[module] = seconds - children
+        if self.stack:
+            self.stack[-1] += seconds
+
+
+class TimedLoader(Loader):
+    """This wraps a loader to time the execution of its modules."""
+
+    def __init__(self, loader: Loader, profile: StartupProfile) -> None:
+        """Initialize the timed loader."""
+        self.loader = loader
+        self.profile = profile
+
+    def __getattr__(self, name: str) -> Any:
+        """Forward everything else to the wrapped loader."""
+        return getattr(self.loader, name)
+
+    def create_module(self, spec: ModuleSpec) -> ModuleType | None:
+        """Create the module with the wrapped loader."""
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module: ModuleType) -> None:
+        """Execute the module with the wrapped loader and time it."""
+        self.profile.start_import()
+        started = perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.profile.end_import(module.__name__, perf_counter() - started)
+
+
+class ImportTimer(MetaPathFinder):
+    """This finds modules with the other finders and times their loaders."""
+
+    def __init__(self, profile: StartupProfile) -> None:
+        """Initialize the import timer."""
+        self.profile = profile
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Sequence[str] | None,
+        target: ModuleType | None = None,
+    ) -> ModuleSpec | None:
+        """Find the spec of a module and wrap its loader."""
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec: ModuleSpec | None = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = TimedLoader(spec.loader, self.profile)
+            return spec
+
+        return None
+
+
+STARTUP = StartupProfile()
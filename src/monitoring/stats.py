@@ -0,0 +1,259 @@
+"""This module contains the tick-level instrumentation for the background loops."""
+
+from collections import deque
+from time import monotonic
+
+PERCENTILES = (50, 90, 99)
+
+
+class RollingHistogram:
+    """This keeps the most recent samples of a value."""
+
+    def __init__(self, size: int) -> None:
+        """
+        Initialize the rolling histogram.
+
+        Args:
+            size: The maximum number of samples to keep.
+        """
+        self.samples: deque[float] = deque(maxlen=size)
+
+    def record(self, value: float) -> None:
+        """
+        Record a sample.
+
+        Args:
+            value: The value of the sample.
+        """
+        self.samples.append(value)
+
+    def percentiles(self) -> dict[int, float]:
+        """
+        Get the percentiles of the recorded samples.
+
+        Returns:
+            The nearest-rank percentiles, empty if nothing was recorded.
+        """
+        if not self.samples:
+            return {}
+
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return {
+            percentile: ordered[min(last, len(ordered) * percentile // 100)]
+            for percentile in PERCENTILES
+        }
+
+    def max(self) -> float:
+        """
+        Get the largest recorded sample.
+
+        Returns:
+            The largest sample, 0 if nothing was recorded.
+        """
+        return max(self.samples, default=0.0)
+
+
+class LoopStats:
+    """This records the ticks of a background loop."""
+
+    def __init__(self, name: str, interval: float, size: int = 720) -> None:
+        """
+        Initialize the loop stats.
+
+        Args:
+            name: The name of the loop.
+            interval: The intended interval between ticks in seconds.
+            size: The number of samples each histogram keeps.
+        """
+        self.name = name
+        self.interval = interval
+        self.ticks = 0
+        self.events_total = 0
+        self.tick_duration = RollingHistogram(size)
+        self.work = RollingHistogram(size)
+        self.drift = RollingHistogram(size)
+        self.sessions = RollingHistogram(size)
+        self.events = RollingHistogram(size)
+        self.rest_calls = RollingHistogram(size)
+        self.session_latency = RollingHistogram(size)
+        self.event_delay = RollingHistogram(size)
+        self.tick_started: float | None = None
+        self.last_tick_started: float | None = None
+        self.tick_sessions = 0
+        self.tick_events = 0
+        self.tick_rest_calls = 0
+        self.tick_work = 0.0
+
+    def start_tick(self) -> None:
+        """Call when a tick starts."""
+        now = monotonic()
+        if self.last_tick_started is not None:
+            self.drift.record(now - self.last_tick_started - self.interval)
+
+        self.tick_started = now
+        self.last_tick_started = now
+
+    def end_tick(self) -> None:
+        """
+        Call when a tick ends.
+
+        The sessions, events, REST calls and the time spent processing sessions
+        are counted from the end of the previous tick, so work that finishes after
+        the tick that started it is still counted. The tick itself may only queue
+        that work, its duration does not include it.
+        """
+        if self.tick_started is None:
+            return
+
+        self.ticks += 1
+        self.tick_duration.record(monotonic() - self.tick_started)
+        self.sessions.record(self.tick_sessions)
+        self.events.record(self.tick_events)
+        self.rest_calls.record(self.tick_rest_calls)
+        self.work.record(self.tick_work)
+        self.tick_started = None
+        self.tick_sessions = 0
+        self.tick_events = 0
+        self.tick_rest_calls = 0
+        self.tick_work = 0.0
+
+    def record_session(self, latency: float | None = None) -> None:
+        """
+        Record a processed session.
+
+        Args:
+            latency: How long the session took to process in seconds, if measured.
+        """
+        self.tick_sessions += 1
+        if latency is not None:
+            self.session_latency.record(latency)
+            self.tick_work += latency
+
+    def record_event(self, delay: float | None = None) -> None:
+        """
+        Record a fired event.
+
+        Args:
+            delay: How late the event fired in seconds, if measured.
+        """
+        self.tick_events += 1
+        self.events_total += 1
+        if delay is not None:
+            self.event_delay.record(delay)
+
+    def record_rest_call(self, count: int = 1) -> None:
+        """
+        Record issued REST calls.
+
+        Args:
+            count: The number of REST calls.
+        """
+        self.tick_rest_calls += count
+
+    def rows(self) -> list[list[str]]:
+        """
+        Get the current percentiles as table rows.
+
+        Returns:
+            One row per metric with its percentiles and maximum.
+        """
+        metrics = [
+            ("Tick (ms)", self.tick_duration, 1000.0),
+            ("Work (ms)", self.work, 1000.0),
+            ("Drift (ms)", self.drift, 1000.0),
+            ("Sessions", self.sessions, 1.0),
+            ("Events", self.events, 1.0),
+            ("REST calls", self.rest_calls, 1.0),
+            ("Session (ms)", self.session_latency, 1000.0),
+            ("Event delay (ms)", self.event_delay, 1000.0),
+        ]
+
+        rows = []
+        for label, histogram, scale in metrics:
+            percentiles = histogram.percentiles()
+            values = [percentiles.get(percentile) for percentile in PERCENTILES]
+            rows.append(
+                [
+                    label,
+                    *[
+                        f"{value * scale:.1f}" if value is not None else "-"
+                        for value in values
+                    ],
+                    f"{histogram.max() * scale:.1f}",
+                ]
+            )
+        return rows
+
+
+class CommandStats:
+    """This records the acknowledgement and completion latency of the commands."""
+
+    def __init__(self, size: int = 720) -> None:
+        """
+        Initialize the command stats.
+
+        Args:
+            size: The number of samples each histogram keeps.
+        """
+        self.size = size
+        self.ack: dict[str, RollingHistogram] = {}
+        self.completion: dict[str, RollingHistogram] = {}
+        self.late: dict[str, int] = {}
+
+    def record_ack(self, command: str, latency: float) -> None:
+        """
+        Record how long a command took to acknowledge its interaction.
+
+        Args:
+            command: The name of the command.
+            latency: The latency in seconds.
+        """
+        self.ack.setdefault(command, RollingHistogram(self.size)).record(latency)
+
+    def record_completion(self, command: str, latency: float) -> None:
+        """
+        Record how long a command took to send its result.
+
+        Args:
+            command: The name of the command.
+            latency: The latency in seconds.
+        """
+        self.completion.setdefault(command, RollingHistogram(self.size)).record(latency)
+
+    def record_late(self, command: str) -> None:
+        """
+        Record a command that missed its deadline.
+
+        Args:
+            command: The name of the command.
+        """
+        self.late[command] = self.late.get(command, 0) + 1
+
+    def rows(self) -> list[list[str]]:
+        """
+        Get the current percentiles as table rows.
+
+        Returns:
+            Two rows per command, its acknowledgement and completion latency.
+        """
+        rows = []
+        for command in sorted(self.completion.keys() | self.ack.keys()):
+            for label, histograms in (("ack", self.ack), ("done", self.completion)):
+                histogram = histograms.get(command, RollingHistogram(1))
+                percentiles = histogram.percentiles()
+                rows.append(
+                    [
+                        f"{command} {label} (ms)",
+                        *[
+                            (
+                                f"{percentiles[percentile] * 1000:.1f}"
+                                if percentile in percentiles
+                                else "-"
+                            )
+                            for percentile in PERCENTILES
+                        ],
+                        f"{histogram.max() * 1000:.1f}",
+                    ]
+                )
+        return rows
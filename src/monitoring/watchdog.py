@@ -0,0 +1,95 @@
+"""This module contains the event loop watchdog."""
+
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from time import monotonic
+
+
+class LoopWatchdog:
+    """
+    This measures the event loop lag and finds the code that blocks the loop.
+
+    A task on the loop beats at a fixed interval and measures how late it wakes
+    up. A helper thread watches the beats, and when the loop misses them for
+    longer than the threshold, it captures the stack of the loop thread while
+    the blocking code is still running and logs it.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.25) -> None:
+        """
+        Initialize the watchdog.
+
+        Args:
+            threshold: The lag in seconds from which on the loop counts as
+                blocked, 0 to only measure the lag.
+            interval: How long to sleep between beats in seconds.
+        """
+        self.log = logging.getLogger(__name__)
+        self.threshold = threshold
+        self.interval = interval
+        self.lag = 0.0
+        self.stalls = 0
+        self.heartbeat = monotonic()
+        self.loop_thread = threading.get_ident()
+        self.task: asyncio.Task[None] | None = None
+        self.thread: threading.Thread | None = None
+        self.stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start beating on the running loop and watching from the helper thread."""
+        self.loop_thread = threading.get_ident()
+        self.heartbeat = monotonic()
+        self.task = asyncio.create_task(self.beat())
+        if self.threshold:
+            self.stopped.clear()
+            self.thread = threading.Thread(
+                target=self.watch, name="loop-watchdog", daemon=True
+            )
+            self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the beats and the helper thread."""
+        if self.task:
+            self.task.cancel()
+        self.stopped.set()
+
+    async def beat(self) -> None:
+        """Beat at the interval and measure how late the loop wakes up."""
+        while True:
+            started = monotonic()
+            self.heartbeat = started
+            await asyncio.sleep(self.interval)
+            self.lag = max(0.0, monotonic() - started - self.interval)
+            if self.threshold and self.lag >= self.threshold:
+                self.stalls += 1
+                self.log.warning(f"Event loop was blocked for {self.lag:.3f}s.")
+
+    def watch(self) -> None:
+        """Log the stack of the loop thread once for every missed beat."""
+        reported = 0.0
+        while not self.stopped.wait(self.interval):
+            heartbeat = self.heartbeat
+            blocked = monotonic() - heartbeat - self.interval
+            if blocked < self.threshold or heartbeat == reported:
+                continue
+
+            reported = heartbeat
+            self.log.warning(
+                f"Event loop blocked for {blocked:.3f}s so far, at:\n{self.capture()}"
+            )
+
+    def capture(self) -> str:
+        """
+        Capture the stack of the loop thread.
+
+        Returns:
+            The formatted stack, most recent call last.
+        """
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None:
+            return "The loop thread is gone."
+
+        return "".join(traceback.format_stack(frame))
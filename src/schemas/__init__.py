@@ -1,6 +1,19 @@
 """This houses the schemas for the bot."""
 
+from src.schemas.events import EventLogEntry, EventType
 from src.schemas.guilds import GuildConfig
+from src.schemas.runs import ArchiveStats, RunRecord, RunStats
+from src.schemas.scheduler import SchedulerState, SessionSchedule
 from src.schemas.sessions import Session
 
-__all__ = ["GuildConfig", "Session"]
+__all__ = [
+    "ArchiveStats",
+    "EventLogEntry",
+    "EventType",
+    "GuildConfig",
+    "RunRecord",
+    "RunStats",
+    "SchedulerState",
+    "Session",
+    "SessionSchedule",
+]
@@ -0,0 +1,336 @@
+"""This module contains the nightreign events and the compact event log records."""
+
+from enum import IntEnum
+from sys import intern
+from typing import Any, NamedTuple
+
+FIRST_EVENT = 3.5
+SECOND_EVENT = FIRST_EVENT + 0.5
+THIRD_EVENT = SECOND_EVENT + 0.25
+FOURTH_EVENT = THIRD_EVENT + 0.25
+FIFTH_EVENT = FOURTH_EVENT + 3
+SIXTH_EVENT = FIFTH_EVENT + 2.5
+SEVENTH_EVENT = SIXTH_EVENT + 0.5
+EIGHTH_EVENT = SEVENTH_EVENT + 0.25
+NINTH_EVENT = EIGHTH_EVENT + 0.25
+TENTH_EVENT = NINTH_EVENT + 3
+
+TRICEPHALOS = "Tricephalos"
+GAPING_JAW = "Gaping Jaw"
+SENTIENT_PEST = "Sentient Pest"
+AUGUR = "Augur"
+EQUILIBRIUM = "Equilibrious Beast"
+DARKDRIFT_KNIGHT = "Darkdrift Knight"
+FISSURE_IN_THE_FOG = "Fissure In The Fog"
+NIGHT_ASPECT = "Night Aspect"
+
+EVENT_CONFIG: dict[str, dict[str, Any]] = {
+    "TRICEPHALOS_WEAKNESS": {
+        "time": 0.25,
+        "message": "Tricephalos is weak to holy.",
+        "type": "INFO",
+        "day": 0,
+        "boss": TRICEPHALOS,
+    },
+    "GAPING_JAW_WEAKNESS": {
+        "time": 0.25,
+        "message": "Gaping Jaw is weak to poison.",
+        "type": "INFO",
+        "day": 0,
+        "boss": GAPING_JAW,
+    },
+    "SENTIENT_PEST_WEAKNESS": {
+        "time": 0.25,
+        "message": "Sentient Pest is weak to fire.",
+        "type": "INFO",
+        "day": 0,
+        "boss": SENTIENT_PEST,
+    },
+    "AUGUR_WEAKNESS": {
+        "time": 0.25,
+        "message": "Augur is weak to lightning.",
+        "type": "INFO",
+        "day": 0,
+        "boss": AUGUR,
+    },
+    "EQUILIBRIUM_WEAKNESS": {
+        "time": 0.25,
+        "message": "Equilibrious Beast is weak to madness.",
+        "type": "INFO",
+        "day": 0,
+        "boss": EQUILIBRIUM,
+    },
+    "DARKDRIFT_KNIGHT_WEAKNESS": {
+        "time": 0.25,
+        "message": "Darkdrift Knight is weak to lightning.",
+        "type": "INFO",
+        "day": 0,
+        "boss": DARKDRIFT_KNIGHT,
+    },
+    "FISSURE_IN_THE_FOG_WEAKNESS": {
+        "time": 0.25,
+        "message": "Fissure In The Fog is weak to fire.",
+        "type": "INFO",
+        "day": 0,
+        "boss": FISSURE_IN_THE_FOG,
+    },
+    "NIGHT_ASPECT_WEAKNESS": {
+        "time": 0.25,
+        "message": "Night Aspect is weak to holy.",
+        "type": "INFO",
+        "day": 0,
+        "boss": NIGHT_ASPECT,
+    },
+    "TRICEPHALOS_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Bell Bearing Hunter, Demi-Humans",
+        "type": "INFO",
+        "day": 1,
+        "boss": TRICEPHALOS,
+    },
+    "TRICEPHALOS_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Fell Omen, Tree Sentinel",
+        "type": "INFO",
+        "day": 2,
+        "boss": TRICEPHALOS,
+    },
+    "GAPING_JAW_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Night's Cavalry x2, Valiant Gargoyle, Wormface",
+        "type": "INFO",
+        "day": 1,
+        "boss": GAPING_JAW,
+    },
+    "GAPING_JAW_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Ancient Dragon, Crucible Knight/Golden Hippopotamus, Outland Commander",  # noqa: E501
+        "type": "INFO",
+        "day": 2,
+        "boss": GAPING_JAW,
+    },
+    "SENTIENT_PEST_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Battlefield Commander, Centipede Demon, Smelter Demon, Tibia Mariner, Ulcerated Tree Spirit",  # noqa: E501
+        "type": "INFO",
+        "day": 1,
+        "boss": SENTIENT_PEST,
+    },
+    "SENTIENT_PEST_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Draconic Tree Sentinel, Great Wyrm, Nox Dragonkin Soldier",  # noqa: E501
+        "type": "INFO",
+        "day": 2,
+        "boss": SENTIENT_PEST,
+    },
+    "AUGUR_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Gaping Dragon, Grafted Monarch, Wormface",  # noqa: E501
+        "type": "INFO",
+        "day": 1,
+        "boss": AUGUR,
+    },
+    "AUGUR_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Full-Grown Fallingstar Beast, Tree Sentinel",  # noqa: E501
+        "type": "INFO",
+        "day": 2,
+        "boss": AUGUR,
+    },
+    "EQUILIBRIUM_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Centipede Demon, The Duke's Dear Freja, Tibia Mariner, Royal Revenant",  # noqa: E501
+        "type": "INFO",
+        "day": 1,
+        "boss": EQUILIBRIUM,
+    },
+    "EQUILIBRIUM_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Crucible Knight/Golden Hippopotamus, Death Rite Bird, Godskin Duo",  # noqa: E501
+        "type": "INFO",
+        "day": 2,
+        "boss": EQUILIBRIUM,
+    },
+    "DARKDRIFT_KNIGHT_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Gaping Dragon, Night's Cavalry x2, Royal Revenant, Valiant Gargoyle, Wormface",  # noqa: E501
+        "type": "INFO",
+        "day": 1,
+        "boss": DARKDRIFT_KNIGHT,
+    },
+    "DARKDRIFT_KNIGHT_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Nameless King, Nox Dragonkin Soldier, Outland Commander",  # noqa: E501
+        "type": "INFO",
+        "day": 2,
+        "boss": DARKDRIFT_KNIGHT,
+    },
+    "FISSURE_IN_THE_FOG_DAY_1": {
+        "time": 0.5,
+        "message": "Potential night 1 bosses: Grafted Monarch, Smelter Demon, The Duke's Dear Freja, Tibia Mariner, Ulcerated Tree Spirit",  # noqa: E501
+        "type": "INFO",
+        "day": 1,
+        "boss": FISSURE_IN_THE_FOG,
+    },
+    "FISSURE_IN_THE_FOG_DAY_2": {
+        "time": 0.5,
+        "message": "Potential night 2 bosses: Dancer Of The Boreal Valley, Draconic Tree Sentinel, Godskin Duo",  # noqa: E501
+        "type": "INFO",
+        "day": 2,
+        "boss": FISSURE_IN_THE_FOG,
+    },
+    "ROUND_1_WARNING_1": {
+        "time": FIRST_EVENT,
+        "message": "Round 1 will start closing in 1 minute.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_1_WARNING_2": {
+        "time": SECOND_EVENT,
+        "message": "Round 1 will start closing in 30 seconds.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_1_WARNING_3": {
+        "time": THIRD_EVENT,
+        "message": "Round 1 will start closing in 15 seconds.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_1_ANNOUNCEMENT": {
+        "time": FOURTH_EVENT,
+        "message": "Round 1 has started closing.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_1_CLOSED": {
+        "time": FIFTH_EVENT,
+        "message": "Round 1 has closed.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_2_WARNING_1": {
+        "time": SIXTH_EVENT,
+        "message": "Round 2 will start closing in 1 minute.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_2_WARNING_2": {
+        "time": SEVENTH_EVENT,
+        "message": "Round 2 will start closing in 30 seconds.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_2_WARNING_3": {
+        "time": EIGHTH_EVENT,
+        "message": "Round 2 will start closing in 15 seconds.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_2_ANNOUNCEMENT": {
+        "time": NINTH_EVENT,
+        "message": "Round 2 has started closing.",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "ROUND_2_CLOSED": {
+        "time": TENTH_EVENT,
+        "message": "Round 2 has closed.\nGood luck and have fun!",
+        "type": "TIMER",
+        "day": 0,
+        "boss": None,
+    },
+    "LEVEL_5_7": {
+        "time": TENTH_EVENT + 0.5,
+        "message": "You should now be level 5-7.",
+        "type": "GUIDELINE",
+        "day": 1,
+        "boss": None,
+    },
+    "LEVEL_10_12": {
+        "time": TENTH_EVENT + 0.5,
+        "message": "You should now be level 10-12.",
+        "type": "GUIDELINE",
+        "day": 2,
+        "boss": None,
+    },
+}
+
+EVENT_MESSAGES: dict[str, str] = {
+    "RUN_STARTED": "Started the run",
+    **{code: config["message"] for code, config in EVENT_CONFIG.items()},
+}
+
+EVENT_CODES: dict[str, str] = {
+    message: code for code, message in EVENT_MESSAGES.items()
+}
+
+EVENT_LOG_SIZE = 16
+# The length limit of the content of a discord message.
+MESSAGE_LIMIT = 2000
+
+
+class EventType(IntEnum):
+    """The type of an event."""
+
+    INFO = 0
+    TIMER = 1
+    GUIDELINE = 2
+
+
+class EventLogEntry(NamedTuple):
+    """
+    A compact event log record.
+
+    The text of the event is not stored, it is looked up from its code in
+    EVENT_MESSAGES when the event log is rendered.
+    """
+
+    code: str
+    type: EventType
+    day: int
+    timestamp: float
+
+
+def migrate_event_log(rows: list[Any]) -> list[Any]:
+    """
+    Convert legacy event log rows into compact records.
+
+    Legacy rows are lists of the day, type, message text and ISO timestamp. Rows
+    whose message is no longer known are dropped.
+
+    Args:
+        rows: The persisted event log rows.
+
+    Returns:
+        The rows as compact records, records are passed through unchanged.
+    """
+    from datetime import datetime
+
+    migrated: list[Any] = []
+    for row in rows:
+        if len(row) == 4 and isinstance(row[2], str) and isinstance(row[3], str):
+            code = EVENT_CODES.get(row[2])
+            if code is None:
+                continue
+
+            row = [
+                code,
+                EventType[row[1]],
+                int(row[0]),
+                datetime.fromisoformat(row[3]).timestamp(),
+            ]
+
+        migrated.append(
+            EventLogEntry(intern(row[0]), EventType(row[1]), row[2], row[3])
+        )
+    return migrated
@@ -8,3 +8,4 @@ class GuildConfig(BaseModel):
 
     guild_id: int
     nightreign_category_id: int
+    pooled_channel_ids: list[int] = []
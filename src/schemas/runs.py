@@ -0,0 +1,31 @@
+"""This module contains the schemas for the run history."""
+
+from pydantic import BaseModel
+
+
+class RunRecord(BaseModel):
+    """A completed run, as it is appended to the run archive."""
+
+    session_id: str
+    guild_id: int
+    members: list[int]
+    day: int
+    boss: str | None = None
+    started: float
+    finished: float
+
+
+class RunStats(BaseModel):
+    """The number of completed runs, per boss, per date and per player."""
+
+    runs: int = 0
+    bosses: dict[str, int] = {}
+    dates: dict[str, int] = {}
+    players: dict[int, int] = {}
+
+
+class ArchiveStats(BaseModel):
+    """The aggregates of the run archive, in total and per guild."""
+
+    total: RunStats = RunStats()
+    guilds: dict[int, RunStats] = {}
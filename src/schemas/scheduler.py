@@ -0,0 +1,20 @@
+"""This module contains the schemas for the scheduler state."""
+
+from pydantic import BaseModel
+
+
+class SessionSchedule(BaseModel):
+    """The scheduler state of a session with a run in progress."""
+
+    session_id: str
+    next_event_time: float | None = None
+    event_log_id: int = 0
+    attempts: int = 0
+    retry_at: float = 0.0
+
+
+class SchedulerState(BaseModel):
+    """The scheduler state that is persisted across restarts."""
+
+    saved_at: float
+    sessions: dict[str, SessionSchedule]
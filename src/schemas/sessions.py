@@ -1,8 +1,11 @@
 """This module contains the schemas for the sessions."""
 
-from typing import Literal
+from collections import deque
+from typing import Any, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+from src.schemas.events import EVENT_LOG_SIZE, EventLogEntry, migrate_event_log
 
 
 class SessionFlag(BaseModel):
@@ -47,7 +50,12 @@ class SessionFlag(BaseModel):
 
 
 class Session(BaseModel):
-    """A session."""
+    """
+    A session.
+
+    The events that fired but were not confirmed on the event log message yet are
+    kept in the outbox, which is stored along with the flags that fired them.
+    """
 
     session_id: str
     session_pw: str
@@ -58,9 +66,10 @@ class Session(BaseModel):
     timestamp: float
     channel_id: int
     guild_id: int
-    event_log: list[list[str]]
+    event_log: deque[EventLogEntry]
     event_log_id: int
     flags: SessionFlag = SessionFlag()
+    outbox: list[EventLogEntry] = []
     boss: (
         Literal[
             "Tricephalos",
@@ -74,3 +83,17 @@ class Session(BaseModel):
         ]
         | None
     ) = None
+
+    @field_validator("event_log", mode="before")
+    @classmethod
+    def migrate_event_log(cls, value: Any) -> Any:
+        """Convert legacy event log rows into compact records."""
+        if isinstance(value, (list, deque)):
+            return migrate_event_log(list(value))
+        return value
+
+    @field_validator("event_log", mode="after")
+    @classmethod
+    def bound_event_log(cls, value: deque[EventLogEntry]) -> deque[EventLogEntry]:
+        """Keep the event log in a ring buffer of the most recent entries."""
+        return deque(value, maxlen=EVENT_LOG_SIZE)
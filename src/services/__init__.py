@@ -1,5 +1,18 @@
 """This houses the services for the application."""
 
+from src.services.actor import SessionActor
+from src.services.archive import RunArchive
+from src.services.clock import Clock
 from src.services.nightreign import NightreignService
+from src.services.outbound import OutboundScheduler, Priority
+from src.services.pool import ChannelPool
 
-__all__ = ["NightreignService"]
+__all__ = [
+    "ChannelPool",
+    "Clock",
+    "NightreignService",
+    "OutboundScheduler",
+    "Priority",
+    "RunArchive",
+    "SessionActor",
+]
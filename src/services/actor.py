@@ -0,0 +1,120 @@
+"""This module contains the session actor."""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class SessionActor:
+    """
+    This runs the work of a single session one item at a time.
+
+    Commands and timer ticks are put in the mailbox of the actor and processed in
+    order, so they never interleave on the session. The worker task only exists
+    while the mailbox has work, an idle actor costs no more than its mailbox.
+    """
+
+    def __init__(self, session_id: str) -> None:
+        """
+        Initialize the session actor.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        self.log = logging.getLogger(__name__)
+        self.session_id = session_id
+        self.mailbox: deque[
+            tuple[Callable[[], Awaitable[Any]], asyncio.Future[Any] | None]
+        ] = deque()
+        self.tick_pending = False
+        self.task: asyncio.Task[None] | None = None
+
+    async def ask(self, handler: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a handler in turn and wait for its result.
+
+        Args:
+            handler: Called to create the coroutine once it is the handler's turn.
+
+        Returns:
+            The result of the handler.
+        """
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self.put(handler, future)
+        return await future
+
+    def tick(self, handler: Callable[[], Awaitable[None]]) -> bool:
+        """
+        Queue a timer tick, unless one is already waiting in the mailbox.
+
+        Args:
+            handler: Called to create the coroutine of the tick.
+
+        Returns:
+            True if the tick was queued, False if it was coalesced.
+        """
+        if self.tick_pending:
+            return False
+
+        self.tick_pending = True
+
+        async def run_tick() -> None:
+            self.tick_pending = False
+            await handler()
+
+        self.put(run_tick, None)
+        return True
+
+    def put(
+        self,
+        handler: Callable[[], Awaitable[Any]],
+        future: asyncio.Future[Any] | None,
+    ) -> None:
+        """
+        Put a handler in the mailbox and start the worker, if it is not running.
+
+        Args:
+            handler: Called to create the coroutine once it is the handler's turn.
+            future: The future to set the result of the handler on, if any.
+        """
+        self.mailbox.append((handler, future))
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def busy(self) -> bool:
+        """
+        Check whether the actor has work in progress.
+
+        Returns:
+            True if the worker is running, otherwise False.
+        """
+        return self.task is not None
+
+    async def wait(self) -> None:
+        """Wait until the mailbox is empty."""
+        while self.task is not None:
+            await asyncio.shield(self.task)
+
+    async def run(self) -> None:
+        """Process the mailbox until it is empty."""
+        try:
+            while self.mailbox:
+                handler, future = self.mailbox.popleft()
+                try:
+                    result = await handler()
+                except Exception as error:
+                    if future is None:
+                        self.log.error(
+                            f"Error in session {self.session_id} actor: {error}"
+                        )
+                    elif not future.done():
+                        future.set_exception(error)
+                    continue
+
+                if future is not None and not future.done():
+                    future.set_result(result)
+        finally:
+            self.task = None
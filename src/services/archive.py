@@ -0,0 +1,197 @@
+"""This module contains the archive of the completed runs."""
+
+import gzip
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Iterator
+
+from src.data.interfaces import IFileManager
+from src.errors import FileError
+from src.schemas.runs import ArchiveStats, RunRecord, RunStats
+from src.schemas.sessions import Session
+
+EXTENSION = ".jsonl.gz"
+
+
+class RunArchive:
+    """
+    This keeps the history of the completed runs and their statistics.
+
+    Completed runs are appended to one compressed JSON Lines file per date, the
+    files are never rewritten. The statistics are counted up as the runs are
+    recorded and stored in their own file, so they are read without scanning the
+    history. The statistics are rebuilt from the history when their file is lost.
+    """
+
+    def __init__(self, directory: str, stats_file: IFileManager) -> None:
+        """
+        Initialize the run archive.
+
+        Args:
+            directory: The directory the history is stored in.
+            stats_file: The file manager for the statistics.
+        """
+        self.log = logging.getLogger(__name__)
+        self.directory = directory
+        self.stats_file = stats_file
+        self.stats = ArchiveStats()
+        self.pending: list[RunRecord] = []
+        self.changed = False
+
+    def on_ready(self) -> None:
+        """Call when the client is ready."""
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.log.info("Loading the run statistics...")
+        try:
+            file_data = self.stats_file.read()
+        except FileNotFoundError:
+            self.rebuild()
+        else:
+            if not isinstance(file_data, dict):
+                raise FileError("Run statistics file is not in the correct format.")
+
+            self.stats = ArchiveStats(**file_data)
+
+        self.log.info("Run Archive Info:")
+        self.log.info(f"==> Directory: {self.directory}")
+        self.log.info(f"==> Runs: {self.stats.total.runs}")
+        self.log.info("Run Archive is ready.")
+
+    @staticmethod
+    def date(timestamp: float) -> str:
+        """
+        Get the date a run is filed under.
+
+        Args:
+            timestamp: The time the run finished.
+
+        Returns:
+            The UTC date in ISO format.
+        """
+        return datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat()
+
+    def path(self, date: str) -> str:
+        """
+        Get the path of the history of a date.
+
+        Args:
+            date: The date in ISO format.
+
+        Returns:
+            The path of the history file.
+        """
+        return os.path.join(self.directory, f"{date}{EXTENSION}")
+
+    def dates(self) -> list[str]:
+        """
+        Get the dates with a history file.
+
+        Returns:
+            The dates in ISO format, oldest first.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        return sorted(
+            name[: -len(EXTENSION)] for name in names if name.endswith(EXTENSION)
+        )
+
+    def read(self, date: str) -> Iterator[RunRecord]:
+        """
+        Read the completed runs of a date one at a time.
+
+        Args:
+            date: The date in ISO format.
+
+        Returns:
+            The completed runs.
+        """
+        with gzip.open(self.path(date), "rb") as file:
+            for line in file:
+                if line.strip():
+                    yield RunRecord.model_validate_json(line)
+
+    def record(self, session: Session, finished: float) -> None:
+        """
+        Record the run of a session as completed.
+
+        The run is appended to the history on the next save.
+
+        Args:
+            session: The session, before its run is reset.
+            finished: The time the run finished.
+        """
+        run = RunRecord(
+            session_id=session.session_id,
+            guild_id=session.guild_id,
+            members=list(session.members),
+            day=session.day,
+            boss=session.boss,
+            started=session.timestamp,
+            finished=finished,
+        )
+        self.pending.append(run)
+        self.count(run)
+
+    def count(self, run: RunRecord) -> None:
+        """
+        Add a completed run to the statistics.
+
+        Args:
+            run: The completed run.
+        """
+        boss = run.boss or "Unknown"
+        date = self.date(run.finished)
+        guild = self.stats.guilds.setdefault(run.guild_id, RunStats())
+        for stats in (self.stats.total, guild):
+            stats.runs += 1
+            stats.bosses[boss] = stats.bosses.get(boss, 0) + 1
+            stats.dates[date] = stats.dates.get(date, 0) + 1
+            for member in run.members:
+                stats.players[member] = stats.players.get(member, 0) + 1
+        self.changed = True
+
+    def rebuild(self) -> None:
+        """Count the statistics up again from the history."""
+        self.stats = ArchiveStats()
+        for date in self.dates():
+            for run in self.read(date):
+                self.count(run)
+
+    def guild_stats(self, guild_id: int) -> RunStats:
+        """
+        Get the statistics of a guild.
+
+        Args:
+            guild_id: The ID of the guild.
+
+        Returns:
+            The statistics, empty if the guild has no completed runs.
+        """
+        return self.stats.guilds.get(guild_id) or RunStats()
+
+    def save(self) -> None:
+        """
+        Append the pending runs to the history and save the statistics.
+
+        Every save appends a single compressed member to the file of each date,
+        so the history files are only ever appended to.
+        """
+        partitions: dict[str, list[bytes]] = {}
+        for run in self.pending:
+            partitions.setdefault(self.date(run.finished), []).append(
+                run.model_dump_json().encode()
+            )
+
+        for date, lines in partitions.items():
+            with gzip.open(self.path(date), "ab") as file:
+                file.write(b"\n".join(lines) + b"\n")
+        self.pending.clear()
+
+        if self.changed:
+            self.stats_file.write(self.stats.model_dump())
+            self.changed = False
@@ -0,0 +1,30 @@
+"""This module contains the clock the scheduler tells the time with."""
+
+import time
+
+
+class Clock:
+    """
+    This tells the time from the system clocks.
+
+    The scheduler takes its time from a clock instead of the time module, so a
+    simulation can drive the runs with a clock of its own.
+    """
+
+    def time(self) -> float:
+        """
+        Get the wall clock time.
+
+        Returns:
+            The seconds since the epoch.
+        """
+        return time.time()
+
+    def monotonic(self) -> float:
+        """
+        Get the monotonic time.
+
+        Returns:
+            The seconds since an arbitrary point, never going backwards.
+        """
+        return time.monotonic()
@@ -1,8 +1,12 @@
 """This module contains the Nightreign service."""
 
+import heapq
 import logging
+from collections import deque
 from datetime import datetime
-from typing import Literal
+from itertools import chain
+from time import perf_counter
+from typing import Awaitable, Callable, Iterable, Literal, Sequence, TypeVar
 
 from discord import (
     CategoryChannel,
@@ -12,90 +16,738 @@ from discord import (
     PermissionOverwrite,
     TextChannel,
 )
-from tabulate import tabulate
 
 from src.config.interfaces import IAppConfigManager, IGuildConfigManager
-from src.data import FileManager
-from src.errors import FileError
-from src.schemas import Session
+from src.data.interfaces import IFileManager, IShardedFileManager
+from src.errors import FileError, RequestShedError
+from src.monitoring import LoopStats
+from src.schemas import SchedulerState, Session, SessionSchedule
+from src.schemas.events import (
+    EVENT_MESSAGES,
+    MESSAGE_LIMIT,
+    EventLogEntry,
+    EventType,
+)
+from src.schemas.sessions import SessionFlag
+from src.services.actor import SessionActor
+from src.services.archive import RunArchive
+from src.services.clock import Clock
+from src.services.outbound import OutboundScheduler, Priority
+from src.services.pool import ChannelPool
+from src.tasks.engine import DueEventEngine
+from src.tasks.engine import available as engine_available
+
+T = TypeVar("T")
+
+EVENT_LOG_HEADERS = ["Day", "Type", "Event", "Timestamp"]
 
 
 class NightreignService:
-    """This class contains the Nightreign service."""
+    """
+    This class contains the Nightreign service.
+
+    The sessions of every guild are stored in their own file. A guild is loaded
+    when it becomes active and unloaded once it has no run in progress, and only
+    the files of the guilds whose sessions changed are rewritten on save.
+
+    Every session has an actor, which runs the commands and timer ticks of the
+    session one at a time.
+
+    Every discord request goes through the outbound scheduler. The timer edits go
+    first, then the command responses, then the cosmetic messages and cleanup.
+    When the channel pool is enabled, sessions take a pre-created channel and
+    hand it back when they are closed. Completed runs are recorded in the run
+    archive, when there is one.
+
+    Broken sessions are found through the discord events where possible. The
+    cleanup only visits the sessions from those events and the sessions that have
+    been idle for longer than the session TTL, which are kept in a min-heap.
+    """
 
     def __init__(
         self,
         app_config: IAppConfigManager,
         guild_config: IGuildConfigManager,
+        file: IShardedFileManager,
+        schedule_file: IFileManager,
+        legacy_file: IFileManager | None = None,
+        archive: RunArchive | None = None,
+        clock: Clock | None = None,
     ) -> None:
-        """Initialize the Nightreign service."""
+        """
+        Initialize the Nightreign service.
+
+        Args:
+            app_config: The app config manager.
+            guild_config: The guild config manager.
+            file: The sharded file manager for the sessions.
+            schedule_file: The file manager for the scheduler state.
+            legacy_file: The file manager for the old single sessions file, which is
+                migrated to the sharded files on ready.
+            archive: The archive to record the completed runs in.
+            clock: The clock the runs are timed with, the system clock by default.
+        """
         self.log = logging.getLogger(__name__)
-        self.file = FileManager(file_path="data/sessions.json")
+        self.clock = clock or Clock()
+        self.file = file
+        self.schedule_file = schedule_file
+        self.legacy_file = legacy_file
+        self.archive = archive
         self.data: dict[str, Session] = {}
+        self.guild_sessions: dict[int, set[str]] = {}
+        # The guild of every stored session, loaded or not, so that a session ID
+        # stays taken while its guild is unloaded.
+        self.owners: dict[str, int] = {}
+        # The stored sessions whose ID is held by another guild, they are written
+        # back unchanged on save instead of being loaded.
+        self.conflicts: dict[int, list[Session]] = {}
+        self.changed: set[int] = set()
+        self.activity: dict[str, float] = {}
+        self.deadlines: dict[str, float] = {}
+        self.expiry: list[tuple[float, str]] = []
+        self.expired: set[str] = set()
+        self.actors: dict[str, SessionActor] = {}
+        self.outbound = OutboundScheduler(app_config.get_outbound_concurrency())
+        self.pool = ChannelPool(
+            guild_config, self.outbound, app_config.get_channel_pool_size()
+        )
+        self.engine: DueEventEngine | None = None
+        if app_config.get_event_engine() == "numpy":
+            if engine_available():
+                self.engine = DueEventEngine()
+            else:
+                self.log.warning("NumPy is not installed, using the python engine.")
+        self.started: dict[str, float] = {}
+        self.schedules: dict[str, SessionSchedule] = {}
+        self.save_duration = 0.0
         self.app_config = app_config
         self.guild_config = guild_config
 
-    def on_ready(self) -> None:
-        """Call when the client is ready."""
+    def on_ready(self, guild_ids: Iterable[int] = ()) -> None:
+        """
+        Call when the client is ready.
+
+        Args:
+            guild_ids: The guilds the client is in, their sessions are loaded so
+                that the runs in progress resume.
+        """
         self.file.on_ready()
 
-        self.log.info("Loading sessions into memory...")
-        self.load()
+        self.log.info("Migrating the old sessions file...")
+        self.migrate()
+
+        self.log.info("Indexing sessions and loading them into memory...")
+        stored = self.file.keys()
+        ready = {str(guild_id) for guild_id in guild_ids}
+        for key in sorted(stored):
+            try:
+                sessions = self.read_guild(int(key))
+            except FileError as error:
+                self.log.warning(str(error))
+                continue
+
+            for session in sessions:
+                self.owners.setdefault(session.session_id, int(key))
+            if key in ready:
+                self.load(int(key), sessions)
+
+        self.log.info("Restoring the scheduler state...")
+        self.load_schedules()
+
+        if self.archive:
+            self.archive.on_ready()
 
         self.log.info("Nightreign Service Info:")
-        self.log.info(f"==> File: {self.file.file}")
+        self.log.info(f"==> Directory: {self.file.directory}")
+        self.log.info(f"==> Stored guilds: {len(stored)}")
+        self.log.info(f"==> Loaded guilds: {len(self.guild_sessions)}")
         self.log.info(f"==> Sessions: {len(self.data)}")
+        self.log.info(f"==> Stored sessions: {len(self.owners)}")
+        self.log.info(f"==> Restored schedules: {len(self.schedules)}")
         self.log.info("Nightreign Service is ready.")
 
-    def load(self) -> None:
-        """Load the sessions into memory."""
+    def migrate(self) -> None:
+        """
+        Migrate the sessions stored in the old formats.
+
+        The old single sessions file is split into one file per guild, and the
+        guild files in the old JSON format or in the other storage format are
+        rewritten in the configured one.
+        """
+        codec = self.file.codec
+        for key in self.file.legacy_keys():
+            legacy = self.file.read_legacy(key)
+            self.file.write(
+                key,
+                (
+                    codec.encode_session(Session(**session))
+                    for session in legacy.values()
+                ),
+            )
+
+        for key in self.file.stale_keys():
+            self.file.write(
+                key,
+                (
+                    codec.encode_session(self.file.stale_codec.decode_session(record))
+                    for record in self.file.read_stale(key)
+                ),
+            )
+
+        if not self.legacy_file:
+            return
+
         try:
-            file_data = self.file.read()
+            file_data = self.legacy_file.read()
+        except FileNotFoundError:
+            return
         except Exception as error:
-            self.log.warning(f"Error loading sessions: {error}")
-            self.log.warning("Resetting sessions.")
-            self.data = {}
+            self.log.warning(f"Error migrating sessions: {error}")
             return
 
         if not isinstance(file_data, dict):
             raise FileError("Sessions file is not in the correct format.")
 
-        for session_id, session in file_data.items():
-            self.data[session_id] = Session(**session)
+        shards: dict[int, list[bytes]] = {}
+        for session in file_data.values():
+            shards.setdefault(session["guild_id"], []).append(
+                codec.encode_session(Session(**session))
+            )
+
+        for guild_id, shard in shards.items():
+            self.file.write(str(guild_id), shard)
+
+        self.legacy_file.delete()
+        self.log.info(f"==> Migrated sessions: {len(file_data)}")
+
+    def activate(self, guild_id: int) -> None:
+        """
+        Load the sessions of a guild into memory, if they are not loaded yet.
+
+        Args:
+            guild_id: The guild id.
+
+        Raises:
+            FileError: If the sessions of the guild can not be read, the guild is
+                left unloaded so its file is not overwritten.
+        """
+        if guild_id in self.guild_sessions:
+            return
+
+        self.load(guild_id, self.read_guild(guild_id))
+
+    def read_guild(self, guild_id: int) -> list[Session]:
+        """
+        Read the stored sessions of a guild.
+
+        Args:
+            guild_id: The guild id.
+
+        Returns:
+            The sessions, empty if the guild has no file.
+
+        Raises:
+            FileError: If the file of the guild can not be read.
+        """
+        try:
+            return [
+                self.file.codec.decode_session(record)
+                for record in self.file.read(str(guild_id))
+            ]
+        except FileNotFoundError:
+            return []
+        except Exception as error:
+            raise FileError(
+                f"Error loading sessions of guild {guild_id}: {error}"
+            ) from error
+
+    def load(self, guild_id: int, sessions: list[Session]) -> None:
+        """
+        Load the stored sessions of a guild into memory.
+
+        A session whose ID is held by another guild is kept aside and written back
+        on save, so it is never lost.
+
+        Args:
+            guild_id: The guild id.
+            sessions: The stored sessions of the guild.
+        """
+        self.guild_sessions[guild_id] = set()
+        for session in sessions:
+            session_id = session.session_id
+            owner = self.owners.setdefault(session_id, guild_id)
+            if owner != guild_id or session_id in self.data:
+                self.log.warning(
+                    f"Session {session_id} of guild {guild_id} is held by guild "
+                    f"{owner}, keeping it stored without loading it."
+                )
+                self.conflicts.setdefault(guild_id, []).append(session)
+                continue
+
+            self.data[session_id] = session
+            self.guild_sessions[guild_id].add(session_id)
+            self.schedule_expiry(session_id)
+            self.sync_engine(session)
+
+    def evict(self) -> None:
+        """Unload the guilds that have no run in progress and no unsaved changes."""
+        for guild_id, session_ids in list(self.guild_sessions.items()):
+            if guild_id in self.changed:
+                continue
+
+            if any(self.data[session_id].active for session_id in session_ids):
+                continue
+
+            for session_id in session_ids:
+                self.data.pop(session_id)
+                self.activity.pop(session_id, None)
+                self.deadlines.pop(session_id, None)
+                if self.engine is not None:
+                    self.engine.remove(session_id)
+            self.guild_sessions.pop(guild_id)
+            self.conflicts.pop(guild_id, None)
+
+    def add_session(self, session: Session) -> None:
+        """
+        Add a session to its guild.
+
+        Args:
+            session: The session.
+        """
+        self.data[session.session_id] = session
+        self.owners[session.session_id] = session.guild_id
+        self.guild_sessions.setdefault(session.guild_id, set()).add(session.session_id)
+        self.changed.add(session.guild_id)
+        self.schedule_expiry(session.session_id)
+        self.sync_engine(session)
+
+    def remove_session(self, session_id: str) -> None:
+        """
+        Remove a session and its run state.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        session = self.data.pop(session_id, None)
+        self.started.pop(session_id, None)
+        self.schedules.pop(session_id, None)
+        self.activity.pop(session_id, None)
+        self.deadlines.pop(session_id, None)
+        self.expired.discard(session_id)
+        if self.engine is not None:
+            self.engine.remove(session_id)
+        if not session:
+            return
+
+        if self.owners.get(session_id) == session.guild_id:
+            self.owners.pop(session_id)
+        self.guild_sessions.get(session.guild_id, set()).discard(session_id)
+        self.changed.add(session.guild_id)
+
+    def mark_changed(self, session: Session) -> None:
+        """
+        Mark the guild of a session to be saved and record the activity.
+
+        Args:
+            session: The session that changed.
+        """
+        if session.session_id in self.data:
+            self.changed.add(session.guild_id)
+            self.activity[session.session_id] = self.clock.monotonic()
+
+    def actor(self, session_id: str) -> SessionActor:
+        """
+        Get the actor of a session.
+
+        Args:
+            session_id: The ID of the session.
+
+        Returns:
+            The actor, a new one if the session has none yet.
+        """
+        actor = self.actors.get(session_id)
+        if not actor:
+            actor = SessionActor(session_id)
+            self.actors[session_id] = actor
+        return actor
+
+    async def ask(self, session_id: str, handler: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a handler on the actor of a session and wait for its result.
+
+        Args:
+            session_id: The ID of the session.
+            handler: Called to create the coroutine once it is the handler's turn.
+
+        Returns:
+            The result of the handler.
+        """
+        if not session_id:
+            return await handler()
+        return await self.actor(session_id).ask(handler)
+
+    async def wait_idle(self) -> None:
+        """Wait until the actors of every session processed their mailbox."""
+        for actor in list(self.actors.values()):
+            await actor.wait()
+
+    @staticmethod
+    def channel_session_id(interaction: Interaction) -> str:
+        """
+        Get the ID of the session of the channel an interaction was used in.
+
+        Args:
+            interaction: The interaction object.
+
+        Returns:
+            The ID of the session, empty if the channel is not a session channel.
+        """
+        channel = interaction.channel
+        if not isinstance(channel, TextChannel):
+            return ""
+        return channel.name.split("-")[-1]
+
+    def sync_engine(self, session: Session) -> None:
+        """
+        Store the current state of a session in the due-event engine, if it is used.
+
+        Args:
+            session: The session.
+        """
+        if self.engine is None or self.data.get(session.session_id) is not session:
+            return
+
+        if not session.active or session.day == 0:
+            self.engine.remove(session.session_id)
+            return
+
+        self.engine.sync(
+            session,
+            started=self.clock.monotonic() - self.elapsed(session),
+            retry=bool(session.outbox),
+        )
+
+    def schedule_expiry(self, session_id: str) -> None:
+        """
+        Schedule a session to be checked once it has been idle for the session TTL.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        now = self.clock.monotonic()
+        deadline = now + self.app_config.get_session_ttl()
+        self.activity[session_id] = now
+        self.deadlines[session_id] = deadline
+        heapq.heappush(self.expiry, (deadline, session_id))
+
+    def expire(self, session_id: str) -> None:
+        """
+        Mark a session to be checked by the next cleanup.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        if session_id in self.data:
+            self.expired.add(session_id)
+
+    def pop_expired(self) -> set[str]:
+        """
+        Take the sessions that are due to be checked.
+
+        Entries of sessions that were removed or rescheduled are skipped, and
+        sessions that had activity since they were scheduled are pushed back with
+        a deadline based on that activity.
+
+        Returns:
+            The IDs of the sessions to check.
+        """
+        expired = self.expired
+        self.expired = set()
+        now = self.clock.monotonic()
+        ttl = self.app_config.get_session_ttl()
+        while self.expiry and self.expiry[0][0] <= now:
+            deadline, session_id = heapq.heappop(self.expiry)
+            if self.deadlines.get(session_id) != deadline:
+                continue
+
+            active_until = self.activity.get(session_id, 0.0) + ttl
+            if active_until > now:
+                self.deadlines[session_id] = active_until
+                heapq.heappush(self.expiry, (active_until, session_id))
+                continue
+
+            self.deadlines.pop(session_id)
+            expired.add(session_id)
+        return expired
+
+    def channel_deleted(self, guild_id: int, channel_id: int, name: str) -> None:
+        """
+        Remove the session of a deleted channel.
+
+        Args:
+            guild_id: The ID of the guild of the channel.
+            channel_id: The ID of the channel.
+            name: The name of the channel.
+        """
+        if not name.startswith("nightreign-"):
+            return
+
+        self.activate(guild_id)
+        session = self.get(name.split("-")[-1])
+        if session and session.channel_id == channel_id:
+            self.log.info(f"Channel of session {session.session_id} was deleted.")
+            self.remove_session(session.session_id)
+
+    def channel_moved(self, guild_id: int, channel_id: int, name: str) -> None:
+        """
+        Check the session of a channel that moved to another category.
+
+        Args:
+            guild_id: The ID of the guild of the channel.
+            channel_id: The ID of the channel.
+            name: The name of the channel.
+        """
+        if not name.startswith("nightreign-"):
+            return
+
+        self.activate(guild_id)
+        session = self.get(name.split("-")[-1])
+        if session and session.channel_id == channel_id:
+            self.expire(session.session_id)
+
+    def guild_removed(self, guild_id: int) -> None:
+        """
+        Remove the sessions of a guild the client was removed from.
+
+        Args:
+            guild_id: The ID of the guild.
+        """
+        self.activate(guild_id)
+        for session_id in list(self.guild_sessions[guild_id]):
+            self.remove_session(session_id)
+        if self.conflicts.pop(guild_id, None):
+            self.changed.add(guild_id)
+        self.log.info(f"Removed the sessions of guild {guild_id}.")
+
+    def member_removed(self, guild_id: int, user_id: int) -> None:
+        """
+        Remove a member that left a guild from its sessions.
+
+        The guilds that are not loaded are skipped, they only hold idle sessions
+        and reading them on every member that leaves is not worth it.
+
+        Args:
+            guild_id: The ID of the guild.
+            user_id: The ID of the member.
+        """
+        session_ids = self.guild_sessions.get(guild_id)
+        if not session_ids:
+            return
+
+        sessions = [
+            self.data[session_id]
+            for session_id in session_ids
+            if user_id in self.data[session_id].members
+        ]
+        for session in sessions:
+            session.members.remove(user_id)
+            self.mark_changed(session)
+            if not session.members:
+                self.expire(session.session_id)
 
     def save(self) -> None:
-        """Save the sessions to the file."""
-        file_data = {}
-        for session_id, session in self.data.items():
-            file_data[session_id] = session.model_dump()
-        self.file.write(file_data)
-
-    async def clean(self, client: Client) -> None:
-        """Clean up the sessions."""
-        copy = self.data.copy()
-        for session_id, session in copy.items():
+        """Save the sessions of the changed guilds, one file per guild."""
+        started = perf_counter()
+        codec = self.file.codec
+        for guild_id in self.changed:
+            session_ids = self.guild_sessions.get(guild_id, set())
+            conflicts = self.conflicts.get(guild_id, [])
+            if not session_ids and not conflicts:
+                self.file.delete(str(guild_id))
+                continue
+
+            self.file.write(
+                str(guild_id),
+                (
+                    codec.encode_session(session)
+                    for session in chain(
+                        (self.data[session_id] for session_id in session_ids),
+                        conflicts,
+                    )
+                ),
+            )
+        self.changed.clear()
+        if self.archive:
+            self.archive.save()
+        self.save_duration = perf_counter() - started
+
+    def load_schedules(self) -> None:
+        """
+        Restore the scheduler state that was saved on shutdown.
+
+        The state is only valid for the sessions it was saved with, so the file is
+        deleted once it has been restored.
+        """
+        try:
+            file_data = self.schedule_file.read()
+        except FileNotFoundError:
+            return
+        except Exception as error:
+            self.log.warning(f"Error loading the scheduler state: {error}")
+            return
+
+        if not isinstance(file_data, dict):
+            raise FileError("Scheduler state file is not in the correct format.")
+
+        state = SchedulerState(**file_data)
+        for session_id, schedule in state.sessions.items():
+            session = self.data.get(session_id)
+            if not session or not session.active:
+                continue
+
+            if session.event_log_id != schedule.event_log_id:
+                continue
+
+            self.schedules[session_id] = schedule
+            self.sync_engine(session)
+
+        self.schedule_file.delete()
+
+    def save_schedules(self) -> None:
+        """Save the scheduler state of the sessions with a run in progress."""
+        state = SchedulerState(
+            saved_at=self.clock.time(),
+            sessions={
+                session_id: schedule
+                for session_id, schedule in self.schedules.items()
+                if session_id in self.data and self.data[session_id].active
+            },
+        )
+        self.schedule_file.write(state.model_dump())
+
+    def get_schedule(self, session: Session) -> SessionSchedule:
+        """
+        Get the scheduler state of a session.
+
+        Args:
+            session: The session.
+
+        Returns:
+            The scheduler state, a new one if the session has none yet.
+        """
+        schedule = self.schedules.get(session.session_id)
+        if not schedule:
+            schedule = SessionSchedule(
+                session_id=session.session_id,
+                event_log_id=session.event_log_id,
+            )
+            self.schedules[session.session_id] = schedule
+        return schedule
+
+    def render_event_log(
+        self, session: Session, outbox: Sequence[EventLogEntry] | None = None
+    ) -> str:
+        """
+        Render the event log of a session as message content.
+
+        The compact records are only expanded into text here. The events in the
+        outbox are rendered after the event log, as they are about to be added.
+
+        Args:
+            session: The session.
+            outbox: The events of the outbox to render, all of them by default.
+
+        Returns:
+            The content of the event log message.
+        """
+        from tabulate import tabulate
+
+        rows = [
+            [
+                str(entry.day),
+                entry.type.name,
+                EVENT_MESSAGES.get(entry.code, entry.code),
+                datetime.fromtimestamp(entry.timestamp).isoformat(),
+            ]
+            for entry in (
+                *session.event_log,
+                *(session.outbox if outbox is None else outbox),
+            )
+        ]
+        table = tabulate(
+            rows,
+            headers=EVENT_LOG_HEADERS,
+            tablefmt="rounded_grid",
+        )
+        return f"```\n{table}\n```"
+
+    async def clean(self, client: Client, stats: LoopStats | None = None) -> None:
+        """
+        Clean up the sessions that are due to be checked.
+
+        Args:
+            client: The discord client.
+            stats: The loop stats to record the visited sessions and REST calls on.
+        """
+        for session_id in self.pop_expired():
+            session = self.data.get(session_id)
+            if not session:
+                continue
+
+            if stats:
+                stats.record_session()
+
             guild = client.get_guild(session.guild_id)
             if not guild:
-                self.data.pop(session_id)
+                self.remove_session(session_id)
                 continue
 
             channel = guild.get_channel(session.channel_id)
             if not channel:
-                self.data.pop(session_id)
+                self.remove_session(session_id)
                 continue
 
             guild_category = self.guild_config.get_config(
                 guild.id
             ).nightreign_category_id
             category = channel.category
-            if not category or category.id != guild_category:
-                await channel.delete()
-                self.data.pop(session_id)
+            if category and category.id != guild_category:
+                category = None
+
+            if not category or len(session.members) == 0:
+                try:
+                    if category and isinstance(channel, TextChannel):
+                        await self.pool.release(channel, Priority.CLEANUP)
+                    else:
+                        await self.outbound.submit(Priority.CLEANUP, channel.delete)
+                except RequestShedError:
+                    self.expire(session_id)
+                    continue
+
+                if stats:
+                    stats.record_rest_call()
+                self.remove_session(session_id)
                 continue
 
-            if len(session.members) == 0:
-                await channel.delete()
-                self.data.pop(session_id)
+            self.schedule_expiry(session_id)
+
+        self.evict()
+        for session_id in self.actors.keys() - self.data.keys():
+            if not self.actors[session_id].busy():
+                self.actors.pop(session_id)
+
+    async def notify(self, channel: TextChannel, content: str) -> None:
+        """
+        Send a cosmetic message to a session channel, unless it is shed under load.
+
+        Args:
+            channel: The channel of the session.
+            content: The content of the message.
+        """
+        try:
+            await self.outbound.submit(Priority.COSMETIC, lambda: channel.send(content))
+        except RequestShedError as error:
+            self.log.warning(f"Skipped a message to channel {channel.id}: {error}")
 
     async def create(
         self,
@@ -107,45 +759,66 @@ class NightreignService:
     ) -> bool:
         """Create a new session."""
         user = interaction.user
+        self.activate(guild.id)
         guild_config = self.guild_config.get_config(guild.id)
         category = guild.get_channel(guild_config.nightreign_category_id)
 
         if not category or not isinstance(category, CategoryChannel):
             return False
 
-        if session_id in self.data:
+        if session_id in self.owners:
             return False
 
-        channel = await guild.create_text_channel(
-            name=f"nightreign-{session_id}",
-            category=category,
-            overwrites={
-                guild.default_role: PermissionOverwrite(read_messages=False),
-                guild.me: PermissionOverwrite(read_messages=True, send_messages=True),
-                user: PermissionOverwrite(read_messages=True, send_messages=True),  # type: ignore
-            },
+        overwrites = {
+            guild.default_role: PermissionOverwrite(read_messages=False),
+            guild.me: PermissionOverwrite(read_messages=True, send_messages=True),
+            user: PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+        name = f"nightreign-{session_id}"
+        pooled = self.pool.acquire(guild, category)
+        if pooled:
+            try:
+                await self.outbound.submit(
+                    Priority.COMMAND,
+                    lambda: pooled.edit(name=name, overwrites=overwrites),  # type: ignore
+                )
+            except Exception:
+                self.pool.restore(pooled)
+                raise
+            channel = pooled
+        else:
+            channel = await self.outbound.submit(
+                Priority.COMMAND,
+                lambda: guild.create_text_channel(
+                    name=name,
+                    category=category,
+                    overwrites=overwrites,  # type: ignore
+                ),
+            )
+
+        self.add_session(
+            Session(
+                session_id=session_id,
+                session_pw=session_pw,
+                privacy=privacy,
+                members=[user.id],
+                channel_id=channel.id,
+                guild_id=guild.id,
+                active=False,
+                day=0,
+                timestamp=0,
+                event_log=deque(),
+                event_log_id=0,
+            )
         )
 
-        self.data[session_id] = Session(
-            session_id=session_id,
-            session_pw=session_pw,
-            privacy=privacy,
-            members=[user.id],
-            channel_id=channel.id,
-            guild_id=guild.id,
-            active=False,
-            day=0,
-            timestamp=0,
-            event_log=[],
-            event_log_id=0,
-        )
-
-        await channel.send(
+        await self.notify(
+            channel,
             "Welcome to the Nightreign session!\n"
             f"ID: {session_id}\n"
             f"Privacy: {privacy}\n"
             f"Channel: {channel.mention}\n"
-            f"Members: [{user.mention}]"
+            f"Members: [{user.mention}]",
         )
 
         return True
@@ -163,6 +836,7 @@ class NightreignService:
         Returns:
             True if the session was joined, otherwise False.
         """
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False
@@ -186,20 +860,25 @@ class NightreignService:
         if not isinstance(channel, TextChannel):
             return False
 
-        await channel.set_permissions(
-            interaction.user,  # type: ignore
-            read_messages=True,
-            send_messages=True,
+        await self.outbound.submit(
+            Priority.COMMAND,
+            lambda: channel.set_permissions(
+                interaction.user,  # type: ignore
+                read_messages=True,
+                send_messages=True,
+            ),
         )
 
         session.members.append(interaction.user.id)
+        self.mark_changed(session)
 
         members = [guild.get_member(member) for member in session.members]
         member_names = [member.name for member in members if member]
 
-        await channel.send(
+        await self.notify(
+            channel,
             f"{interaction.user.mention} joined the session.\n"
-            f"Members: {', '.join(member_names)}"
+            f"Members: {', '.join(member_names)}",
         )
 
         return True
@@ -227,6 +906,7 @@ class NightreignService:
             return False, ""
 
         session_id = channel.name.split("-")[-1]
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False, ""
@@ -247,21 +927,26 @@ class NightreignService:
         if not member:
             return False, ""
 
-        await channel.set_permissions(
-            member,
-            read_messages=True,
-            send_messages=True,
+        await self.outbound.submit(
+            Priority.COMMAND,
+            lambda: channel.set_permissions(
+                member,
+                read_messages=True,
+                send_messages=True,
+            ),
         )
 
         members = [guild.get_member(member) for member in session.members]
         member_names = [member.name for member in members if member]
 
-        await channel.send(
+        await self.notify(
+            channel,
             f"{member.mention} added to the session.\n"
-            f"Members: {', '.join(member_names)}"
+            f"Members: {', '.join(member_names)}",
         )
 
         session.members.append(member.id)
+        self.mark_changed(session)
 
         return True, member.mention
 
@@ -284,6 +969,7 @@ class NightreignService:
             return False, ""
 
         session_id = channel.name.split("-")[-1]
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False, ""
@@ -304,13 +990,19 @@ class NightreignService:
         if not isinstance(channel, TextChannel):
             return False, ""
 
-        await channel.set_permissions(
-            interaction.user,  # type: ignore
-            read_messages=False,
-            send_messages=False,
+        await self.outbound.submit(
+            Priority.COMMAND,
+            lambda: channel.set_permissions(
+                interaction.user,  # type: ignore
+                read_messages=False,
+                send_messages=False,
+            ),
         )
 
         session.members.remove(interaction.user.id)
+        self.mark_changed(session)
+        if not session.members:
+            self.expire(session_id)
 
         return True, session.session_id
 
@@ -336,6 +1028,7 @@ class NightreignService:
             return False, ""
 
         session_id = channel.name.split("-")[-1]
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False, ""
@@ -353,13 +1046,19 @@ class NightreignService:
         if not member:
             return False, ""
 
-        await channel.set_permissions(
-            member,
-            read_messages=False,
-            send_messages=False,
+        await self.outbound.submit(
+            Priority.COMMAND,
+            lambda: channel.set_permissions(
+                member,
+                read_messages=False,
+                send_messages=False,
+            ),
         )
 
         session.members.remove(user_id)
+        self.mark_changed(session)
+        if not session.members:
+            self.expire(session_id)
 
         return True, member.mention
 
@@ -370,9 +1069,11 @@ class NightreignService:
         Args:
             guild: The guild object.
         """
+        self.activate(guild.id)
         sessions = []
-        for session in self.data.values():
-            if session.guild_id != guild.id or session.privacy == "private":
+        for session_id in sorted(self.guild_sessions[guild.id]):
+            session = self.data[session_id]
+            if session.privacy == "private":
                 continue
 
             members = [guild.get_member(member) for member in session.members]
@@ -382,10 +1083,92 @@ class NightreignService:
         if not sessions:
             return "No sessions found."
 
+        from tabulate import tabulate
+
         return tabulate(
             sessions, headers=["Session ID", "Members"], tablefmt="rounded_grid"
         )
 
+    def stats(self, guild: Guild, user_id: int) -> str:
+        """
+        Show the run statistics of a guild.
+
+        Args:
+            guild: The guild object.
+            user_id: The ID of the user asking for the statistics.
+
+        Returns:
+            The statistics.
+        """
+        if not self.archive:
+            return "Run history is disabled."
+
+        stats = self.archive.guild_stats(guild.id)
+        if not stats.runs:
+            return "No completed runs yet."
+
+        from tabulate import tabulate
+
+        today = self.archive.date(self.clock.time())
+        bosses = tabulate(
+            [
+                [boss, stats.bosses[boss]]
+                for boss in sorted(
+                    stats.bosses, key=stats.bosses.__getitem__, reverse=True
+                )
+            ],
+            headers=["Boss", "Runs"],
+            tablefmt="rounded_grid",
+        )
+        return (
+            f"Completed runs: {stats.runs}\n"
+            f"Today: {stats.dates.get(today, 0)}\n"
+            f"Yours: {stats.players.get(user_id, 0)}\n"
+            f"{bosses}"
+        )
+
+    def elapsed(self, session: Session) -> float:
+        """
+        Get the time elapsed since the run of a session started.
+
+        The elapsed time is measured on the monotonic clock, so it does not jump
+        along with the wall clock. The wall clock timestamp of the session is only
+        used to recover the start of a run that was started before a restart.
+
+        Args:
+            session: The session with a run in progress.
+
+        Returns:
+            The elapsed time in seconds.
+        """
+        started = self.started.get(session.session_id)
+        if started is None:
+            started = self.clock.monotonic() - max(
+                0.0, self.clock.time() - session.timestamp
+            )
+            self.started[session.session_id] = started
+
+        return self.clock.monotonic() - started
+
+    def stop(self, session: Session) -> None:
+        """
+        Mark the run of a session as finished and record it in the run archive.
+
+        Args:
+            session: The session.
+        """
+        if self.archive:
+            self.archive.record(session, self.clock.time())
+
+        session.active = False
+        session.timestamp = 0
+        session.flags = SessionFlag()
+        session.outbox.clear()
+        self.mark_changed(session)
+        self.started.pop(session.session_id, None)
+        self.schedules.pop(session.session_id, None)
+        self.sync_engine(session)
+
     def get(self, session_id: str) -> Session | None:
         """
         Get a session by ID.
@@ -420,6 +1203,7 @@ class NightreignService:
             return False
 
         session_id = channel.name.split("-")[-1]
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False
@@ -434,22 +1218,32 @@ class NightreignService:
             return False
 
         session.day = day
-        session.timestamp = datetime.now().timestamp()
+        session.timestamp = self.clock.time()
+        session.outbox.clear()
+        self.started[session_id] = self.clock.monotonic()
         session.active = True
-        await interaction.response.send_message(
-            "Starting the fight against the nightlords!\nGood luck and have fun!\n"
-        )
+        self.mark_changed(session)
 
         session.event_log.append(
-            [str(day), "INFO", "Started the run", datetime.now().isoformat()]
+            EventLogEntry(
+                code="RUN_STARTED",
+                type=EventType.INFO,
+                day=day,
+                timestamp=self.clock.time(),
+            )
         )
-        table = tabulate(
-            session.event_log,
-            headers=["Day", "Type", "Event", "Timestamp"],
-            tablefmt="rounded_grid",
+        content = self.render_event_log(session)
+        while len(content) > MESSAGE_LIMIT and len(session.event_log) > 1:
+            session.event_log.popleft()
+            content = self.render_event_log(session)
+        message = await self.outbound.submit(
+            Priority.TIMER, lambda: channel.send(content)
         )
-        message = await channel.send(f"```\n{table}\n```")
         session.event_log_id = message.id
+        self.schedules[session_id] = SessionSchedule(
+            session_id=session_id, event_log_id=message.id
+        )
+        self.sync_engine(session)
         return True
 
     async def close(self, interaction: Interaction, guild: Guild) -> tuple[bool, str]:
@@ -468,6 +1262,7 @@ class NightreignService:
             return False, ""
 
         session_id = channel.name.split("-")[-1]
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False, ""
@@ -481,8 +1276,8 @@ class NightreignService:
         if interaction.user.id not in session.members:
             return False, ""
 
-        await channel.delete()
-        self.data.pop(session_id)
+        await self.pool.release(channel, Priority.COMMAND)
+        self.remove_session(session_id)
 
         return True, session_id
 
@@ -517,6 +1312,7 @@ class NightreignService:
             return False
 
         session_id = channel.name.split("-")[-1]
+        self.activate(guild.id)
         session = self.get(session_id)
         if not session:
             return False
@@ -531,4 +1327,9 @@ class NightreignService:
             return False
 
         session.boss = boss
+        self.mark_changed(session)
+        schedule = self.schedules.get(session_id)
+        if schedule:
+            schedule.next_event_time = None
+        self.sync_engine(session)
         return True
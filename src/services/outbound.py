@@ -0,0 +1,103 @@
+"""This module contains the priority scheduler for the outbound discord requests."""
+
+import asyncio
+import heapq
+import logging
+from collections import Counter
+from enum import IntEnum
+from itertools import count
+from typing import Awaitable, Callable, TypeVar
+
+from src.errors import RequestShedError
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """The priority class of an outbound request, the lowest value goes first."""
+
+    TIMER = 0
+    COMMAND = 1
+    COSMETIC = 2
+    CLEANUP = 3
+
+
+class OutboundScheduler:
+    """
+    This limits the outbound discord requests in flight and orders the rest.
+
+    Every request waits for a free slot, and the slots are handed out by priority,
+    so a round closing warning never waits behind a pile of cleanup deletes. Once
+    too many requests are waiting, the cosmetic and cleanup requests are shed
+    instead of queued, their callers retry them later or merge them into the
+    next request.
+    """
+
+    def __init__(self, concurrency: int = 16, shed_after: int = 100) -> None:
+        """
+        Initialize the outbound scheduler.
+
+        Args:
+            concurrency: The number of requests that can be in flight at once.
+            shed_after: The number of waiting requests from which on the cosmetic
+                and cleanup requests are shed.
+        """
+        self.log = logging.getLogger(__name__)
+        self.concurrency = concurrency
+        self.shed_after = shed_after
+        self.running = 0
+        self.waiting: list[tuple[Priority, int, asyncio.Future[None]]] = []
+        self.order = count()
+        self.queued: Counter[Priority] = Counter()
+        self.shed: Counter[Priority] = Counter()
+
+    async def submit(self, priority: Priority, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a request once it is its turn.
+
+        Args:
+            priority: The priority class of the request.
+            call: Called to create the coroutine of the request.
+
+        Returns:
+            The result of the request.
+
+        Raises:
+            RequestShedError: If the request is cosmetic or cleanup and too many
+                requests are waiting.
+        """
+        if self.running >= self.concurrency or self.waiting:
+            if priority >= Priority.COSMETIC and len(self.waiting) >= self.shed_after:
+                self.shed[priority] += 1
+                raise RequestShedError(
+                    f"Shed a {priority.name} request, {len(self.waiting)} waiting."
+                )
+
+            slot: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            heapq.heappush(self.waiting, (priority, next(self.order), slot))
+            self.queued[priority] += 1
+            try:
+                await slot
+            except asyncio.CancelledError:
+                if slot.done() and not slot.cancelled():
+                    self.release()
+                raise
+        else:
+            self.running += 1
+
+        try:
+            return await call()
+        finally:
+            self.release()
+
+    def release(self) -> None:
+        """Free the slot of a finished request and hand it to the next in line."""
+        self.running -= 1
+        while self.waiting and self.running < self.concurrency:
+            priority, _, slot = heapq.heappop(self.waiting)
+            self.queued[priority] -= 1
+            if slot.done():
+                continue
+
+            self.running += 1
+            slot.set_result(None)
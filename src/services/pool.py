@@ -0,0 +1,242 @@
+"""This module contains the pool of pre-created session channels."""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Iterable
+
+from discord import (
+    CategoryChannel,
+    Guild,
+    Member,
+    Object,
+    PermissionOverwrite,
+    Role,
+    TextChannel,
+)
+
+from src.config.interfaces import IGuildConfigManager
+from src.errors import RequestShedError
+from src.services.outbound import OutboundScheduler, Priority
+
+POOLED_CHANNEL_NAME = "nightreign-pooled"
+# The most messages a released channel is emptied of, one with more is deleted.
+PURGE_LIMIT = 100
+
+
+class ChannelPool:
+    """
+    This keeps hidden channels ready in the nightreign category of every guild.
+
+    A new session takes a pooled channel and only has to rename it and set its
+    overwrites, which is a single edit instead of a channel create. A closed
+    session hands its channel back, it is hidden and emptied again, and only
+    deleted when the pool is full. The pooled channel IDs are stored in the guild
+    config, so the pool survives a restart, and the pool is topped up in the
+    background with cleanup priority, on ready and whenever a channel is taken.
+    """
+
+    def __init__(
+        self,
+        guild_config: IGuildConfigManager,
+        outbound: OutboundScheduler,
+        size: int,
+    ) -> None:
+        """
+        Initialize the channel pool.
+
+        Args:
+            guild_config: The guild config manager, which stores the pools.
+            outbound: The scheduler to send the discord requests through.
+            size: The number of channels to keep ready per guild, 0 to disable.
+        """
+        self.log = logging.getLogger(__name__)
+        self.guild_config = guild_config
+        self.outbound = outbound
+        self.size = size
+        self.tasks: dict[int, asyncio.Task[None]] = {}
+        self.returning: Counter[int] = Counter()
+
+    @staticmethod
+    def hidden(guild: Guild) -> dict[Role | Member | Object, PermissionOverwrite]:
+        """
+        Get the overwrites of an idle pooled channel.
+
+        Args:
+            guild: The guild of the channel.
+
+        Returns:
+            The overwrites, which hide the channel from everyone but the bot.
+        """
+        return {
+            guild.default_role: PermissionOverwrite(read_messages=False),
+            guild.me: PermissionOverwrite(read_messages=True, send_messages=True),
+        }
+
+    def acquire(self, guild: Guild, category: CategoryChannel) -> TextChannel | None:
+        """
+        Take the longest idle pooled channel of a guild and top the pool up.
+
+        Channels that were deleted or moved out of the category are dropped.
+
+        Args:
+            guild: The guild.
+            category: The nightreign category of the guild.
+
+        Returns:
+            The pooled channel, None if the pool is disabled or empty.
+        """
+        if not self.size:
+            return None
+
+        pooled = list(self.guild_config.get_config(guild.id).pooled_channel_ids)
+        channel = None
+        while pooled and channel is None:
+            candidate = guild.get_channel(pooled.pop(0))
+            if (
+                isinstance(candidate, TextChannel)
+                and candidate.category_id == category.id
+            ):
+                channel = candidate
+
+        self.guild_config.set_pool(guild.id, pooled)
+        self.fill(guild, category)
+        return channel
+
+    async def release(self, channel: TextChannel, priority: Priority) -> None:
+        """
+        Hand the channel of a closed session back to the pool, or delete it.
+
+        The channel is hidden and renamed before it is emptied, so the old members
+        never see it again. It is deleted instead when the pool is disabled or full,
+        when it can not be reset, or when it holds more messages than are worth
+        deleting one request at a time.
+
+        Args:
+            channel: The channel of the closed session.
+            priority: The priority to send the requests with.
+        """
+        guild = channel.guild
+        if self.size and self.free(guild.id) > 0:
+            self.returning[guild.id] += 1
+            try:
+                await self.outbound.submit(
+                    priority,
+                    lambda: channel.edit(
+                        name=POOLED_CHANNEL_NAME, overwrites=self.hidden(guild)
+                    ),
+                )
+                deleted = await self.outbound.submit(
+                    priority, lambda: channel.purge(limit=PURGE_LIMIT)
+                )
+            except RequestShedError:
+                raise
+            except Exception as error:
+                self.log.warning(f"Could not reset channel {channel.id}: {error}")
+            else:
+                if len(deleted) < PURGE_LIMIT:
+                    pooled = self.guild_config.get_config(guild.id).pooled_channel_ids
+                    self.guild_config.set_pool(guild.id, [*pooled, channel.id])
+                    return
+
+                self.log.info(
+                    f"Channel {channel.id} has too many messages to empty, deleting it."
+                )
+            finally:
+                self.returning[guild.id] -= 1
+
+        await self.outbound.submit(priority, channel.delete)
+
+    def restore(self, channel: TextChannel) -> None:
+        """
+        Hand a channel that could not be set up back to the front of the pool.
+
+        The channel is still hidden, since the edit that would have set it up
+        failed. The pool may be one over its size until the next release, which
+        deletes the channel it hands back instead.
+
+        Args:
+            channel: The pooled channel.
+        """
+        guild = channel.guild
+        pooled = self.guild_config.get_config(guild.id).pooled_channel_ids
+        self.guild_config.set_pool(guild.id, [channel.id, *pooled])
+
+    def free(self, guild_id: int) -> int:
+        """
+        Get the number of channels the pool of a guild is short.
+
+        Channels that are being handed back count as pooled already.
+
+        Args:
+            guild_id: The ID of the guild.
+
+        Returns:
+            The number of free spots in the pool.
+        """
+        pooled = self.guild_config.get_config(guild_id).pooled_channel_ids
+        return self.size - len(pooled) - self.returning[guild_id]
+
+    def fill_guilds(self, guilds: Iterable[Guild]) -> None:
+        """
+        Top the pools of the configured guilds up in the background.
+
+        Args:
+            guilds: The guilds the client is in.
+        """
+        if not self.size:
+            return
+
+        for guild in guilds:
+            try:
+                guild_config = self.guild_config.get_config(guild.id)
+            except KeyError:
+                continue
+
+            category = guild.get_channel(guild_config.nightreign_category_id)
+            if isinstance(category, CategoryChannel):
+                self.fill(guild, category)
+
+    def fill(self, guild: Guild, category: CategoryChannel) -> None:
+        """
+        Top the pool of a guild up in the background, if it is not already.
+
+        Args:
+            guild: The guild.
+            category: The nightreign category of the guild.
+        """
+        task = self.tasks.get(guild.id)
+        if task and not task.done():
+            return
+
+        self.tasks[guild.id] = asyncio.create_task(self.refill(guild, category))
+
+    async def refill(self, guild: Guild, category: CategoryChannel) -> None:
+        """
+        Create hidden channels until the pool of a guild is full.
+
+        Args:
+            guild: The guild.
+            category: The nightreign category of the guild.
+        """
+        try:
+            while self.free(guild.id) > 0:
+                channel = await self.outbound.submit(
+                    Priority.CLEANUP,
+                    lambda: guild.create_text_channel(
+                        name=POOLED_CHANNEL_NAME,
+                        category=category,
+                        overwrites=self.hidden(guild),
+                    ),
+                )
+                pooled = self.guild_config.get_config(guild.id).pooled_channel_ids
+                self.guild_config.set_pool(guild.id, [*pooled, channel.id])
+        except Exception as error:
+            self.log.warning(f"Could not fill the channel pool of {guild.id}: {error}")
+        finally:
+            self.tasks.pop(guild.id, None)
+
+    async def wait(self) -> None:
+        """Wait until every pool is topped up."""
+        while self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
@@ -0,0 +1,204 @@
+"""
+This module contains the vectorized due-event engine.
+
+The engine keeps the start, day, boss and fired events of every session with a
+run in progress in parallel NumPy arrays. A tick finds the sessions with due
+events in a single pass over those arrays, instead of walking every session and
+event in Python. NumPy is optional, the engine is only created when it is
+installed and enabled with EVENT_ENGINE=numpy.
+"""
+
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+
+from src.schemas.events import EVENT_CONFIG
+from src.schemas.sessions import Session
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+EVENTS = list(EVENT_CONFIG)
+BOSS_CODES = {
+    boss: code
+    for code, boss in enumerate(
+        sorted({config["boss"] for config in EVENT_CONFIG.values() if config["boss"]}),
+        start=1,
+    )
+}
+DAYS = (0, 1, 2)
+
+
+def available() -> bool:
+    """
+    Check whether NumPy is installed.
+
+    Returns:
+        True if the engine can be used, otherwise False.
+    """
+    return np is not None
+
+
+class DueEventEngine:
+    """This finds the sessions with due events with NumPy."""
+
+    def __init__(self, capacity: int = 1024) -> None:
+        """
+        Initialize the due-event engine.
+
+        The threshold table is compiled once. Every event is a bit, the events
+        are sorted by time, so the events reached after some minutes are a prefix
+        of that order and their bits are looked up with a binary search.
+
+        Args:
+            capacity: The number of sessions to allocate the arrays for.
+        """
+        if np is None:
+            raise RuntimeError("The due-event engine requires NumPy.")
+
+        self.rows: dict[str, int] = {}
+        self.session_ids: list[str | None] = []
+        self.free: list[int] = []
+
+        order = sorted(
+            range(len(EVENTS)), key=lambda index: EVENT_CONFIG[EVENTS[index]]["time"]
+        )
+        self.thresholds = np.array(
+            [EVENT_CONFIG[EVENTS[index]]["time"] * 60 for index in order],
+            dtype=np.float64,
+        )
+        prefix = [0]
+        for index in order:
+            prefix.append(prefix[-1] | 1 << index)
+        self.reached_bits = np.array(prefix, dtype=np.uint64)
+
+        self.applicable_bits = np.zeros(
+            (len(DAYS), len(BOSS_CODES) + 1), dtype=np.uint64
+        )
+        for day in DAYS:
+            for boss, code in [(None, 0), *BOSS_CODES.items()]:
+                bits = 0
+                for index, flag in enumerate(EVENTS):
+                    config = EVENT_CONFIG[flag]
+                    if config.get("day", 0) not in (0, day):
+                        continue
+                    if config.get("boss") and config["boss"] != boss:
+                        continue
+                    bits |= 1 << index
+                self.applicable_bits[day, code] = bits
+
+        self.started: "NDArray[Any]" = np.zeros(capacity, dtype=np.float64)
+        self.days: "NDArray[Any]" = np.zeros(capacity, dtype=np.int8)
+        self.bosses: "NDArray[Any]" = np.zeros(capacity, dtype=np.int8)
+        self.fired: "NDArray[Any]" = np.zeros(capacity, dtype=np.uint64)
+        self.retry: "NDArray[Any]" = np.zeros(capacity, dtype=np.bool_)
+        self.alive: "NDArray[Any]" = np.zeros(capacity, dtype=np.bool_)
+
+    def sync(self, session: Session, started: float, retry: bool = False) -> None:
+        """
+        Store the current state of a session, or drop it if it has no run in progress.
+
+        Args:
+            session: The session.
+            started: The monotonic time the run of the session started.
+            retry: Whether the session has an edit to retry.
+        """
+        if not session.active or session.day == 0:
+            self.remove(session.session_id)
+            return
+
+        row = self.rows.get(session.session_id)
+        if row is None:
+            row = self.allocate(session.session_id)
+
+        fired = 0
+        for index, flag in enumerate(EVENTS):
+            if getattr(session.flags, flag):
+                fired |= 1 << index
+
+        self.started[row] = started
+        self.days[row] = session.day
+        self.bosses[row] = BOSS_CODES.get(session.boss or "", 0)
+        self.fired[row] = fired
+        self.retry[row] = retry
+        self.alive[row] = True
+
+    def remove(self, session_id: str) -> None:
+        """
+        Drop a session from the engine.
+
+        Args:
+            session_id: The ID of the session.
+        """
+        row = self.rows.pop(session_id, None)
+        if row is None:
+            return
+
+        self.alive[row] = False
+        self.session_ids[row] = None
+        self.free.append(row)
+
+    def allocate(self, session_id: str) -> int:
+        """
+        Allocate a row for a session, growing the arrays when they are full.
+
+        Args:
+            session_id: The ID of the session.
+
+        Returns:
+            The row of the session.
+        """
+        if self.free:
+            row = self.free.pop()
+            self.session_ids[row] = session_id
+        else:
+            row = len(self.session_ids)
+            self.session_ids.append(session_id)
+            if row >= len(self.alive):
+                self.grow()
+
+        self.rows[session_id] = row
+        return row
+
+    def grow(self) -> None:
+        """Double the capacity of the arrays."""
+        assert np is not None
+        for name in ("started", "days", "bosses", "fired", "retry", "alive"):
+            array = getattr(self, name)
+            grown = np.zeros(len(array) * 2, dtype=array.dtype)
+            grown[: len(array)] = array
+            setattr(self, name, grown)
+
+    def due(self, now: float | None = None) -> list[str]:
+        """
+        Find the sessions to tick.
+
+        A session is due when it has an event that applies to it, was reached and
+        has not fired, when it has an edit to retry, or when every event that
+        applies to it has fired, so that the tick can finish the run.
+
+        Args:
+            now: The monotonic time, the current time if not given.
+
+        Returns:
+            The IDs of the sessions to tick.
+        """
+        assert np is not None
+        size = len(self.session_ids)
+        if not self.rows:
+            return []
+
+        elapsed = (monotonic() if now is None else now) - self.started[:size]
+        reached = self.reached_bits[
+            np.searchsorted(self.thresholds, elapsed, side="right")
+        ]
+        applicable = self.applicable_bits[self.days[:size], self.bosses[:size]]
+        remaining = applicable & ~self.fired[:size]
+        due = self.alive[:size] & (
+            ((reached & remaining) != 0) | self.retry[:size] | (remaining == 0)
+        )
+        return [self.session_ids[row] for row in np.flatnonzero(due)]  # type: ignore
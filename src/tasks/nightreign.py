@@ -1,341 +1,360 @@
 """Contains the task utilities for nightreign related functionality."""
 
-import asyncio
 import logging
-from datetime import datetime
+from functools import partial
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
 
-from discord import Client, TextChannel
-from tabulate import tabulate
+from discord import HTTPException, TextChannel
 
-from src import nightreign_service as service
-from src.schemas.sessions import Session, SessionFlag
+from src.errors import RequestShedError
+from src.schemas.events import EVENT_CONFIG, MESSAGE_LIMIT, EventLogEntry, EventType
+from src.schemas.scheduler import SessionSchedule
+from src.schemas.sessions import Session
+from src.services.outbound import Priority
+
+if TYPE_CHECKING:
+    from src.client import FromCordClient
+    from src.services.nightreign import NightreignService
 
 log = logging.getLogger(__name__)
 
-FIRST_EVENT = 3.5
-SECOND_EVENT = FIRST_EVENT + 0.5
-THIRD_EVENT = SECOND_EVENT + 0.25
-FOURTH_EVENT = THIRD_EVENT + 0.25
-FIFTH_EVENT = FOURTH_EVENT + 3
-SIXTH_EVENT = FIFTH_EVENT + 2.5
-SEVENTH_EVENT = SIXTH_EVENT + 0.5
-EIGHTH_EVENT = SEVENTH_EVENT + 0.25
-NINTH_EVENT = EIGHTH_EVENT + 0.25
-TENTH_EVENT = NINTH_EVENT + 3
-
-TRICEPHALOS = "Tricephalos"
-GAPING_JAW = "Gaping Jaw"
-SENTIENT_PEST = "Sentient Pest"
-AUGUR = "Augur"
-EQUILIBRIUM = "Equilibrious Beast"
-DARKDRIFT_KNIGHT = "Darkdrift Knight"
-FISSURE_IN_THE_FOG = "Fissure In The Fog"
-NIGHT_ASPECT = "Night Aspect"
-
-EVENT_CONFIG = {
-    "TRICEPHALOS_WEAKNESS": {
-        "time": 0.25,
-        "message": "Tricephalos is weak to holy.",
-        "type": "INFO",
-        "day": 0,
-        "boss": TRICEPHALOS,
-    },
-    "GAPING_JAW_WEAKNESS": {
-        "time": 0.25,
-        "message": "Gaping Jaw is weak to poison.",
-        "type": "INFO",
-        "day": 0,
-        "boss": GAPING_JAW,
-    },
-    "SENTIENT_PEST_WEAKNESS": {
-        "time": 0.25,
-        "message": "Sentient Pest is weak to fire.",
-        "type": "INFO",
-        "day": 0,
-        "boss": SENTIENT_PEST,
-    },
-    "AUGUR_WEAKNESS": {
-        "time": 0.25,
-        "message": "Augur is weak to lightning.",
-        "type": "INFO",
-        "day": 0,
-        "boss": AUGUR,
-    },
-    "EQUILIBRIUM_WEAKNESS": {
-        "time": 0.25,
-        "message": "Equilibrious Beast is weak to madness.",
-        "type": "INFO",
-        "day": 0,
-        "boss": EQUILIBRIUM,
-    },
-    "DARKDRIFT_KNIGHT_WEAKNESS": {
-        "time": 0.25,
-        "message": "Darkdrift Knight is weak to lightning.",
-        "type": "INFO",
-        "day": 0,
-        "boss": DARKDRIFT_KNIGHT,
-    },
-    "FISSURE_IN_THE_FOG_WEAKNESS": {
-        "time": 0.25,
-        "message": "Fissure In The Fog is weak to fire.",
-        "type": "INFO",
-        "day": 0,
-        "boss": FISSURE_IN_THE_FOG,
-    },
-    "NIGHT_ASPECT_WEAKNESS": {
-        "time": 0.25,
-        "message": "Night Aspect is weak to holy.",
-        "type": "INFO",
-        "day": 0,
-        "boss": NIGHT_ASPECT,
-    },
-    "TRICEPHALOS_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Bell Bearing Hunter, Demi-Humans",
-        "type": "INFO",
-        "day": 1,
-        "boss": TRICEPHALOS,
-    },
-    "TRICEPHALOS_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Fell Omen, Tree Sentinel",
-        "type": "INFO",
-        "day": 2,
-        "boss": TRICEPHALOS,
-    },
-    "GAPING_JAW_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Night's Cavalry x2, Valiant Gargoyle, Wormface",
-        "type": "INFO",
-        "day": 1,
-        "boss": GAPING_JAW,
-    },
-    "GAPING_JAW_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Ancient Dragon, Crucible Knight/Golden Hippopotamus, Outland Commander",  # noqa: E501
-        "type": "INFO",
-        "day": 2,
-        "boss": GAPING_JAW,
-    },
-    "SENTIENT_PEST_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Battlefield Commander, Centipede Demon, Smelter Demon, Tibia Mariner, Ulcerated Tree Spirit",  # noqa: E501
-        "type": "INFO",
-        "day": 1,
-        "boss": SENTIENT_PEST,
-    },
-    "SENTIENT_PEST_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Draconic Tree Sentinel, Great Wyrm, Nox Dragonkin Soldier",  # noqa: E501
-        "type": "INFO",
-        "day": 2,
-        "boss": SENTIENT_PEST,
-    },
-    "AUGUR_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Gaping Dragon, Grafted Monarch, Wormface",  # noqa: E501
-        "type": "INFO",
-        "day": 1,
-        "boss": AUGUR,
-    },
-    "AUGUR_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Full-Grown Fallingstar Beast, Tree Sentinel",  # noqa: E501
-        "type": "INFO",
-        "day": 2,
-        "boss": AUGUR,
-    },
-    "EQUILIBRIUM_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Centipede Demon, The Duke's Dear Freja, Tibia Mariner, Royal Revenant",  # noqa: E501
-        "type": "INFO",
-        "day": 1,
-        "boss": EQUILIBRIUM,
-    },
-    "EQUILIBRIUM_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Crucible Knight/Golden Hippopotamus, Death Rite Bird, Godskin Duo",  # noqa: E501
-        "type": "INFO",
-        "day": 2,
-        "boss": EQUILIBRIUM,
-    },
-    "DARKDRIFT_KNIGHT_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Gaping Dragon, Night's Cavalry x2, Royal Revenant, Valiant Gargoyle, Wormface",  # noqa: E501
-        "type": "INFO",
-        "day": 1,
-        "boss": DARKDRIFT_KNIGHT,
-    },
-    "DARKDRIFT_KNIGHT_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Nameless King, Nox Dragonkin Soldier, Outland Commander",  # noqa: E501
-        "type": "INFO",
-        "day": 2,
-        "boss": DARKDRIFT_KNIGHT,
-    },
-    "FISSURE_IN_THE_FOG_DAY_1": {
-        "time": 0.5,
-        "message": "Potential night 1 bosses: Grafted Monarch, Smelter Demon, The Duke's Dear Freja, Tibia Mariner, Ulcerated Tree Spirit",  # noqa: E501
-        "type": "INFO",
-        "day": 1,
-        "boss": FISSURE_IN_THE_FOG,
-    },
-    "FISSURE_IN_THE_FOG_DAY_2": {
-        "time": 0.5,
-        "message": "Potential night 2 bosses: Dancer Of The Boreal Valley, Draconic Tree Sentinel, Godskin Duo",  # noqa: E501
-        "type": "INFO",
-        "day": 2,
-        "boss": FISSURE_IN_THE_FOG,
-    },
-    "ROUND_1_WARNING_1": {
-        "time": FIRST_EVENT,
-        "message": "Round 1 will start closing in 1 minute.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_1_WARNING_2": {
-        "time": SECOND_EVENT,
-        "message": "Round 1 will start closing in 30 seconds.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_1_WARNING_3": {
-        "time": THIRD_EVENT,
-        "message": "Round 1 will start closing in 15 seconds.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_1_ANNOUNCEMENT": {
-        "time": FOURTH_EVENT,
-        "message": "Round 1 has started closing.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_1_CLOSED": {
-        "time": FIFTH_EVENT,
-        "message": "Round 1 has closed.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_2_WARNING_1": {
-        "time": SIXTH_EVENT,
-        "message": "Round 2 will start closing in 1 minute.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_2_WARNING_2": {
-        "time": SEVENTH_EVENT,
-        "message": "Round 2 will start closing in 30 seconds.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_2_WARNING_3": {
-        "time": EIGHTH_EVENT,
-        "message": "Round 2 will start closing in 15 seconds.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_2_ANNOUNCEMENT": {
-        "time": NINTH_EVENT,
-        "message": "Round 2 has started closing.",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "ROUND_2_CLOSED": {
-        "time": TENTH_EVENT,
-        "message": "Round 2 has closed.\nGood luck and have fun!",
-        "type": "TIMER",
-        "day": 0,
-        "boss": None,
-    },
-    "LEVEL_5_7": {
-        "time": TENTH_EVENT + 0.5,
-        "message": "You should now be level 5-7.",
-        "type": "GUIDELINE",
-        "day": 1,
-        "boss": None,
-    },
-    "LEVEL_10_12": {
-        "time": TENTH_EVENT + 0.5,
-        "message": "You should now be level 10-12.",
-        "type": "GUIDELINE",
-        "day": 2,
-        "boss": None,
-    },
-}
-
-
-async def process_session(client: Client, session: Session) -> None:
-    """Process the session for the nightreign service."""
+RETRY_BASE_DELAY = 5.0
+RETRY_MAX_DELAY = 60.0
+
+
+def applies(session: Session, config: dict[str, Any]) -> bool:
+    """
+    Check whether an event applies to the day and boss of a session.
+
+    Args:
+        session: The session.
+        config: The config of the event.
+
+    Returns:
+        True if the event applies to the session, otherwise False.
+    """
+    day = config.get("day", 0)
+    if day != 0 and session.day != day:
+        return False
+
+    boss = config.get("boss", None)
+    if boss and session.boss != boss:
+        return False
+
+    return True
+
+
+def due_events(session: Session, minutes: float) -> list[tuple[str, dict[str, Any]]]:
+    """
+    Get the events of a session that are due and have not fired yet.
+
+    Args:
+        session: The session.
+        minutes: The minutes elapsed since the run started.
+
+    Returns:
+        The flag and config of every due event, in the order they are configured.
+    """
+    due = []
+    for flag, config in EVENT_CONFIG.items():
+        if minutes >= config["time"] and not getattr(session.flags, flag):
+            if applies(session, config):
+                due.append((flag, config))
+    return due
+
+
+def next_event(session: Session) -> tuple[str | None, float | None]:
+    """
+    Get the next event of a session that has not fired yet.
+
+    Args:
+        session: The session.
+
+    Returns:
+        The flag and the time in minutes of the next event, None if all fired.
+    """
+    upcoming = [
+        (config["time"], flag)
+        for flag, config in EVENT_CONFIG.items()
+        if not getattr(session.flags, flag) and applies(session, config)
+    ]
+    if not upcoming:
+        return None, None
+
+    minutes, flag = min(upcoming)
+    return flag, minutes
+
+
+async def process_session(client: "FromCordClient", session: Session) -> None:
+    """
+    Process the session for the nightreign service.
+
+    The due events are fired into the outbox of the session along with their
+    flags, without any REST call in between, so a failed call can not lose them.
+    The outbox is then delivered by deliver_outbox.
+    """
+    service = client.nightreign_service
+    stats = client.nightreign_stats
+    started = perf_counter()
     try:
-        session_started = datetime.fromtimestamp(session.timestamp)
-        now = datetime.now()
-        diff = now - session_started
+        schedule = service.get_schedule(session)
+        elapsed = service.elapsed(session)
+        now = service.clock.time()
+        for flag, config in due_events(session, elapsed / 60):
+            setattr(session.flags, flag, True)
+            session.outbox.append(
+                EventLogEntry(
+                    code=flag,
+                    type=EventType[config.get("type", "INFO")],
+                    day=session.day,
+                    timestamp=now,
+                )
+            )
 
-        minutes = diff.total_seconds() / 60
+        if session.outbox and schedule.retry_at <= now:
+            await deliver_outbox(client, session, schedule)
 
-        for flag, config in EVENT_CONFIG.items():
-            time: float | None = config.get("time")  # type: ignore
-            if time is None:
-                continue
+        _, schedule.next_event_time = next_event(session)
+        service.mark_changed(session)
+        log.debug(f"[NIGHTREIGN] Session {session.session_id} processed.")
+    except Exception as e:
+        log.error(f"[NIGHTREIGN] Error processing session {session.session_id}: {e}")
+        log.warning(
+            f"[NIGHTREIGN] Session {session.session_id} will be skipped and retried later."
+        )
+    finally:
+        service.sync_engine(session)
+        stats.record_session(perf_counter() - started)
+
+
+def fit_outbox(service: "NightreignService", session: Session) -> tuple[int, str]:
+    """
+    Find how many entries of the outbox fit in the event log message.
+
+    Args:
+        service: The nightreign service.
+        session: The session.
+
+    Returns:
+        The number of entries from the start of the outbox that fit and the
+        content with them, 0 and no content if not even the first one fits.
+    """
+    outbox = session.outbox
+    content = service.render_event_log(session, outbox)
+    if len(content) <= MESSAGE_LIMIT:
+        return len(outbox), content
+
+    best = (0, "")
+    low, high = 1, len(outbox) - 1
+    while low <= high:
+        middle = (low + high) // 2
+        content = service.render_event_log(session, outbox[:middle])
+        if len(content) <= MESSAGE_LIMIT:
+            best = (middle, content)
+            low = middle + 1
+        else:
+            high = middle - 1
+    return best
+
+
+def rejected(error: Exception) -> bool:
+    """
+    Check whether discord rejected a request, so that retrying it can not help.
+
+    Args:
+        error: The error the request raised.
+
+    Returns:
+        True if the request failed with a client error other than a rate limit.
+    """
+    return (
+        isinstance(error, HTTPException)
+        and 400 <= error.status < 500
+        and error.status != 429
+    )
+
+
+def drop_outbox(session: Session, count: int, reason: object) -> None:
+    """
+    Drop entries from the start of the outbox of a session.
 
-            day = config.get("day", 0)
-            if day != 0 and session.day != day:
+    Args:
+        session: The session.
+        count: The number of entries to drop.
+        reason: Why the entries can not be delivered.
+    """
+    codes = ", ".join(entry.code for entry in session.outbox[:count])
+    del session.outbox[:count]
+    log.warning(
+        f"[NIGHTREIGN] Session {session.session_id} dropped events {codes}: {reason}"
+    )
+
+
+async def roll_over(
+    client: "FromCordClient", session: Session, schedule: SessionSchedule
+) -> None:
+    """
+    Start a new event log message for a session.
+
+    Args:
+        client: The client.
+        session: The session.
+        schedule: The scheduler state of the session.
+    """
+    channel = client.get_channel(session.channel_id)
+    if not isinstance(channel, TextChannel):
+        return
+
+    message = await client.nightreign_service.outbound.submit(
+        Priority.TIMER, lambda: channel.send("LOADING...")
+    )
+    client.nightreign_stats.record_rest_call()
+    session.event_log.clear()
+    session.event_log_id = message.id
+    schedule.event_log_id = message.id
+
+
+async def deliver_outbox(
+    client: "FromCordClient", session: Session, schedule: SessionSchedule
+) -> None:
+    """
+    Deliver the outbox of a session in as few edits of the event log as possible.
+
+    The outbox is only moved into the event log once discord confirmed the edit.
+    The edit renders the whole log, so retrying it is idempotent, and a failed
+    delivery is retried with exponential backoff.
+
+    Every edit is measured before it is sent. The entries that do not fit in the
+    current message go to a new one, so a backlog is delivered in chunks under the
+    length limit of discord. An edit that discord rejects is moved to a new
+    message once, and dropped if it is rejected again, as retrying it can not help.
+
+    An edit with a timer event is sent with the timer priority, any other edit is
+    cosmetic. A cosmetic edit that is shed under load stays in the outbox, so it is
+    merged into the next edit of the event log.
+    """
+    service = client.nightreign_service
+    outbound = service.outbound
+    stats = client.nightreign_stats
+    channel = client.get_channel(session.channel_id)
+    if not isinstance(channel, TextChannel):
+        return
+
+    timer = any(entry.type == EventType.TIMER for entry in session.outbox)
+    priority = Priority.TIMER if timer else Priority.COSMETIC
+    rolled_over = False
+    try:
+        while session.outbox:
+            count, content = fit_outbox(service, session)
+            if not count:
+                if not session.event_log:
+                    drop_outbox(session, 1, "the event is too long for a message")
+                    continue
+
+                await roll_over(client, session, schedule)
+                rolled_over = True
                 continue
 
-            boss = config.get("boss", None)
-            if boss and session.boss != boss:
+            partial_message = channel.get_partial_message(session.event_log_id)
+            try:
+                await outbound.submit(
+                    priority, lambda: partial_message.edit(content=content)
+                )
+            except Exception as e:
+                if not rejected(e):
+                    raise
+
+                if rolled_over:
+                    drop_outbox(session, count, e)
+                    continue
+
+                log.warning(
+                    f"[NIGHTREIGN] Session {session.session_id} edit rejected: {e}, "
+                    "moving the events to a new message."
+                )
+                await roll_over(client, session, schedule)
+                rolled_over = True
                 continue
+            stats.record_rest_call()
+
+            elapsed = service.elapsed(session)
+            for entry in session.outbox[:count]:
+                config = EVENT_CONFIG.get(entry.code, {"time": 0})
+                stats.record_event(delay=elapsed - config["time"] * 60)
 
-            if minutes >= time and not getattr(session.flags, flag):
-                setattr(session.flags, flag, True)
-                channel = client.get_channel(session.channel_id)
-                if channel and isinstance(channel, TextChannel):
-                    partial_message = channel.get_partial_message(session.event_log_id)
-                    message = await partial_message.fetch()
-
-                    if len(message.content) > 1750:
-                        session.event_log = []
-                        message = await channel.send("LOADING...")
-                        session.event_log_id = message.id
-
-                    session.event_log.append(
-                        [
-                            str(session.day),
-                            config.get("type", "INFO"),  # type: ignore
-                            config.get("message", ""),  # type: ignore
-                            datetime.now().isoformat(),
-                        ]
-                    )
-                    table = tabulate(
-                        session.event_log,
-                        headers=["Day", "Type", "Event", "Timestamp"],
-                        tablefmt="rounded_grid",
-                    )
-                    await message.edit(content=f"```\n{table}\n```")
-                    break
-
-        service.data[session.session_id] = session
-        log.info(f"[NIGHTREIGN] Session {session.session_id} processed.")
+            session.event_log.extend(session.outbox[:count])
+            del session.outbox[:count]
+            schedule.attempts = 0
+            schedule.retry_at = 0.0
+    except RequestShedError as e:
+        log.warning(f"[NIGHTREIGN] Session {session.session_id} edit deferred: {e}")
     except Exception as e:
-        log.error(f"[NIGHTREIGN] Error processing session {session.session_id}: {e}")
+        if rejected(e):
+            drop_outbox(session, len(session.outbox), e)
+            return
+
+        schedule.attempts += 1
+        delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (schedule.attempts - 1))
+        schedule.retry_at = service.clock.time() + delay
         log.warning(
-            f"[NIGHTREIGN] Session {session.session_id} will be skipped and retried later."
+            f"[NIGHTREIGN] Session {session.session_id} delivery failed: {e}, "
+            f"retry {schedule.attempts} in {delay:.0f} seconds."
         )
 
 
-async def check_sessions(client: Client) -> None:
+async def check_sessions(client: "FromCordClient") -> None:
     """Check the sessions for the nightreign service."""
-    tasks = []
+    stats = client.nightreign_stats
+    stats.start_tick()
+    try:
+        scheduled = schedule_sessions(client)
+        if scheduled or stats.tick_sessions:
+            log.info(
+                f"[NIGHTREIGN] Tick: {scheduled} scheduled, {stats.tick_sessions} "
+                f"processed, {stats.tick_events} events, "
+                f"{stats.tick_rest_calls} REST calls."
+            )
+    finally:
+        stats.end_tick()
+
+
+async def tick_session(client: "FromCordClient", session_id: str) -> None:
+    """
+    Run a timer tick of a session, on the actor of the session.
+
+    The session is looked up again, it may have been stopped or closed by a
+    command that ran before the tick. A run is finished once every event that
+    applies to it fired and its outbox was delivered.
+    """
+    service = client.nightreign_service
+    session = service.get(session_id)
+    if not session or not session.active or session.day == 0:
+        return
+
+    flag, _ = next_event(session)
+    if flag is None and not session.outbox:
+        log.info(f"[NIGHTREIGN] Marking session {session.session_id} as inactive...")
+        service.stop(session)
+    else:
+        await process_session(client, session)
+
+
+def due_sessions(client: "FromCordClient") -> list[str]:
+    """
+    Get the sessions to tick.
+
+    The due-event engine answers this in one vectorized pass when it is used,
+    otherwise every session is checked against its next event.
+
+    Returns:
+        The IDs of the sessions to tick.
+    """
+    service = client.nightreign_service
+    if service.engine is not None:
+        return service.engine.due(service.clock.monotonic())
+
+    due = []
     for session in service.data.values():
         if not session.active:
             continue
@@ -343,28 +362,32 @@ async def check_sessions(client: Client) -> None:
         if session.day == 0:
             continue
 
-        flags = session.flags
-        for flag in SessionFlag.model_fields:
-            result = getattr(flags, flag)
-            close = True
+        schedule = service.schedules.get(session.session_id)
+        if (
+            schedule
+            and not session.outbox
+            and schedule.next_event_time is not None
+            and service.elapsed(session) / 60 < schedule.next_event_time
+        ):
+            continue
 
-            if result:
-                continue
-            else:
-                close = False
+        due.append(session.session_id)
+    return due
 
-        if close:
-            log.info(
-                f"[NIGHTREIGN] Marking session {session.session_id} as inactive..."
-            )
-            service.data[session.session_id].active = False
-            service.data[session.session_id].timestamp = 0
-            service.data[session.session_id].flags = SessionFlag()
-        else:
-            task = asyncio.create_task(process_session(client, session))
-            tasks.append(task)
 
-    if tasks:
-        log.info(f"[NIGHTREIGN] Scheduling {len(tasks)} tasks...")
-        await asyncio.gather(*tasks)
-        log.info("[NIGHTREIGN] Tasks Completed.")
+def schedule_sessions(client: "FromCordClient") -> int:
+    """
+    Queue a timer tick on the actor of every session with an event due.
+
+    The ticks are not waited for, so a slow session never holds up the others. A
+    session that is still busy with its previous tick gets at most one more.
+
+    Returns:
+        The number of ticks queued.
+    """
+    service = client.nightreign_service
+    scheduled = 0
+    for session_id in due_sessions(client):
+        if service.actor(session_id).tick(partial(tick_session, client, session_id)):
+            scheduled += 1
+    return scheduled
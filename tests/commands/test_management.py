@@ -0,0 +1,94 @@
+"""This module contains the tests for the management commands."""
+
+import asyncio
+import random
+from types import SimpleNamespace
+from typing import Any
+
+from src.commands.management import pages, stats
+from src.monitoring import CommandStats, LoopStats
+from src.schemas.events import MESSAGE_LIMIT
+
+
+def loop_stats(name: str, rng: random.Random) -> LoopStats:
+    """Create loop stats with realistic values in every histogram."""
+    loop = LoopStats(name=name, interval=5)
+    for _ in range(720):
+        for histogram in (loop.tick_duration, loop.drift, loop.session_latency):
+            histogram.record(rng.uniform(0, 12))
+        for histogram in (loop.sessions, loop.events, loop.rest_calls):
+            histogram.record(rng.randrange(100000))
+        loop.event_delay.record(rng.uniform(0, 120))
+        loop.ticks += 1
+    return loop
+
+
+class Recorder:
+    """This records the messages sent for an interaction."""
+
+    def __init__(self) -> None:
+        """Initialize the recorder."""
+        self.messages: list[str] = []
+
+    async def send_message(self, content: str, **kwargs: Any) -> None:
+        """Record the response."""
+        self.messages.append(content)
+
+    async def send(self, content: str, **kwargs: Any) -> None:
+        """Record a followup."""
+        self.messages.append(content)
+
+
+def test_pages_fit_in_a_message() -> None:
+    """A table too long for a message is split between its lines."""
+    table = "\n".join(f"{index:>5} {'x' * 60}" for index in range(200))
+    table += "\n" + "y" * 3000
+
+    messages = pages("title", table)
+
+    assert len(messages) > 1
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
+    assert all(message.startswith("title\n```\n") for message in messages)
+    assert all(message.endswith("\n```") for message in messages)
+
+
+def send_stats(commands: CommandStats) -> list[str]:
+    """Run the stats command and get the messages it sent."""
+    rng = random.Random(0)
+    recorder = Recorder()
+    client = SimpleNamespace(
+        app_config=SimpleNamespace(get_bot_owner_id=lambda: 1),
+        nightreign_stats=loop_stats("nightreign_loop", rng),
+        clean_stats=loop_stats("clean_and_save", rng),
+        command_stats=commands,
+    )
+    interaction = SimpleNamespace(
+        client=client, user=SimpleNamespace(id=1), response=recorder, followup=recorder
+    )
+
+    asyncio.run(stats.callback(interaction))  # type: ignore
+    return recorder.messages
+
+
+def test_loop_stats_fit_in_messages() -> None:
+    """Every loop table is sent in a message of its own that discord accepts."""
+    messages = send_stats(CommandStats())
+
+    assert len(messages) == 2
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
+
+
+def test_command_stats_are_paged() -> None:
+    """The command table is sent after the loop tables, in pages discord accepts."""
+    rng = random.Random(0)
+    commands = CommandStats()
+    for index in range(40):
+        for _ in range(10):
+            commands.record_ack(f"command{index}", rng.uniform(0, 3))
+            commands.record_completion(f"command{index}", rng.uniform(0, 30))
+
+    messages = send_stats(commands)
+
+    assert len(messages) > 3
+    assert all(message.startswith("commands\n") for message in messages[2:])
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
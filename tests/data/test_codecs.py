@@ -0,0 +1,86 @@
+"""This module contains the tests for the record codecs."""
+
+from collections import deque
+
+import pytest
+
+from src.data import BinaryCodec, JsonCodec
+from src.data.interfaces import IRecordCodec
+from src.schemas import GuildConfig, Session
+from src.schemas.events import EventLogEntry, EventType
+from src.schemas.sessions import SessionFlag
+
+CODECS = [JsonCodec(), BinaryCodec()]
+
+
+def running_session() -> Session:
+    """Create a session in the middle of a run, with every kind of field set."""
+    return Session(
+        session_id="abc",
+        session_pw="0123456789abcdef",
+        privacy="private",
+        members=[1, 2**63 - 1],
+        active=True,
+        day=2,
+        timestamp=1750000000.25,
+        channel_id=2**40,
+        guild_id=2**41,
+        event_log=deque(
+            [
+                EventLogEntry("RUN_STARTED", EventType.INFO, 2, 1750000000.25),
+                EventLogEntry("ROUND_1_WARNING_1", EventType.TIMER, 2, 1750000120.5),
+            ]
+        ),
+        event_log_id=2**42,
+        flags=SessionFlag(ROUND_1_WARNING_1=True, NIGHT_ASPECT_WEAKNESS=True),
+        outbox=[EventLogEntry("ROUND_1_WARNING_2", EventType.TIMER, 2, 1750000240.0)],
+        boss="Night Aspect",
+    )
+
+
+def idle_session() -> Session:
+    """Create a session that never ran, with the optional fields left out."""
+    return Session(
+        session_id="",
+        session_pw="pw",
+        privacy="public",
+        members=[],
+        active=False,
+        day=0,
+        timestamp=0,
+        channel_id=1,
+        guild_id=1,
+        event_log=deque(),
+        event_log_id=0,
+    )
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+@pytest.mark.parametrize("session", [running_session(), idle_session()])
+def test_session_round_trip(codec: IRecordCodec, session: Session) -> None:
+    """A session decodes to what was encoded."""
+    decoded = codec.decode_session(codec.encode_session(session))
+
+    assert decoded == session
+    assert decoded.event_log.maxlen == session.event_log.maxlen
+
+
+@pytest.mark.parametrize("codec", CODECS, ids=lambda codec: type(codec).__name__)
+@pytest.mark.parametrize("pooled", [[], [3, 2**50]])
+def test_guild_round_trip(codec: IRecordCodec, pooled: list[int]) -> None:
+    """A guild config decodes to what was encoded."""
+    guild_config = GuildConfig(
+        guild_id=2**45, nightreign_category_id=7, pooled_channel_ids=pooled
+    )
+
+    assert codec.decode_guild(codec.encode_guild(guild_config)) == guild_config
+
+
+def test_binary_decodes_from_a_view() -> None:
+    """A binary record decodes from a view into a snapshot, without a copy."""
+    codec = BinaryCodec()
+    record = codec.encode_session(running_session())
+    end = 4 + len(record)
+    view = memoryview(b"head" + record + b"tail")[4:end]
+
+    assert codec.decode_session(view) == running_session()
@@ -0,0 +1,64 @@
+"""This module contains the tests for the migration between storage formats."""
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.nightreign import create_service
+from src.config import AppConfigManager, GuildConfigManager
+from src.data import FileManager, ShardedFileManager
+from src.schemas import GuildConfig
+from src.services import NightreignService
+from tests.data.test_codecs import idle_session, running_session
+
+
+def binary_service(directory: Path) -> NightreignService:
+    """Create a service that stores its shards as binary snapshots."""
+    app_config = AppConfigManager()
+    guild_config = GuildConfigManager(
+        app_config=app_config,
+        file=ShardedFileManager(str(directory / "guilds"), "binary"),
+    )
+    return NightreignService(
+        app_config=app_config,
+        guild_config=guild_config,
+        file=ShardedFileManager(str(directory / "sessions"), "binary"),
+        schedule_file=FileManager(file_path=str(directory / "scheduler.json")),
+    )
+
+
+def test_jsonl_directory_is_migrated_to_binary(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Every jsonl shard is rewritten as a snapshot, with the same content."""
+    sessions = [running_session(), idle_session()]
+    sessions[1].session_id = "def"
+    sessions[1].guild_id = sessions[0].guild_id
+    guild_config = GuildConfig(
+        guild_id=sessions[0].guild_id,
+        nightreign_category_id=7,
+        pooled_channel_ids=[8, 9],
+    )
+    jsonl = create_service(str(tmp_path))
+    jsonl.guild_config.file.on_ready()
+    jsonl.file.on_ready()
+    jsonl.guild_config.file.write(
+        str(guild_config.guild_id),
+        [jsonl.guild_config.file.codec.encode_guild(guild_config)],
+    )
+    jsonl.file.write(
+        str(guild_config.guild_id),
+        [jsonl.file.codec.encode_session(session) for session in sessions],
+    )
+
+    monkeypatch.setenv("PRIMARY_GUILD", str(guild_config.guild_id))
+    monkeypatch.setenv("NIGHTREIGN_GUILD_CATEGORY", "7")
+    service = binary_service(tmp_path)
+    service.guild_config.on_ready()
+    service.on_ready([guild_config.guild_id])
+
+    for directory in ("guilds", "sessions"):
+        names = [path.name for path in (tmp_path / directory).iterdir()]
+        assert names == [f"{guild_config.guild_id}.snap"]
+    assert service.guild_config.get_config(guild_config.guild_id) == guild_config
+    assert [service.data[session.session_id] for session in sessions] == sessions
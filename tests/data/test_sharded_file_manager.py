@@ -0,0 +1,46 @@
+"""This module contains the tests for the sharded file manager."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from src.data import ShardedFileManager
+
+
+def scanned(directory: Path) -> int:
+    """Get the total size of the files in a directory from a fresh scan."""
+    return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+
+
+@pytest.mark.parametrize("storage_format", ["jsonl", "binary"])
+def test_size_follows_the_writes(
+    tmp_path: Path, storage_format: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The total size is scanned once and kept up to date after that."""
+    file = ShardedFileManager(str(tmp_path), storage_format)
+    file.on_ready()
+    file.write("1", [b"one", b"two"])
+    assert file.size() == scanned(tmp_path)
+
+    def scandir(path: str) -> None:
+        raise AssertionError("The directory was scanned again.")
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    file.write("2", [b"three"])
+    file.write("1", [b"four" * 100])
+    assert file.size() == scanned(tmp_path)
+
+    file.delete("1")
+    assert file.size() == scanned(tmp_path)
+
+
+def test_size_drops_migrated_shards(tmp_path: Path) -> None:
+    """A shard rewritten in the other format no longer counts in its old one."""
+    ShardedFileManager(str(tmp_path), "jsonl").write("1", [b"{}"] * 100)
+    file = ShardedFileManager(str(tmp_path), "binary")
+    assert file.size() == scanned(tmp_path)
+
+    file.write("1", [b"{}"])
+
+    assert file.size() == scanned(tmp_path)
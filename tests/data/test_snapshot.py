@@ -0,0 +1,81 @@
+"""This module contains the tests for the binary snapshot format."""
+
+import io
+from pathlib import Path
+
+import pytest
+
+from src.data.snapshot import HEADER, MMAP_THRESHOLD, read_snapshot, write_snapshot
+from src.errors import FileError
+
+
+def write(path: Path, records: list[bytes]) -> bytes:
+    """Write records to a snapshot file and return its content."""
+    buffer = io.BytesIO()
+    write_snapshot(buffer, records)
+    path.write_bytes(buffer.getvalue())
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize(
+    "records",
+    [[], [b""], [b"one", b"two", b"three"], [b"x" * MMAP_THRESHOLD, b"y"]],
+    ids=["empty", "empty record", "small", "mapped"],
+)
+def test_round_trip(tmp_path: Path, records: list[bytes]) -> None:
+    """The records read back are the ones written, in order."""
+    path = tmp_path / "1.snap"
+    write(path, records)
+
+    assert [bytes(record) for record in read_snapshot(str(path))] == records
+
+
+def test_checksum_mismatch(tmp_path: Path) -> None:
+    """A flipped byte in the body is caught before any record is handed out."""
+    path = tmp_path / "1.snap"
+    data = bytearray(write(path, [b"one", b"two"]))
+    data[-1] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(FileError, match="checksum"):
+        list(read_snapshot(str(path)))
+
+
+@pytest.mark.parametrize("size", [0, HEADER.size - 1], ids=["empty", "header"])
+def test_truncated_header(tmp_path: Path, size: int) -> None:
+    """A file cut off within the header is truncated."""
+    path = tmp_path / "1.snap"
+    path.write_bytes(write(path, [b"one"])[:size])
+
+    with pytest.raises(FileError, match="truncated"):
+        list(read_snapshot(str(path)))
+
+
+def test_truncated_body(tmp_path: Path) -> None:
+    """A body cut off within its records does not pass as complete."""
+    path = tmp_path / "1.snap"
+    path.write_bytes(write(path, [b"one", b"two"])[:-2])
+
+    with pytest.raises(FileError):
+        list(read_snapshot(str(path)))
+
+
+def test_missing_records(tmp_path: Path) -> None:
+    """A header that counts more records than the body holds is truncated."""
+    path = tmp_path / "1.snap"
+    data = write(path, [b"one", b"two"])
+    magic, version, count, checksum = HEADER.unpack_from(data)
+    size = HEADER.size
+    path.write_bytes(HEADER.pack(magic, version, count + 1, checksum) + data[size:])
+
+    with pytest.raises(FileError, match="truncated"):
+        list(read_snapshot(str(path)))
+
+
+def test_not_a_snapshot(tmp_path: Path) -> None:
+    """A file without the magic bytes is refused."""
+    path = tmp_path / "1.snap"
+    path.write_bytes(b'{"guild_id": 1}\n'.ljust(HEADER.size, b" "))
+
+    with pytest.raises(FileError, match="not a snapshot"):
+        list(read_snapshot(str(path)))
@@ -0,0 +1,29 @@
+"""This module contains the tests for the logging setup."""
+
+import logging
+
+from src.monitoring.logs import RateLimitFilter
+
+
+def record(level: int) -> logging.LogRecord:
+    """Create a record of a single call site."""
+    return logging.LogRecord("test", level, __file__, 1, "message", None, None)
+
+
+def test_info_is_rate_limited() -> None:
+    """A call site that logs more than its burst is sampled down."""
+    limiter = RateLimitFilter(rate=0.0, burst=2)
+
+    results = [limiter.filter(record(logging.INFO)) for _ in range(4)]
+
+    assert results == [True, True, False, False]
+    assert limiter.suppressed_total == 2
+
+
+def test_warnings_are_never_dropped() -> None:
+    """Warnings and errors get through a call site that is over its rate."""
+    limiter = RateLimitFilter(rate=0.0, burst=1)
+
+    assert all(limiter.filter(record(logging.WARNING)) for _ in range(4))
+    assert all(limiter.filter(record(logging.ERROR)) for _ in range(4))
+    assert limiter.suppressed_total == 0
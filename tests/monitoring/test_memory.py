@@ -0,0 +1,17 @@
+"""This module contains the tests for the memory profile."""
+
+import tracemalloc
+
+from src.monitoring.memory import MemoryProfile
+
+
+def test_stop_ends_tracing() -> None:
+    """Stopping the profile stops tracing and forgets the previous snapshot."""
+    profile = MemoryProfile()
+    assert profile.start()
+    profile.take_snapshot()
+
+    assert profile.stop()
+    assert not tracemalloc.is_tracing()
+    assert profile.snapshot is None
+    assert not profile.stop()
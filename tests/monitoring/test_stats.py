@@ -0,0 +1,20 @@
+"""This module contains the tests for the loop stats."""
+
+from src.monitoring import LoopStats
+
+
+def test_work_counts_the_sessions_processed_since_the_last_tick() -> None:
+    """The work of a tick is the time spent on the sessions, not on queueing them."""
+    stats = LoopStats(name="nightreign_loop", interval=5)
+    stats.start_tick()
+    stats.end_tick()
+    stats.record_session(0.25)
+    stats.record_session(0.5)
+    stats.record_session()
+
+    stats.start_tick()
+    stats.end_tick()
+
+    assert stats.work.max() == 0.75
+    assert stats.tick_work == 0.0
+    assert stats.tick_duration.max() < 0.75
@@ -0,0 +1 @@
+"""This houses the tests for the services."""
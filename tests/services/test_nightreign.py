@@ -0,0 +1,186 @@
+"""This module contains the tests for the session storage of the nightreign service."""
+
+import asyncio
+from collections import deque
+from pathlib import Path
+
+from benchmarks.fakes import FakeClient, FakeInteraction, VirtualClock
+from benchmarks.nightreign import create_service
+from src.monitoring import LoopStats
+from src.schemas import Session
+from src.services import NightreignService
+from src.tasks.nightreign import schedule_sessions
+
+
+def session(session_id: str, guild_id: int) -> Session:
+    """Create an idle session."""
+    return Session(
+        session_id=session_id,
+        session_pw="pw",
+        privacy="public",
+        members=[1],
+        active=False,
+        day=0,
+        timestamp=0,
+        channel_id=guild_id * 10,
+        guild_id=guild_id,
+        event_log=deque(),
+        event_log_id=0,
+    )
+
+
+def ready_service(directory: Path, guild_ids: list[int]) -> NightreignService:
+    """Create a service and make it ready, as if the client was in the guilds."""
+    service = create_service(str(directory))
+    service.guild_config.file.on_ready()
+    service.on_ready(guild_ids)
+    return service
+
+
+def stored_ids(service: NightreignService, guild_id: int) -> list[str]:
+    """Get the IDs of the sessions stored in the file of a guild."""
+    return [
+        service.file.codec.decode_session(record).session_id
+        for record in service.file.read(str(guild_id))
+    ]
+
+
+def test_create_refuses_an_id_held_by_an_unloaded_guild(tmp_path: Path) -> None:
+    """A session ID stays taken while its guild is evicted."""
+    service = ready_service(tmp_path, [])
+    service.add_session(session("abc", 200))
+    service.save()
+    service.evict()
+    assert 200 not in service.guild_sessions
+
+    client = FakeClient()
+    guild = client.add_guild(100)
+    service.guild_config.add_config(guild.id, guild.category.id)
+    channel = guild.add_text_channel("general")
+    interaction = FakeInteraction(channel, guild.add_member(1))
+
+    created = asyncio.run(
+        service.create(interaction, guild, "abc", "pw", "public")  # type: ignore
+    )
+
+    assert not created
+    service.activate(200)
+    service.changed.add(200)
+    service.save()
+    assert stored_ids(service, 200) == ["abc"]
+
+
+def test_ids_are_indexed_across_restarts(tmp_path: Path) -> None:
+    """The IDs of guilds that are not loaded on ready are still taken."""
+    service = ready_service(tmp_path, [])
+    service.add_session(session("abc", 200))
+    service.save()
+
+    service = ready_service(tmp_path, [])
+
+    assert service.owners == {"abc": 200}
+    assert "abc" not in service.data
+
+
+def test_duplicate_stored_sessions_are_kept(tmp_path: Path) -> None:
+    """A stored session whose ID is held by another guild is written back."""
+    service = ready_service(tmp_path, [])
+    for guild_id in (100, 200):
+        service.file.write(
+            str(guild_id), [service.file.codec.encode_session(session("abc", guild_id))]
+        )
+
+    service = ready_service(tmp_path, [100, 200])
+    service.add_session(session("def", 200))
+    service.save()
+
+    assert service.data["abc"].guild_id == 100
+    assert stored_ids(service, 100) == ["abc"]
+    assert sorted(stored_ids(service, 200)) == ["abc", "def"]
+
+
+def test_tick_after_close_does_not_resurrect(tmp_path: Path) -> None:
+    """A tick queued behind a close leaves no trace of the session."""
+    service = ready_service(tmp_path, [])
+    client = FakeClient()
+    client.nightreign_service = service
+    client.nightreign_stats = LoopStats(name="nightreign_loop", interval=5)
+    guild = client.add_guild(100)
+    service.guild_config.add_config(guild.id, guild.category.id)
+    user = guild.add_member(1)
+    general = FakeInteraction(guild.add_text_channel("general"), user)
+
+    async def run() -> bool:
+        await service.create(general, guild, "abc", "pw", "public")  # type: ignore
+        channel = guild.get_channel(service.data["abc"].channel_id)
+        interaction = FakeInteraction(channel, user)
+        await service.start(interaction, guild, 1)  # type: ignore
+
+        closing = asyncio.ensure_future(
+            service.ask("abc", lambda: service.close(interaction, guild))  # type: ignore
+        )
+        await asyncio.sleep(0)
+        assert schedule_sessions(client) == 1  # type: ignore
+        result, _ = await closing
+        await service.wait_idle()
+        return result
+
+    assert asyncio.run(run())
+    service.save()
+
+    assert "abc" not in service.data
+    assert "abc" not in service.owners
+    assert "abc" not in service.schedules
+    assert "abc" not in service.activity
+    assert "abc" not in service.started
+    assert str(guild.id) not in service.file.keys()
+
+
+def test_member_removed_does_not_load_the_guild(tmp_path: Path) -> None:
+    """A member leaving a guild that is not loaded does not read its file."""
+    service = ready_service(tmp_path, [])
+    service.add_session(session("abc", 200))
+    service.save()
+    service.evict()
+
+    service.member_removed(200, 1)
+
+    assert 200 not in service.guild_sessions
+    assert not service.changed
+
+
+def test_member_removed_without_a_session(tmp_path: Path) -> None:
+    """A member leaving without a session leaves the guild unchanged."""
+    service = ready_service(tmp_path, [])
+    service.add_session(session("abc", 200))
+    service.save()
+
+    service.member_removed(200, 2)
+    assert not service.changed
+
+    service.member_removed(200, 1)
+    assert service.changed == {200}
+    assert service.data["abc"].members == []
+
+
+def test_elapsed_ignores_wall_clock_jumps(tmp_path: Path) -> None:
+    """The elapsed time of a run follows the monotonic clock, not the wall clock."""
+    clock = VirtualClock(start=1_000_000.0)
+    service = create_service(str(tmp_path), clock=clock)
+    run = session("abc", 200)
+    run.active = True
+    run.timestamp = int(clock.time())
+
+    samples = [service.elapsed(run)]
+    for jump in (-3600.0, 86400.0, -86400.0):
+        clock.advance(10)
+        clock.start += jump
+        samples.append(service.elapsed(run))
+
+    assert samples == [0.0, 10.0, 20.0, 30.0]
+
+    restarted = create_service(str(tmp_path), clock=clock)
+    clock.start -= 3600
+    assert restarted.elapsed(run) == 0.0
+    clock.advance(10)
+    assert restarted.elapsed(run) == 10.0
@@ -0,0 +1,83 @@
+"""This module contains the tests for the outbound request scheduler."""
+
+import asyncio
+
+import pytest
+
+from src.errors import RequestShedError
+from src.services.outbound import OutboundScheduler, Priority
+
+
+async def fill(
+    scheduler: OutboundScheduler,
+) -> tuple[asyncio.Event, asyncio.Task[None]]:
+    """Take the only slot of the scheduler until the returned event is set."""
+    done = asyncio.Event()
+
+    async def block() -> None:
+        await done.wait()
+
+    task = asyncio.create_task(scheduler.submit(Priority.CLEANUP, block))
+    await asyncio.sleep(0)
+    return done, task
+
+
+def test_timer_goes_ahead_of_queued_cosmetic_work() -> None:
+    """A timer request submitted last is still the first to get a free slot."""
+    scheduler = OutboundScheduler(concurrency=1)
+    order: list[str] = []
+
+    def request(name: str) -> asyncio.Future[None]:
+        async def call() -> None:
+            order.append(name)
+
+        priority = Priority.TIMER if name == "timer" else Priority.COSMETIC
+        return asyncio.ensure_future(scheduler.submit(priority, call))
+
+    async def run() -> None:
+        done, blocker = await fill(scheduler)
+        requests = [request(f"cosmetic-{index}") for index in range(3)]
+        requests.append(request("timer"))
+        await asyncio.sleep(0)
+        assert scheduler.queued[Priority.COSMETIC] == 3
+
+        done.set()
+        await asyncio.gather(blocker, *requests)
+
+    asyncio.run(run())
+
+    assert order == ["timer", "cosmetic-0", "cosmetic-1", "cosmetic-2"]
+    assert scheduler.running == 0
+
+
+def test_shedding_starts_at_the_threshold() -> None:
+    """Cosmetic work is shed once the threshold is waiting, timers still queue."""
+    scheduler = OutboundScheduler(concurrency=1, shed_after=2)
+
+    async def call() -> None:
+        pass
+
+    async def run() -> None:
+        done, blocker = await fill(scheduler)
+        queued = [
+            asyncio.ensure_future(scheduler.submit(Priority.COSMETIC, call))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        assert len(scheduler.waiting) == 2
+
+        with pytest.raises(RequestShedError):
+            await scheduler.submit(Priority.COSMETIC, call)
+        with pytest.raises(RequestShedError):
+            await scheduler.submit(Priority.CLEANUP, call)
+        timer = asyncio.ensure_future(scheduler.submit(Priority.TIMER, call))
+        await asyncio.sleep(0)
+        assert len(scheduler.waiting) == 3
+
+        done.set()
+        await asyncio.gather(blocker, timer, *queued)
+
+    asyncio.run(run())
+
+    assert scheduler.shed == {Priority.COSMETIC: 1, Priority.CLEANUP: 1}
+    assert scheduler.running == 0
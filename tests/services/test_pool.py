@@ -0,0 +1,136 @@
+"""This module contains the tests for the channel pool."""
+
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from discord import HTTPException
+
+from benchmarks.fakes import FakeClient, FakeGuild, FakeInteraction, FakeTextChannel
+from benchmarks.nightreign import create_service
+from src.services import NightreignService
+from src.services.outbound import Priority
+from src.services.pool import POOLED_CHANNEL_NAME, PURGE_LIMIT, ChannelPool
+
+
+@pytest.fixture
+def service(tmp_path: Path) -> NightreignService:
+    """Create a service with a pool of two channels per guild."""
+    service = create_service(str(tmp_path))
+    service.guild_config.file.on_ready()
+    service.on_ready([])
+    service.pool = ChannelPool(service.guild_config, service.outbound, 2)
+    return service
+
+
+@pytest.fixture
+def guild(service: NightreignService) -> FakeGuild:
+    """Create a guild with a nightreign category."""
+    guild = FakeClient().add_guild(100)
+    service.guild_config.add_config(guild.id, guild.category.id)
+    return guild
+
+
+def test_release_renames_the_channel(
+    service: NightreignService, guild: FakeGuild
+) -> None:
+    """A channel handed back to the pool loses the name of its session."""
+    channel = guild.add_text_channel("nightreign-abc")
+    asyncio.run(channel.send("hello"))
+
+    asyncio.run(service.pool.release(channel, Priority.COMMAND))
+
+    assert channel.name == POOLED_CHANNEL_NAME
+    assert not channel.messages
+    assert service.guild_config.get_config(guild.id).pooled_channel_ids == [channel.id]
+
+
+def test_failed_setup_returns_the_channel(
+    service: NightreignService, guild: FakeGuild, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A pooled channel that could not be set up for a session is not lost."""
+
+    async def edit(self: FakeTextChannel, **kwargs: Any) -> None:
+        raise HTTPException(SimpleNamespace(status=500, reason=""), "")  # type: ignore
+
+    monkeypatch.setattr(FakeTextChannel, "edit", edit)
+    channel = guild.add_text_channel(POOLED_CHANNEL_NAME)
+    service.guild_config.set_pool(guild.id, [channel.id])
+    interaction = FakeInteraction(
+        guild.add_text_channel("general"), guild.add_member(1)
+    )
+
+    async def create() -> None:
+        with pytest.raises(HTTPException):
+            await service.create(
+                interaction, guild, "abc", "pw", "public"  # type: ignore
+            )
+        await service.pool.wait()
+
+    asyncio.run(create())
+
+    pooled = service.guild_config.get_config(guild.id).pooled_channel_ids
+    assert pooled[0] == channel.id
+    assert "abc" not in service.data
+
+
+def test_pools_are_filled_on_ready(
+    service: NightreignService, guild: FakeGuild
+) -> None:
+    """The pools of the configured guilds are filled without waiting for a create."""
+    unconfigured = guild.client.add_guild(200)
+
+    async def fill() -> None:
+        service.pool.fill_guilds([guild, unconfigured])  # type: ignore
+        await service.pool.wait()
+
+    asyncio.run(fill())
+
+    pooled = service.guild_config.get_config(guild.id).pooled_channel_ids
+    assert len(pooled) == 2
+    assert all(guild.get_channel(channel_id) for channel_id in pooled)
+    assert not [
+        channel
+        for channel in unconfigured.channels_by_id.values()
+        if isinstance(channel, FakeTextChannel)
+    ]
+
+
+def test_long_channel_is_deleted(service: NightreignService, guild: FakeGuild) -> None:
+    """A channel with more messages than the purge limit is not emptied."""
+    channel = guild.add_text_channel("nightreign-abc")
+    for _ in range(PURGE_LIMIT + 1):
+        asyncio.run(channel.send("hello"))
+
+    asyncio.run(service.pool.release(channel, Priority.COMMAND))
+
+    assert guild.get_channel(channel.id) is None
+    assert service.guild_config.get_config(guild.id).pooled_channel_ids == []
+
+
+def test_failed_release_keeps_the_session(
+    service: NightreignService, guild: FakeGuild, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A session whose channel could not be released is not closed."""
+
+    async def delete(self: FakeTextChannel, **kwargs: Any) -> None:
+        raise HTTPException(SimpleNamespace(status=500, reason=""), "")  # type: ignore
+
+    monkeypatch.setattr(FakeTextChannel, "delete", delete)
+    service.pool = ChannelPool(service.guild_config, service.outbound, 0)
+    user = guild.add_member(1)
+    channel = guild.add_text_channel("general")
+    interaction = FakeInteraction(channel, user)
+
+    async def close() -> None:
+        await service.create(interaction, guild, "abc", "pw", "public")  # type: ignore
+        session = service.data["abc"]
+        own = FakeInteraction(guild.get_channel(session.channel_id), user)
+        with pytest.raises(HTTPException):
+            await service.close(own, guild)  # type: ignore
+
+    asyncio.run(close())
+
+    assert "abc" in service.data
@@ -0,0 +1,64 @@
+"""This module contains the tests for the due-event engine."""
+
+import asyncio
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from benchmarks.fakes import FakeClient, VirtualClock
+from benchmarks.nightreign import populate
+from src.schemas.events import TENTH_EVENT
+from src.services import NightreignService
+from src.tasks.nightreign import check_sessions
+
+pytest.importorskip("numpy")
+
+from src.tasks.engine import DueEventEngine  # noqa: E402
+
+INTERVAL = 5
+SESSIONS = 100
+
+
+def fired(service: NightreignService) -> dict[str, tuple[object, ...]]:
+    """Get what every session has fired so far."""
+    return {
+        session_id: (
+            session.active,
+            session.flags,
+            [(entry.code, entry.timestamp) for entry in session.event_log],
+            [(entry.code, entry.timestamp) for entry in session.outbox],
+        )
+        for session_id, session in service.data.items()
+    }
+
+
+def test_engine_matches_the_python_path(tmp_path: Path) -> None:
+    """Complete runs fire the same events at the same ticks with either path."""
+    start = datetime.now().timestamp()
+    clients = [
+        populate(FakeClient(), SESSIONS, 0, str(tmp_path / name))
+        for name in ("python", "numpy")
+    ]
+    python, numpy = (client.nightreign_service for client in clients)
+    clock = VirtualClock(start)
+    for service in (python, numpy):
+        service.clock = clock
+    for session_id, session in numpy.data.items():
+        session.timestamp = python.data[session_id].timestamp
+    numpy.engine = DueEventEngine()
+    for session in numpy.data.values():
+        numpy.sync_engine(session)
+
+    async def run() -> None:
+        for _ in range(int((TENTH_EVENT + 2) * 60 // INTERVAL)):
+            for client in clients:
+                await check_sessions(client)  # type: ignore
+                await client.nightreign_service.wait_idle()
+            assert fired(numpy) == fired(python)
+            clock.advance(INTERVAL)
+
+    asyncio.run(run())
+
+    assert clients[1].nightreign_stats.events_total > SESSIONS
+    assert not any(session.active for session in numpy.data.values())
@@ -0,0 +1,135 @@
+"""This module contains the tests for the delivery of the nightreign event log."""
+
+import asyncio
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from discord import HTTPException
+
+from benchmarks.fakes import FakeClient, FakeMessage, FakeTextChannel
+from benchmarks.nightreign import create_service
+from src.monitoring import LoopStats
+from src.schemas import Session
+from src.schemas.events import EVENT_CONFIG, MESSAGE_LIMIT, EventLogEntry, EventType
+from src.tasks.nightreign import deliver_outbox
+
+
+def http_error(status: int) -> HTTPException:
+    """Create an error of a failed discord request."""
+    return HTTPException(SimpleNamespace(status=status, reason=""), "")  # type: ignore
+
+
+@pytest.fixture
+def client(tmp_path: Path) -> FakeClient:
+    """Create a fake client with a service and a session with a backlog."""
+    client = FakeClient()
+    client.nightreign_service = create_service(str(tmp_path))
+    client.nightreign_stats = LoopStats(name="nightreign_loop", interval=5)
+    guild = client.add_guild(1)
+    channel = guild.add_text_channel("nightreign-abc")
+    message = FakeMessage(channel, 1, "")
+    channel.messages[message.id] = message
+    backlog = [
+        EventLogEntry(code=code, type=EventType.TIMER, day=1, timestamp=0)
+        for code in list(EVENT_CONFIG)[:13]
+    ]
+    client.nightreign_service.add_session(
+        Session(
+            session_id="abc",
+            session_pw="pw",
+            privacy="public",
+            members=[1],
+            active=True,
+            day=1,
+            timestamp=0,
+            channel_id=channel.id,
+            guild_id=guild.id,
+            event_log=deque(),
+            event_log_id=message.id,
+            outbox=backlog,
+        )
+    )
+    return client
+
+
+def deliver(client: FakeClient) -> tuple[Session, Any]:
+    """Deliver the outbox of the session."""
+    service = client.nightreign_service
+    session = service.data["abc"]
+    schedule = service.get_schedule(session)
+    asyncio.run(deliver_outbox(client, session, schedule))  # type: ignore
+    return session, schedule
+
+
+def channel(client: FakeClient) -> FakeTextChannel:
+    """Get the channel of the session."""
+    return client.channels_by_id[client.nightreign_service.data["abc"].channel_id]
+
+
+def test_backlog_is_delivered_in_chunks(client: FakeClient) -> None:
+    """A backlog too long for one message is split over several messages."""
+    session, schedule = deliver(client)
+
+    messages = list(channel(client).messages.values())
+    assert not session.outbox
+    assert len(messages) > 2
+    assert all(len(message.content) <= MESSAGE_LIMIT for message in messages)
+    assert client.nightreign_stats.events_total == 13
+    assert schedule.attempts == 0
+
+
+def test_rejected_edit_moves_to_a_new_message(
+    client: FakeClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """An edit discord rejects is sent to a new message instead of retried."""
+    original = FakeMessage.edit
+    rejected = set()
+
+    async def edit(self: FakeMessage, content: str | None = None, **kwargs: Any) -> Any:
+        if self.id == 1:
+            rejected.add(self.id)
+            raise http_error(404)
+        return await original(self, content, **kwargs)
+
+    monkeypatch.setattr(FakeMessage, "edit", edit)
+    session, schedule = deliver(client)
+
+    assert rejected == {1}
+    assert not session.outbox
+    assert session.event_log_id != 1
+    assert schedule.retry_at == 0.0
+
+
+def test_edit_rejected_twice_is_dropped(
+    client: FakeClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The events are dropped when discord rejects them in a new message too."""
+
+    async def edit(self: FakeMessage, content: str | None = None, **kwargs: Any) -> Any:
+        raise http_error(403)
+
+    monkeypatch.setattr(FakeMessage, "edit", edit)
+    session, schedule = deliver(client)
+
+    assert not session.outbox
+    assert schedule.attempts == 0
+    assert client.nightreign_stats.events_total == 0
+
+
+def test_server_error_is_retried(
+    client: FakeClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """The outbox is kept and retried with backoff on a server error."""
+
+    async def edit(self: FakeMessage, content: str | None = None, **kwargs: Any) -> Any:
+        raise http_error(503)
+
+    monkeypatch.setattr(FakeMessage, "edit", edit)
+    session, schedule = deliver(client)
+
+    assert len(session.outbox) == 13
+    assert schedule.attempts == 1
+    assert schedule.retry_at > 0
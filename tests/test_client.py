@@ -0,0 +1,62 @@
+"""This module contains the tests for the client."""
+
+import asyncio
+from pathlib import Path
+
+from discord import Intents
+
+from benchmarks.nightreign import create_service
+from src.client import FromCordClient
+from src.monitoring import CommandStats, LoopStats, LoopWatchdog, Metrics
+
+
+def create_client(directory: Path) -> FromCordClient:
+    """Create a client that saves to a directory, without connecting."""
+    service = create_service(str(directory))
+    service.guild_config.file.on_ready()
+    service.on_ready([])
+    nightreign_stats = LoopStats(name="nightreign_loop", interval=5)
+    watchdog = LoopWatchdog(threshold=0.5)
+    return FromCordClient(
+        intents=Intents.none(),
+        app_config=service.app_config,
+        guild_config=service.guild_config,
+        nightreign_service=service,
+        nightreign_stats=nightreign_stats,
+        clean_stats=LoopStats(name="clean_and_save", interval=300),
+        command_stats=CommandStats(),
+        metrics=Metrics(
+            nightreign_service=service,
+            nightreign_stats=nightreign_stats,
+            command_stats=CommandStats(),
+            watchdog=watchdog,
+        ),
+        watchdog=watchdog,
+    )
+
+
+def test_sigterm_stops_the_loops_and_keeps_the_task(tmp_path: Path) -> None:
+    """A shutdown stops the loops and is only started once."""
+    client = create_client(tmp_path)
+    saved = []
+
+    async def close() -> None:
+        saved.append(client.nightreign_loop.is_running())
+
+    client.close = close  # type: ignore
+
+    async def run() -> None:
+        client.nightreign_loop.start()
+        client.clean_and_save.start()
+        client.on_sigterm()
+        task = client.shutdown_task
+        client.on_sigterm()
+        assert client.shutdown_task is task
+        assert task
+        await task
+
+    asyncio.run(run())
+
+    assert saved == [False]
+    assert not client.clean_and_save.is_running()
+    assert (tmp_path / "scheduler.json").exists()